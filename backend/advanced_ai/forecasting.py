@@ -1,19 +1,24 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 import json
 
 class AdvancedAIForecaster:
     def __init__(self):
         self.models = {}
         
-    def generate_advanced_forecast(self, transactions: List[Dict], inflation_rate: float = 0.02) -> Dict[str, Any]:
-        """Generate advanced AI-powered financial forecasts"""
-        if not transactions:
+    def generate_advanced_forecast(self, transactions: Union[List[Dict], pd.DataFrame], inflation_rate: float = 0.02) -> Dict[str, Any]:
+        """Generate advanced AI-powered financial forecasts
+        
+        transactions is a list of dicts or a DataFrame such as
+        analytics.columnar.transaction_frame() returns.
+        """
+        if len(transactions) == 0:
             return self.get_empty_forecast()
         
-        df = pd.DataFrame(transactions)
+        # Shallow copy: the columns replaced below are not written back to the caller's frame
+        df = transactions.copy(deep=False) if isinstance(transactions, pd.DataFrame) else pd.DataFrame(transactions)
         df['transaction_date'] = pd.to_datetime(df['transaction_date'])
         df['amount'] = pd.to_numeric(df['amount'])
         
@@ -134,7 +139,7 @@ class AdvancedAIForecaster:
             
             # Category optimization insights
             if not expense_df.empty and 'category' in expense_df.columns:
-                category_spending = expense_df.groupby('category')['amount'].sum()
+                category_spending = expense_df.groupby('category', observed=True)['amount'].sum()
                 top_category = category_spending.idxmax() if not category_spending.empty else None
                 
                 if top_category and category_spending[top_category] > expense_df['amount'].sum() * 0.4:
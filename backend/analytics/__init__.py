@@ -1,5 +1,6 @@
 from .financial_analytics import AdvancedFinancialAnalytics
+from .sql_analytics import SQLFinancialAnalytics, sql_analytics
 
 analytics_engine = AdvancedFinancialAnalytics()
 
-__all__ = ["analytics_engine", "AdvancedFinancialAnalytics"]
+__all__ = ["analytics_engine", "AdvancedFinancialAnalytics", "sql_analytics", "SQLFinancialAnalytics"]
@@ -0,0 +1,155 @@
+"""
+Columnar fetch of a user's transactions for the analytics engines.
+
+Handlers used to select whole Transaction ORM objects (each hydrated and held
+in the session's identity map), copy them into a list of dicts and hand that to
+pd.DataFrame: three copies of the same rows, with per-row Python objects in
+every one. transaction_frame() selects only the columns asked for and streams
+the result in partitions straight into typed arrays:
+
+    amount             float64
+    transaction_date   datetime64[ns]
+    category, currency categorical (int codes per row, each distinct value once)
+    id, account_id     int64
+    description        object
+
+Dates are read as the driver returns them (ISO strings on SQLite) and parsed by
+pandas once per partition instead of by SQLAlchemy once per row. Peak memory is
+the arrays being built plus one partition of driver rows.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, select, type_coerce
+
+from models import InlineSession, Transaction
+
+TRANSACTION_DTYPES = {
+    'id': 'int64',
+    'account_id': 'int64',
+    'amount': 'float64',
+    'description': 'object',
+    'category': 'category',
+    'currency': 'category',
+    'transaction_date': 'datetime64[ns]',
+}
+FORECAST_COLUMNS = ('amount', 'transaction_date', 'category', 'currency')
+
+
+class _CategoricalColumn:
+    """A categorical built partition by partition: codes per row, one shared category list"""
+
+    def __init__(self):
+        self.categories = {}
+        self.codes = []
+
+    def append(self, values):
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        if len(uniques):
+            # Partition-local codes -> codes in the shared category list (-1 stays missing)
+            shared = np.fromiter(
+                (self.categories.setdefault(value, len(self.categories)) for value in uniques),
+                dtype=np.int32, count=len(uniques)
+            )
+            codes = np.where(codes >= 0, shared[codes], -1)
+        self.codes.append(codes.astype(np.int32, copy=False))
+
+    def finish(self):
+        codes = np.concatenate(self.codes) if self.codes else np.empty(0, dtype=np.int32)
+        return pd.Categorical.from_codes(codes, categories=list(self.categories))
+
+
+class _ArrayColumn:
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.chunks = []
+
+    def append(self, values):
+        if self.dtype == 'datetime64[ns]':
+            values = np.asarray(values, dtype=object)
+            parsed = pd.to_datetime(values, format='ISO8601') if isinstance(_first(values), str) else pd.to_datetime(values)
+            self.chunks.append(np.asarray(parsed, dtype='datetime64[ns]'))
+        else:
+            self.chunks.append(np.asarray(values, dtype=self.dtype))
+
+    def finish(self):
+        return np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=self.dtype)
+
+
+def _first(values):
+    """First non-missing value, to tell driver strings from datetime objects"""
+    for value in values:
+        if value is not None:
+            return value
+    return None
+
+
+class TransactionFrameBuilder:
+    """Typed columns filled from partitions of result rows, then one DataFrame"""
+
+    def __init__(self, columns: Sequence[str]):
+        unknown = [column for column in columns if column not in TRANSACTION_DTYPES]
+        if unknown:
+            raise ValueError(f"No columnar dtype for transaction columns {unknown}")
+        self.columns = list(columns)
+        self._builders = [
+            _CategoricalColumn() if TRANSACTION_DTYPES[column] == 'category' else _ArrayColumn(TRANSACTION_DTYPES[column])
+            for column in self.columns
+        ]
+
+    def add(self, rows: Iterable[Sequence]):
+        rows = list(rows)
+        if not rows:
+            return
+        for builder, values in zip(self._builders, zip(*rows)):
+            builder.append(values)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({column: builder.finish() for column, builder in zip(self.columns, self._builders)})
+
+
+def transaction_columns_query(user_id: int, columns: Sequence[str], since: Optional[datetime] = None):
+    """SELECT of just these Transaction columns for one user (dates left as the driver returns them)"""
+    selected = [
+        # No result processor: parsed per partition by TransactionFrameBuilder instead of per row
+        type_coerce(Transaction.transaction_date, String).label('transaction_date')
+        if column == 'transaction_date' else getattr(Transaction, column)
+        for column in columns
+    ]
+    query = select(*selected).where(Transaction.user_id == user_id)
+    if since is not None:
+        query = query.where(Transaction.transaction_date >= since)
+    return query
+
+
+async def transaction_frame(db, user_id: int, columns: Sequence[str] = FORECAST_COLUMNS,
+                            since: Optional[datetime] = None, chunk_size: int = 10000) -> pd.DataFrame:
+    """The user's transactions (since a date, if given) as a DataFrame of typed columns"""
+    if isinstance(db, InlineSession):
+        # SQLite without an async driver: nothing to await, read it directly
+        return transaction_frame_sync(db.sync_session, user_id, columns, since, chunk_size)
+    builder = TransactionFrameBuilder(columns)
+    # On the session's Core connection (same transaction): a Session would still pass every
+    # row of a column-only select through ORM result processing
+    connection = await db.connection()
+    result = await connection.stream(
+        transaction_columns_query(user_id, columns, since).execution_options(yield_per=chunk_size)
+    )
+    async for partition in result.partitions():
+        builder.add(partition)
+    return builder.frame()
+
+
+def transaction_frame_sync(db, user_id: int, columns: Sequence[str] = FORECAST_COLUMNS,
+                           since: Optional[datetime] = None, chunk_size: int = 10000) -> pd.DataFrame:
+    """transaction_frame() for a synchronous Session (scripts and jobs)"""
+    builder = TransactionFrameBuilder(columns)
+    result = db.connection().execute(
+        transaction_columns_query(user_id, columns, since).execution_options(yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        builder.add(partition)
+    return builder.frame()
@@ -1,34 +1,87 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 import asyncio
 
+from analytics.recurring import recurring_expenses
+
+# One row per (month, category, currency) as stored in transaction_rollups; category is
+# "" for uncategorized transactions and rows whose transactions were all removed have count 0
+ROLLUP_COLUMNS = [
+    'month', 'category', 'currency', 'total_amount', 'transaction_count',
+    'income_amount', 'income_count', 'expense_amount', 'expense_count'
+]
+# Per-transaction fields for the parts rollups cannot answer (merchants, recurring, keywords)
+DETAIL_COLUMNS = ['amount', 'description', 'category', 'currency', 'transaction_date']
+
+# Description keywords (matched case-insensitively) of Zimbabwe-specific payment channels
+MOBILE_MONEY_KEYWORDS = ['ecocash', 'onemoney', 'telecash', 'mobile money']
+BANK_KEYWORDS = ['bank', 'atm', 'cbz', 'stanbic', 'standard chartered', 'nmb']
+INFORMAL_SECTOR_KEYWORDS = [
+    'market', 'musika', 'vendor', 'street', 'informal', 'hawker',
+    'mbare', 'road port', 'avondale', 'flea market'
+]
+
+
+def rollup_transactions(transactions: List[Dict]) -> List[Dict]:
+    """Roll transaction dicts up the way transaction_rollups does, for callers without the table"""
+    if not transactions:
+        return []
+    df = pd.DataFrame(transactions)
+    df['month'] = pd.to_datetime(df['transaction_date']).dt.strftime('%Y-%m')
+    df['category'] = df['category'].fillna('') if 'category' in df.columns else ''
+    df['income'] = df['amount'].where(df['amount'] > 0, 0.0)
+    df['expense'] = df['amount'].where(df['amount'] < 0, 0.0)
+    rollups = df.groupby(['month', 'category', 'currency']).agg(
+        total_amount=('amount', 'sum'),
+        transaction_count=('amount', 'size'),
+        income_amount=('income', 'sum'),
+        income_count=('income', lambda values: int((values > 0).sum())),
+        expense_amount=('expense', 'sum'),
+        expense_count=('expense', lambda values: int((values < 0).sum()))
+    ).reset_index()
+    return rollups.to_dict('records')
+
+
 class AdvancedFinancialAnalytics:
     def __init__(self):
         self.inflation_rate = 0.02  # Default 2% monthly inflation
-        
-    def calculate_spending_insights(self, transactions: List[Dict]) -> Dict[str, Any]:
-        """Generate comprehensive spending insights"""
-        if not transactions:
+    
+    def rollup_frame(self, rollups: List[Dict]) -> pd.DataFrame:
+        df = pd.DataFrame(rollups, columns=ROLLUP_COLUMNS)
+        df = df[df['transaction_count'] > 0].copy()
+        df['category'] = df['category'].replace('', np.nan)
+        return df
+    
+    def detail_frame(self, transactions: Union[List[Dict], pd.DataFrame]) -> pd.DataFrame:
+        # A typed frame from analytics.columnar.transaction_frame() is used as is
+        if isinstance(transactions, pd.DataFrame):
+            return transactions
+        df = pd.DataFrame(list(transactions), columns=DETAIL_COLUMNS)
+        df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+        return df
+        
+    def calculate_spending_insights(self, rollups: List[Dict], transactions: Union[List[Dict], pd.DataFrame] = ()) -> Dict[str, Any]:
+        """
+        Generate comprehensive spending insights
+        
+        Totals, trends and categories come from the monthly rollups; merchants and
+        recurring expenses from transactions (the recent ones the caller fetched).
+        """
+        df = self.rollup_frame(rollups)
+        if df.empty:
             return {}
-        
-        df = pd.DataFrame(transactions)
-        
-        # Convert transaction_date if it's string
-        if 'transaction_date' in df.columns:
-            df['transaction_date'] = pd.to_datetime(df['transaction_date'])
-            df['month'] = df['transaction_date'].dt.to_period('M')
+        detail_df = self.detail_frame(transactions)
         
         # Monthly spending trends
-        monthly_spending = df.groupby('month')['amount'].sum().reset_index()
-        monthly_spending['month'] = monthly_spending['month'].astype(str)
+        monthly_spending = df.groupby('month')['total_amount'].sum().reset_index()
+        monthly_spending.columns = ['month', 'amount']
         
         # Category breakdown (only expenses, negative amounts)
-        expense_df = df[df['amount'] < 0].copy()
+        expense_df = df[df['expense_count'] > 0]
         if not expense_df.empty:
-            expense_df['amount_abs'] = expense_df['amount'].abs()
-            category_spending = expense_df.groupby('category')['amount_abs'].sum().sort_values(ascending=False)
+            category_spending = expense_df.groupby('category')['expense_amount'].sum().abs().sort_values(ascending=False)
         else:
             category_spending = pd.Series(dtype=float)
         
@@ -43,10 +96,10 @@ class AdvancedFinancialAnalytics:
                            if previous_spending != 0 else 0)
         
         # Recurring expense identification
-        recurring_patterns = self.identify_recurring_expenses(df)
+        recurring_patterns = self.identify_recurring_expenses(detail_df)
         
         # Top merchants
-        top_merchants = df.groupby('description')['amount'].sum().abs().sort_values(ascending=False).head(10)
+        top_merchants = detail_df.groupby('description')['amount'].sum().abs().sort_values(ascending=False).head(10)
         
         return {
             'monthly_trends': monthly_spending.to_dict('records'),
@@ -56,57 +109,25 @@ class AdvancedFinancialAnalytics:
             'recurring_expenses': recurring_patterns,
             'top_categories': dict(list(category_spending.head(5).items())),
             'top_merchants': top_merchants.to_dict(),
-            'total_income': df[df['amount'] > 0]['amount'].sum(),
-            'total_expenses': df[df['amount'] < 0]['amount'].sum(),
-            'net_cash_flow': df['amount'].sum()
+            'total_income': df['income_amount'].sum(),
+            'total_expenses': df['expense_amount'].sum(),
+            'net_cash_flow': df['total_amount'].sum()
         }
     
     def identify_recurring_expenses(self, df: pd.DataFrame) -> List[Dict]:
-        """Identify potential recurring expenses"""
+        """Identify recurring expenses by the cadence of each merchant's payments (analytics/recurring.py)"""
         if df.empty:
             return []
-        
-        # Group by description and look for patterns
-        expense_patterns = df.groupby('description').agg({
-            'amount': ['count', 'mean', 'std'],
-            'transaction_date': ['min', 'max']
-        }).round(2)
-        
-        # Flatten column names
-        expense_patterns.columns = ['_'.join(col).strip() for col in expense_patterns.columns.values]
-        
-        recurring = []
-        for desc, stats in expense_patterns.iterrows():
-            count = stats['amount_count']
-            date_min = stats['transaction_date_min']
-            date_max = stats['transaction_date_max']
-            
-            if pd.notna(date_min) and pd.notna(date_max):
-                date_range = (date_max - date_min).days
-            else:
-                date_range = 0
-            
-            if count >= 3 and date_range > 30:  # At least 3 occurrences over 30+ days
-                avg_amount = stats['amount_mean']
-                frequency = date_range / count  # Average days between occurrences
-                
-                recurring.append({
-                    'description': desc,
-                    'frequency_days': round(frequency),
-                    'average_amount': round(abs(avg_amount), 2),
-                    'occurrences': int(count),
-                    'estimated_next_date': (datetime.now() + timedelta(days=frequency)).strftime('%Y-%m-%d')
-                })
-        
-        return sorted(recurring, key=lambda x: x['occurrences'], reverse=True)[:10]  # Top 10
-    
-    def generate_cash_flow_forecast(self, transactions: List[Dict], 
+        return recurring_expenses(df)  # Top 10 active patterns
+
+    def generate_cash_flow_forecast(self, rollups: List[Dict], 
                                   accounts: List[Dict], inflation_rate: float = None) -> Dict:
         """Generate advanced cash flow forecast with inflation adjustment"""
         if inflation_rate is None:
             inflation_rate = self.inflation_rate
         
-        if not transactions:
+        df = self.rollup_frame(rollups)
+        if df.empty:
             return {
                 'forecast': [],
                 'risk_assessment': 'low',
@@ -115,20 +136,11 @@ class AdvancedFinancialAnalytics:
                 'inflation_adjustment': inflation_rate
             }
         
-        df = pd.DataFrame(transactions)
-        
         # Calculate historical averages (only expenses)
-        expense_df = df[df['amount'] < 0].copy()
+        expense_df = df[df['expense_count'] > 0]
         if not expense_df.empty:
-            expense_df['transaction_date'] = pd.to_datetime(expense_df['transaction_date'])
-            expense_df['month'] = expense_df['transaction_date'].dt.to_period('M')
-            
-            monthly_data = expense_df.groupby('month').agg({
-                'amount': ['sum', 'mean', 'std']
-            }).reset_index()
-            
-            # Flatten columns
-            monthly_data.columns = ['month', 'total_spent', 'avg_transaction', 'std_transaction']
+            monthly_data = expense_df.groupby('month')['expense_amount'].sum().reset_index()
+            monthly_data.columns = ['month', 'total_spent']
             
             # Simple forecasting with inflation adjustment
             if len(monthly_data) >= 3:
@@ -175,26 +187,26 @@ class AdvancedFinancialAnalytics:
             'current_balance': sum(acc.get('balance', 0) for acc in accounts)
         }
     
-    def calculate_financial_health_score(self, transactions: List[Dict], 
+    def calculate_financial_health_score(self, rollups: List[Dict], 
                                        accounts: List[Dict], goals: List[Dict]) -> Dict:
         """Calculate comprehensive financial health score"""
-        if not transactions:
+        df = self.rollup_frame(rollups)
+        if df.empty:
             return {
                 'score': 0, 
                 'breakdown': {},
                 'recommendations': ['Start tracking your transactions to get a financial health score.']
             }
         
-        df = pd.DataFrame(transactions)
         total_balance = sum(acc.get('balance', 0) for acc in accounts)
         
         # Spending diversity (positive to have diverse spending)
-        category_counts = df['category'].nunique() if 'category' in df.columns else 0
+        category_counts = df['category'].nunique()
         spending_diversity = min(category_counts / 10, 1.0)  # Normalize to 0-1
         
         # Savings rate
-        income_transactions = df[df['amount'] > 0]['amount'].sum()
-        expense_transactions = abs(df[df['amount'] < 0]['amount'].sum())
+        income_transactions = df['income_amount'].sum()
+        expense_transactions = abs(df['expense_amount'].sum())
         
         if income_transactions > 0:
             savings_rate = (income_transactions - expense_transactions) / income_transactions
@@ -210,8 +222,9 @@ class AdvancedFinancialAnalytics:
         else:
             goal_progress = 0
         
-        # Balance to monthly expenses ratio
-        monthly_expenses = expense_transactions / (len(df['transaction_date'].unique()) or 1)
+        # Balance to monthly expenses ratio. The divisor used to be the number of distinct
+        # transaction timestamps; the rollups count transactions, the same unless two share one
+        monthly_expenses = expense_transactions / (int(df['transaction_count'].sum()) or 1)
         if monthly_expenses > 0:
             emergency_fund_ratio = total_balance / monthly_expenses
         else:
@@ -259,22 +272,21 @@ class AdvancedFinancialAnalytics:
         
         return recommendations[:5]  # Return top 5 recommendations
 
-    def generate_zimbabwe_specific_insights(self, transactions: List[Dict]) -> Dict[str, Any]:
+    def generate_zimbabwe_specific_insights(self, rollups: List[Dict], transactions: Union[List[Dict], pd.DataFrame] = ()) -> Dict[str, Any]:
         """Generate insights specific to Zimbabwe's economic context"""
-        if not transactions:
+        rollup_df = self.rollup_frame(rollups)
+        if rollup_df.empty:
             return {}
         
-        df = pd.DataFrame(transactions)
-        
         # Multi-currency analysis
-        currency_breakdown = df.groupby('currency')['amount'].sum().to_dict()
+        currency_breakdown = rollup_df.groupby('currency')['total_amount'].sum().to_dict()
         
-        # Mobile money vs bank transactions
-        mobile_keywords = ['ecocash', 'onemoney', 'telecash', 'mobile money']
-        bank_keywords = ['bank', 'atm', 'cbz', 'stanbic', 'standard chartered', 'nmb']
+        # Description keywords need the transactions themselves
+        df = self.detail_frame(transactions)
         
-        mobile_transactions = df[df['description'].str.lower().str.contains('|'.join(mobile_keywords), na=False)]
-        bank_transactions = df[df['description'].str.lower().str.contains('|'.join(bank_keywords), na=False)]
+        # Mobile money vs bank transactions
+        mobile_transactions = df[df['description'].str.lower().str.contains('|'.join(MOBILE_MONEY_KEYWORDS), na=False)]
+        bank_transactions = df[df['description'].str.lower().str.contains('|'.join(BANK_KEYWORDS), na=False)]
         
         return {
             'currency_breakdown': currency_breakdown,
@@ -293,18 +305,15 @@ class AdvancedFinancialAnalytics:
     
     def analyze_informal_sector_spending(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze spending patterns in the informal sector"""
-        informal_keywords = [
-            'market', 'musika', 'vendor', 'street', 'informal', 'hawker',
-            'mbare', 'road port', 'avondale', 'flea market'
-        ]
-        
-        informal_transactions = df[df['description'].str.lower().str.contains('|'.join(informal_keywords), na=False)]
+        informal_transactions = df[df['description'].str.lower().str.contains('|'.join(INFORMAL_SECTOR_KEYWORDS), na=False)]
+        # A categorical column also counts the categories with no informal transactions
+        category_counts = informal_transactions['category'].value_counts() if 'category' in informal_transactions.columns else pd.Series(dtype=int)
         
         return {
             'count': len(informal_transactions),
             'total_amount': informal_transactions['amount'].sum(),
             'average_transaction': informal_transactions['amount'].mean() if len(informal_transactions) > 0 else 0,
-            'common_categories': informal_transactions['category'].value_counts().to_dict() if 'category' in informal_transactions.columns else {}
+            'common_categories': category_counts[category_counts > 0].to_dict()
         }
 
 # Export analytics_engine instance for import in main.py
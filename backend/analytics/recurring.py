@@ -0,0 +1,277 @@
+"""
+Recurring expense detection from inter-arrival gaps.
+
+identify_recurring_expenses() used to group by raw description and call
+anything seen 3 times over 30 days recurring, with a frequency of
+date_range / count: a subscription plus one late payment came out as some
+odd number of days, and "NETFLIX 0423" and "NETFLIX 0523" were different
+expenses. detect_recurring() instead:
+
+1. keys every expense by its payee (recurring_key(): the merchant index's
+   name, else the whole normalized description without the payment-channel
+   words in front of it, so "ECOCASH PAYMENT ZESA 0423" and "ECOCASH PAYMENT
+   TO JOHN" stay apart), computed once per distinct description
+2. sorts all expenses by (merchant, date) in one argsort and takes the gaps
+   between consecutive dates of the same merchant with np.diff
+3. per merchant, takes the median gap and its dispersion (median absolute
+   deviation of the gaps / median gap), both from one more sort
+4. calls a merchant recurring when the median gap falls in a cadence's window
+   (CADENCES) and the dispersion is at most MAX_DISPERSION; one missed or
+   doubled payment moves neither median
+5. predicts the next date as the last one plus the median gap (rolled forward
+   past today while the pattern is active); a pattern whose last payment is
+   more than STALE_AFTER_PERIODS gaps old is returned with is_active False
+
+No step loops over transactions or merchants in Python, so a million
+transactions take a few hundred milliseconds. sync_recurring_transactions()
+writes the active patterns to a user's RecurringTransaction rows:
+
+    python -m analytics.recurring sync
+    python -m analytics.recurring sync --user-id 3 7
+"""
+
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from analytics.columnar import transaction_frame_sync
+from ml.merchant_index import merchant_index
+from ml.scoring import normalize_description
+from ml.user_overlay import payee_tokens
+from models import RecurringTransaction, SessionLocal, Transaction
+
+# Columns detect_recurring() reads; the rest of RECURRING_COLUMNS is carried into the patterns
+DETECTION_COLUMNS = ('description', 'amount', 'transaction_date')
+RECURRING_COLUMNS = DETECTION_COLUMNS + ('currency', 'category', 'account_id')
+
+# Median gap (days) windows of each cadence
+CADENCES = {
+    'weekly': (5, 9),
+    'monthly': (26, 35),
+    'yearly': (335, 395),
+}
+MIN_OCCURRENCES = 3
+# Median absolute deviation of the gaps, relative to the median gap
+MAX_DISPERSION = 0.25
+STALE_AFTER_PERIODS = 2
+
+_SECONDS_PER_DAY = 86400
+PATTERN_COLUMNS = [
+    'merchant', 'description', 'frequency', 'interval_days', 'dispersion', 'occurrences',
+    'average_amount', 'typical_amount', 'first_date', 'last_date', 'next_date', 'is_active'
+]
+
+
+def _group_medians(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of values per group (NaN for groups without values)"""
+    if not len(values):
+        return np.full(n_groups, np.nan)
+    # Sorted by (group, value) through one float key, several times faster than np.lexsort;
+    # the key's rounding can only swap values less than n_groups * span * 2**-52 apart
+    low_value = values.min()
+    span = values.max() - low_value + 1
+    order = np.argsort(groups * span + (values - low_value))
+    values, groups = values[order], groups[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians = np.full(n_groups, np.nan)
+    medians[present] = (values[low] + values[high]) / 2
+    return medians
+
+
+def recurring_key(description: str) -> str:
+    """The payee a description pays: the merchant index's name for it, else its payee tokens
+
+    Digits are dropped, so changing reference numbers keep the key. Callers
+    must see the same merchant index: load it (merchant_index.load) outside
+    the API, which loads it at startup.
+    """
+    merchant = merchant_index.match(description)
+    if merchant:
+        return normalize_description(merchant['merchant_name'])
+    return ' '.join(payee_tokens(description))
+
+
+def merchant_codes(descriptions: pd.Series):
+    """(merchant code per row, merchant keys); -1 for rows without a merchant in the description"""
+    description_codes, distinct = pd.factorize(descriptions)
+    keys = np.array([recurring_key(description) for description in distinct], dtype=object)
+    key_codes, merchants = pd.factorize(keys)
+    # Nothing left after normalizing (only digits or punctuation): no merchant to group by
+    key_codes[keys == ''] = -1
+    codes = np.where(description_codes >= 0, key_codes[description_codes] if len(key_codes) else -1, -1)
+    return codes, merchants
+
+
+def detect_recurring(transactions: pd.DataFrame, now: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Recurring expense patterns in a frame with DETECTION_COLUMNS, one row per merchant
+
+    Columns are PATTERN_COLUMNS plus the latest occurrence's value of any
+    other RECURRING_COLUMNS the frame has. Most occurrences first.
+    """
+    now = now or datetime.utcnow()
+    extra = [column for column in RECURRING_COLUMNS if column in transactions and column not in DETECTION_COLUMNS]
+    if transactions.empty:
+        return pd.DataFrame(columns=PATTERN_COLUMNS + extra)
+
+    # Positions of the expenses with a date and a merchant; columns are indexed by position
+    # rather than filtering the frame, which would copy every description
+    codes, merchants = merchant_codes(transactions['description'])
+    dates = transactions['transaction_date'].to_numpy('datetime64[ns]')
+    amounts = transactions['amount'].to_numpy(np.float64)
+    rows = np.flatnonzero((amounts < 0) & ~np.isnat(dates) & (codes >= 0))
+    if not len(rows):
+        return pd.DataFrame(columns=PATTERN_COLUMNS + extra)
+    seconds = dates[rows].astype('datetime64[s]').astype(np.int64)
+
+    # (merchant, date) order from one int64 key: code in the high bits, seconds since the
+    # earliest transaction in the low 32 (136 years)
+    offsets = seconds - seconds.min()
+    order = np.argsort((codes[rows].astype(np.int64) << 32) | offsets)
+    rows, offsets = rows[order], offsets[order]
+    codes, amounts = codes[rows].astype(np.int64), amounts[rows]
+
+    n_merchants = len(merchants)
+    counts = np.bincount(codes, minlength=n_merchants)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    # Gaps between consecutive payments to the same merchant
+    same_merchant = codes[1:] == codes[:-1]
+    gaps = (np.diff(offsets)[same_merchant] / _SECONDS_PER_DAY)
+    gap_codes = codes[1:][same_merchant]
+    median_gap = _group_medians(gaps, gap_codes, n_merchants)
+
+    frequency = np.full(n_merchants, None, dtype=object)
+    for name, (low, high) in CADENCES.items():
+        frequency[(median_gap >= low) & (median_gap <= high)] = name
+    candidate = (counts >= MIN_OCCURRENCES) & (frequency != None)  # noqa: E711
+
+    # Dispersion only for merchants whose median gap is a cadence
+    in_candidate = candidate[gap_codes]
+    deviation = _group_medians(
+        np.abs(gaps[in_candidate] - median_gap[gap_codes[in_candidate]]), gap_codes[in_candidate], n_merchants
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dispersion = np.where(median_gap > 0, deviation / median_gap, np.inf)
+    recurring = candidate & (dispersion <= MAX_DISPERSION)
+    found = np.flatnonzero(recurring)
+    last = ends[found] - 1
+
+    # Next date: last payment plus the median gap, rolled forward by whole gaps past today
+    base = int(seconds.min())
+    interval = median_gap[found] * _SECONDS_PER_DAY
+    last_seconds = base + offsets[last]
+    next_seconds = last_seconds + interval
+    today = np.datetime64(now, 's').astype(np.int64)
+    active = today - last_seconds <= STALE_AFTER_PERIODS * interval
+    behind = np.where(active, np.maximum(np.ceil((today - next_seconds) / interval), 0), 0)
+    next_seconds = next_seconds + behind * interval
+
+    in_found = recurring[codes]
+    last_rows = rows[last]
+    patterns = pd.DataFrame({
+        'merchant': merchants[found],
+        'description': transactions['description'].to_numpy(object)[last_rows],
+        'frequency': frequency[found],
+        'interval_days': median_gap[found],
+        'dispersion': dispersion[found],
+        'occurrences': counts[found],
+        'average_amount': (np.bincount(codes, weights=np.abs(amounts), minlength=n_merchants)[found]
+                           / counts[found]),
+        'typical_amount': _group_medians(amounts[in_found], codes[in_found], n_merchants)[found],
+        'first_date': (base + offsets[starts[found]]).astype('datetime64[s]').astype('datetime64[ns]'),
+        'last_date': last_seconds.astype('datetime64[s]').astype('datetime64[ns]'),
+        'next_date': next_seconds.astype(np.int64).astype('datetime64[s]').astype('datetime64[ns]'),
+        'is_active': active,
+    })
+    for column in extra:
+        patterns[column] = transactions[column].to_numpy()[last_rows]
+    return patterns.sort_values(['occurrences', 'description'], ascending=[False, True], ignore_index=True)
+
+
+def recurring_expenses(transactions: pd.DataFrame, limit: int = 10, now: Optional[datetime] = None) -> List[Dict]:
+    """The spending insights' 'recurring_expenses': active patterns, most occurrences first"""
+    patterns = detect_recurring(transactions, now)
+    patterns = patterns[patterns['is_active']].head(limit)
+    return [{
+        'description': row.description,
+        'frequency': row.frequency,
+        'frequency_days': round(row.interval_days),
+        'average_amount': round(row.average_amount, 2),
+        'occurrences': int(row.occurrences),
+        'estimated_next_date': row.next_date.strftime('%Y-%m-%d')
+    } for row in patterns.itertuples()]
+
+
+def sync_recurring_transactions(db, user_id: int, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Bring the user's RecurringTransaction rows in line with their detected patterns
+
+    Detection runs over the user's whole history. A pattern updates the active
+    row whose description has the same recurring_key() (frequency, amount,
+    currency, next due date) or creates one; rows the user deactivated are left
+    alone. A pattern that has stopped deactivates its row. Commits.
+    """
+    patterns = detect_recurring(transaction_frame_sync(db, user_id, RECURRING_COLUMNS), now)
+    rows = {}
+    for row in db.query(RecurringTransaction).filter(RecurringTransaction.user_id == user_id).order_by(RecurringTransaction.id):
+        rows.setdefault(recurring_key(row.description), row)
+
+    counts = {'created': 0, 'updated': 0, 'deactivated': 0}
+    for pattern in patterns.itertuples():
+        row = rows.get(pattern.merchant)
+        if not pattern.is_active:
+            if row is not None and row.is_active:
+                row.is_active = False
+                counts['deactivated'] += 1
+            continue
+        values = {
+            'amount': round(float(pattern.typical_amount), 2),  # Signed like the transactions
+            'currency': pattern.currency,
+            'frequency': pattern.frequency,
+            'next_due_date': pattern.next_date.to_pydatetime(),
+        }
+        if row is None:
+            db.add(RecurringTransaction(
+                user_id=user_id, account_id=int(pattern.account_id), description=pattern.description,
+                category=pattern.category if isinstance(pattern.category, str) else None, **values
+            ))
+            counts['created'] += 1
+        elif row.is_active:
+            for field, value in values.items():
+                setattr(row, field, value)
+            counts['updated'] += 1
+    db.commit()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect recurring expenses and keep RecurringTransaction rows in step")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="create, update and deactivate detected recurring transactions")
+    sync.add_argument("--user-id", type=int, nargs="+", help="only these users")
+    args = parser.parse_args(argv)
+
+    totals = {'created': 0, 'updated': 0, 'deactivated': 0}
+    with SessionLocal() as db:
+        # Keys must come out as they do in the API, which matches names from the index
+        merchant_index.load(db)
+        user_ids = args.user_id or db.scalars(select(Transaction.user_id).distinct()).all()
+        for user_id in user_ids:
+            for name, count in sync_recurring_transactions(db, user_id).items():
+                totals[name] += count
+    print(f"[+] Recurring transactions for {len(user_ids)} users: "
+          f"{totals['created']} created, {totals['updated']} updated, {totals['deactivated']} deactivated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Spending insights computed by the database (ANALYTICS_BACKEND=sql).
+
+The pandas engine in financial_analytics.py receives the user's rollup rows and
+every transaction of the detail window, then groups them itself: by month and
+category for trends, by description for merchants and recurring expenses, by
+keyword for the Zimbabwe context. Here the same aggregates are GROUP BY queries,
+so only their results cross the wire:
+
+- month buckets: transaction_rollups rows, which carry the strftime/to_char
+  month of models.rollups.month_bucket(), grouped by month
+- income/expense totals: SUM over the rollups' income/expense columns, themselves
+  conditional SUM(CASE ...) aggregates of the transactions
+- top merchants: GROUP BY description ORDER BY ABS(SUM(amount)) DESC LIMIT 10
+- recurring expenses: need every payment's date for their gaps, so the window's
+  description, amount and date columns are streamed (analytics.columnar) into
+  the detector the pandas engine uses (analytics.recurring)
+- keyword usage: SUM(CASE WHEN lower(description) LIKE ...) over the window
+  grouped by description
+
+The response schema is the one calculate_spending_insights() plus
+generate_zimbabwe_specific_insights() return. On PostgreSQL all of the grouping
+runs in the database server; on SQLite it still saves building DataFrames from
+every recent transaction.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, or_, select
+
+from analytics.columnar import transaction_frame
+from analytics.financial_analytics import (
+    BANK_KEYWORDS, INFORMAL_SECTOR_KEYWORDS, MOBILE_MONEY_KEYWORDS
+)
+from analytics.recurring import DETECTION_COLUMNS, recurring_expenses
+from models import Transaction, TransactionRollup
+
+
+def _matches_any(column, keywords):
+    """Case-insensitive substring match of column against any keyword"""
+    lowered = func.lower(column)
+    return or_(*(lowered.like(f"%{keyword}%") for keyword in keywords))
+
+
+class SQLFinancialAnalytics:
+    """calculate_spending_insights() and its Zimbabwe context as GROUP BY queries"""
+
+    async def spending_insights(self, db, user_id: int, window_start: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Spending insights with 'zimbabwe_context', as main.spending_insights() returns them
+
+        window_start limits the per-transaction parts (merchants, recurring
+        expenses, keyword usage) like the transactions the pandas engine is given.
+        """
+        monthly = await self.monthly_totals(db, user_id)
+        if not monthly:
+            return {'zimbabwe_context': {}}
+
+        insights = await self.calculate_spending_insights(db, user_id, monthly, window_start)
+        insights['zimbabwe_context'] = await self.generate_zimbabwe_specific_insights(db, user_id, window_start)
+        return insights
+
+    async def monthly_totals(self, db, user_id: int) -> List[Dict]:
+        rollups = TransactionRollup
+        result = await db.execute(
+            select(
+                rollups.month,
+                func.sum(rollups.total_amount).label('amount'),
+                func.sum(rollups.income_amount).label('income'),
+                func.sum(rollups.expense_amount).label('expense')
+            )
+            .where(rollups.user_id == user_id, rollups.transaction_count > 0)
+            .group_by(rollups.month)
+            .order_by(rollups.month)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def calculate_spending_insights(self, db, user_id: int, monthly: List[Dict],
+                                          window_start: Optional[datetime] = None) -> Dict[str, Any]:
+        rollups = TransactionRollup
+
+        # Category breakdown (only expenses); uncategorized rows are stored as ""
+        expense_total = func.abs(func.sum(rollups.expense_amount)).label('total')
+        category_rows = (await db.execute(
+            select(rollups.category, expense_total)
+            .where(rollups.user_id == user_id, rollups.expense_count > 0, rollups.category != '')
+            .group_by(rollups.category)
+            .order_by(expense_total.desc(), rollups.category)
+        )).all()
+        category_spending = {row.category: row.total for row in category_rows}
+
+        # Spending velocity (rate of spending)
+        amounts = {row['month']: row['amount'] for row in monthly}
+        current_spending = amounts.get(datetime.now().strftime('%Y-%m'), 0)
+        previous_spending = amounts.get((datetime.now() - timedelta(days=30)).strftime('%Y-%m'), 0)
+        spending_velocity = ((current_spending - previous_spending) / abs(previous_spending) * 100
+                             if previous_spending != 0 else 0)
+
+        # Top merchants
+        merchant_total = func.abs(func.sum(Transaction.amount)).label('total')
+        merchant_rows = (await db.execute(
+            self._detail(select(Transaction.description, merchant_total), user_id, window_start)
+            .group_by(Transaction.description)
+            .order_by(merchant_total.desc(), Transaction.description)
+            .limit(10)
+        )).all()
+
+        return {
+            'monthly_trends': [{'month': row['month'], 'amount': row['amount']} for row in monthly],
+            'category_breakdown': category_spending,
+            'spending_velocity': round(spending_velocity, 2),
+            'average_monthly_spend': round(sum(amounts.values()) / len(amounts), 2),
+            'recurring_expenses': await self.identify_recurring_expenses(db, user_id, window_start),
+            'top_categories': dict(list(category_spending.items())[:5]),
+            'top_merchants': {row.description: row.total for row in merchant_rows},
+            'total_income': sum(row['income'] for row in monthly),
+            'total_expenses': sum(row['expense'] for row in monthly),
+            'net_cash_flow': sum(amounts.values())
+        }
+
+    async def identify_recurring_expenses(self, db, user_id: int,
+                                          window_start: Optional[datetime] = None) -> List[Dict]:
+        """Merchants paid on a weekly, monthly or yearly cadence, most frequent first"""
+        # A median of gaps between consecutive payments has no portable GROUP BY form
+        return recurring_expenses(await transaction_frame(db, user_id, DETECTION_COLUMNS, since=window_start))
+
+    async def generate_zimbabwe_specific_insights(self, db, user_id: int,
+                                                  window_start: Optional[datetime] = None) -> Dict[str, Any]:
+        rollups = TransactionRollup
+
+        # Multi-currency analysis
+        currency_rows = (await db.execute(
+            select(rollups.currency, func.sum(rollups.total_amount))
+            .where(rollups.user_id == user_id, rollups.transaction_count > 0)
+            .group_by(rollups.currency)
+            .order_by(rollups.currency)
+        )).all()
+
+        # Mobile money, bank and informal-sector usage. Transactions are first counted per
+        # (description, category), so the keywords are matched once per distinct description
+        # instead of once per transaction
+        grouped = self._detail(select(
+            Transaction.description,
+            Transaction.category,
+            func.count().label('count'),
+            func.sum(Transaction.amount).label('amount')
+        ), user_id, window_start).group_by(Transaction.description, Transaction.category).subquery()
+
+        mobile = _matches_any(grouped.c.description, MOBILE_MONEY_KEYWORDS)
+        bank = _matches_any(grouped.c.description, BANK_KEYWORDS)
+        informal = _matches_any(grouped.c.description, INFORMAL_SECTOR_KEYWORDS)
+        # Per category, for the informal sector's common categories; one query for all of it
+        # (a separate WHERE on the informal keywords gets pushed down to every transaction)
+        usage = (await db.execute(
+            select(
+                grouped.c.category,
+                func.sum(grouped.c.count).label('total'),
+                func.sum(case((mobile, grouped.c.count), else_=0)).label('mobile_count'),
+                func.sum(case((mobile, grouped.c.amount), else_=0.0)).label('mobile_amount'),
+                func.sum(case((bank, grouped.c.count), else_=0)).label('bank_count'),
+                func.sum(case((bank, grouped.c.amount), else_=0.0)).label('bank_amount'),
+                func.sum(case((informal, grouped.c.count), else_=0)).label('informal_count'),
+                func.sum(case((informal, grouped.c.amount), else_=0.0)).label('informal_amount')
+            )
+            .group_by(grouped.c.category)
+            .order_by(func.sum(case((informal, grouped.c.count), else_=0)).desc(), grouped.c.category)
+        )).all()
+
+        def summed(field):
+            return sum(getattr(row, field) for row in usage)
+
+        total = summed('total')
+
+        def channel(name):
+            count = summed(f'{name}_count')
+            return {
+                'count': count,
+                'total_amount': summed(f'{name}_amount'),
+                'percentage_of_total': count / total * 100 if total > 0 else 0
+            }
+
+        informal_usage = channel('informal')
+        return {
+            'currency_breakdown': {currency: amount for currency, amount in currency_rows if currency is not None},
+            'mobile_money_usage': channel('mobile'),
+            'bank_usage': channel('bank'),
+            'informal_sector_insights': {
+                'count': informal_usage['count'],
+                'total_amount': informal_usage['total_amount'],
+                'average_transaction': (informal_usage['total_amount'] / informal_usage['count']
+                                        if informal_usage['count'] else 0),
+                'common_categories': {
+                    row.category: row.informal_count
+                    for row in usage if row.category is not None and row.informal_count
+                }
+            }
+        }
+
+    def _detail(self, query, user_id: int, window_start: Optional[datetime]):
+        """query restricted to the user's transactions in the detail window"""
+        query = query.where(Transaction.user_id == user_id)
+        if window_start is not None:
+            query = query.where(Transaction.transaction_date >= window_start)
+        return query
+
+
+sql_analytics = SQLFinancialAnalytics()
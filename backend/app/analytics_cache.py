@@ -0,0 +1,272 @@
+"""
+Versioned cache of computed analytics results.
+
+Spending insights, the financial health score and the cash-flow and AI
+forecasts are recomputed from the user's data on every request, while a
+dashboard asks for the same ones again on every visit. Results are cached under
+(user_id, endpoint, params, data version, day):
+
+- the data version is a per-user counter, bumped after every committed ORM
+  insert, update or delete of one of the user's transactions, accounts or
+  goals. A write makes all older entries of that user unreachable at once
+  instead of having to find and delete them; they age out of the LRU.
+- the day is part of the key because forecasts, velocities and goal timelines
+  are relative to today.
+
+Callers read the version (lookup()) before the data a result is computed from,
+so a write committed in between stores the result under the old version, where
+nothing will look for it.
+
+Backends (ANALYTICS_CACHE_BACKEND):
+
+- "memory": entries and counters in this worker process, entries in an LRU
+  capped at ANALYTICS_CACHE_MAX_BYTES of encoded results.
+- "redis": entries (with ANALYTICS_CACHE_TTL as expiry) and counters in Redis,
+  shared by all workers; the redis package is only imported for this backend.
+  Every call gives up after ANALYTICS_CACHE_REDIS_TIMEOUT seconds. Async
+  handlers use lookup_async()/store_async(), which make the calls from the
+  threadpool; the version bump after a commit stays synchronous, so the next
+  request sees the new version, and costs one pipelined round trip.
+
+Writes that bypass the ORM, and with the memory backend writes made by another
+process, do not bump this process's counters; ANALYTICS_CACHE_TTL bounds how
+long such a result can be served. ml/recategorize.py bumps the users it changed.
+"""
+
+import json
+import threading
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.cache import LRUCache
+from app.config import settings
+from models import Account, FinancialGoal, Transaction
+
+_PENDING_KEY = 'analytics_cache_versions'
+# Rows whose writes change a user's analytics
+_VERSIONED_MODELS = (Transaction, Account, FinancialGoal)
+
+
+class MemoryBackend:
+    """Encoded results in a byte-capped LRU, data versions in a dict"""
+
+    name = 'memory'
+    blocking = False
+
+    def __init__(self, max_bytes, max_entries, ttl_seconds):
+        self._entries = LRUCache(max_entries, ttl_seconds or None, max_bytes=max_bytes)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, data):
+        self._entries.set(key, data)
+
+    def version(self, user_id):
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self._versions.clear()
+
+    def stats(self):
+        stats = self._entries.stats()
+        # Lookups are counted by AnalyticsResultCache for every backend
+        for key in ('hits', 'misses', 'hit_rate'):
+            stats.pop(key)
+        return stats
+
+
+class RedisBackend:
+    """Encoded results and data versions in Redis, shared by every worker"""
+
+    name = 'redis'
+    blocking = True  # Network round trips: keep them off the event loop where possible
+
+    def __init__(self, url, ttl_seconds, timeout=None, prefix='nexus:analytics:'):
+        import redis  # Optional dependency, only needed for this backend
+
+        # Without timeouts an unreachable server would hang every request that touches the cache
+        self.timeout = settings.ANALYTICS_CACHE_REDIS_TIMEOUT if timeout is None else timeout
+        self._redis = redis.Redis.from_url(url, socket_timeout=self.timeout, socket_connect_timeout=self.timeout)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key):
+        return self._redis.get(self.prefix + key)
+
+    def set(self, key, data):
+        self._redis.set(self.prefix + key, data, ex=int(self.ttl_seconds) if self.ttl_seconds else None)
+
+    def version(self, user_id):
+        value = self._redis.get(f"{self.prefix}version:{user_id}")
+        return int(value) if value is not None else 0
+
+    def bump(self, user_ids):
+        pipeline = self._redis.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipeline.incr(f"{self.prefix}version:{user_id}")
+        pipeline.execute()
+
+    def clear(self):
+        for key in self._redis.scan_iter(match=self.prefix + '*'):
+            self._redis.delete(key)
+
+    def stats(self):
+        return {'ttl_seconds': self.ttl_seconds, 'timeout_seconds': self.timeout, 'prefix': self.prefix}
+
+
+def make_backend(name=None):
+    name = (name or settings.ANALYTICS_CACHE_BACKEND).lower()
+    if name == 'off':
+        return None
+    if name == 'memory':
+        return MemoryBackend(
+            settings.ANALYTICS_CACHE_MAX_BYTES,
+            settings.ANALYTICS_CACHE_MAX_ENTRIES,
+            settings.ANALYTICS_CACHE_TTL
+        )
+    if name == 'redis':
+        return RedisBackend(settings.ANALYTICS_CACHE_URL, settings.ANALYTICS_CACHE_TTL, settings.ANALYTICS_CACHE_REDIS_TIMEOUT)
+    raise ValueError(f"Unknown ANALYTICS_CACHE_BACKEND {name!r}; choose memory, redis or off")
+
+
+class AnalyticsResultCache:
+    """Analytics results keyed by (user, endpoint, params, data version, day)
+
+    A failing backend never fails the request: the lookup counts as a miss
+    and the result is computed as if there was no cache.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.version_bumps = 0
+        self.errors = 0
+
+    def lookup(self, user_id, endpoint, params=None):
+        """(key, cached result or None); call before reading the data the result depends on
+
+        Pass the key to store() once the result is computed; it is None when
+        caching is off or the backend is unavailable.
+        """
+        if self.backend is None:
+            return None, None
+        try:
+            key = "{}:{}:{}:{}:{}".format(
+                user_id, endpoint, json.dumps(params, sort_keys=True, default=str),
+                self.backend.version(user_id), datetime.utcnow().date().isoformat()
+            )
+            data = self.backend.get(key)
+        except Exception as e:
+            self._failed('lookup', e)
+            return None, None
+        if data is None:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        return key, json.loads(data)
+
+    def store(self, key, result):
+        if key is None:
+            return
+        try:
+            self.backend.set(key, json.dumps(jsonable_encoder(result)).encode())
+        except Exception as e:
+            self._failed('store', e)
+
+    async def lookup_async(self, user_id, endpoint, params=None):
+        """lookup() for async handlers: a network backend is called from the threadpool"""
+        if self.backend is not None and self.backend.blocking:
+            return await run_in_threadpool(self.lookup, user_id, endpoint, params)
+        return self.lookup(user_id, endpoint, params)
+
+    async def store_async(self, key, result):
+        """store() for async handlers"""
+        if key is not None and self.backend.blocking:
+            await run_in_threadpool(self.store, key, result)
+        else:
+            self.store(key, result)
+
+    def bump(self, user_ids):
+        """New data version for each user: their cached results are no longer served"""
+        user_ids = list(user_ids)
+        if self.backend is None or not user_ids:
+            return
+        try:
+            self.backend.bump(user_ids)
+            self.version_bumps += len(user_ids)
+        except Exception as e:
+            self._failed('version bump', e)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            'backend': self.backend.name if self.backend is not None else 'off',
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'version_bumps': self.version_bumps,
+            'errors': self.errors
+        }
+        if self.backend is not None:
+            stats.update(self.backend.stats())
+        return stats
+
+    def _failed(self, operation, error):
+        self.errors += 1
+        print(f"[!] Analytics cache {operation} failed: {error}")
+
+
+analytics_cache = AnalyticsResultCache(make_backend())
+
+
+def _owners(target):
+    """The row's user plus, if it is being moved, the one it had before"""
+    owners = {target.user_id}
+    owners.update(inspect(target).attrs.user_id.history.deleted or ())
+    owners.discard(None)
+    return owners
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_changed_users(session, flush_context, instances):
+    changed = set()
+    for target in session.new:
+        if isinstance(target, _VERSIONED_MODELS):
+            changed.update(_owners(target))
+    for target in session.dirty:
+        if isinstance(target, _VERSIONED_MODELS) and session.is_modified(target):
+            changed.update(_owners(target))
+    for target in session.deleted:
+        if isinstance(target, _VERSIONED_MODELS):
+            changed.update(_owners(target))
+    if changed:
+        session.info.setdefault(_PENDING_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_changed_users(session):
+    analytics_cache.bump(session.info.pop(_PENDING_KEY, ()))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changed_users(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,24 +9,128 @@ from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. min_rounds makes needs_update() flag hashes made at a lower cost,
+# so raising AUTH_BCRYPT_ROUNDS upgrades each user's hash at their next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.AUTH_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.AUTH_BCRYPT_ROUNDS
+)
 
-def verify_password(plain_password, hashed_password):
-    # Truncate to 72 bytes for bcrypt compatibility
-    if isinstance(plain_password, str):
-        plain_password_bytes = plain_password.encode('utf-8')[:72]
-        plain_password = plain_password_bytes.decode('utf-8', errors='ignore')
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
+def _bcrypt_secret(password):
     # Truncate to 72 bytes for bcrypt compatibility (bcrypt limitation)
     if isinstance(password, str):
         password_bytes = password.encode('utf-8')[:72]
         password = password_bytes.decode('utf-8', errors='ignore')
     elif isinstance(password, bytes):
         password = password[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
+    return password
+
+def verify_password(plain_password, hashed_password):
+    return pwd_context.verify(_bcrypt_secret(plain_password), hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password):
+    """(valid, new_hash): new_hash is set when the stored hash should be replaced"""
+    return pwd_context.verify_and_update(_bcrypt_secret(plain_password), hashed_password)
+
+def get_password_hash(password):
+    return pwd_context.hash(_bcrypt_secret(password))
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt for the API on a small dedicated thread pool.
+
+    A hash at cost 12 is ~250ms of CPU; called inline from an async endpoint
+    it stalls every other request on the worker, so a burst of logins freezes
+    the API. bcrypt releases the GIL, so on these threads the event loop keeps
+    serving requests meanwhile. At most max_workers hashes run at once and
+    max_queue more may wait; further requests get a 503 with Retry-After
+    rather than queueing without bound behind the burst.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None):
+        self.max_workers = max_workers or settings.AUTH_HASH_WORKERS
+        self.max_queue = settings.AUTH_HASH_QUEUE_SIZE if max_queue is None else max_queue
+        self._executor = None  # created on first use, so scripts importing auth start no threads
+        self._lock = threading.Lock()
+        self.pending = 0       # waiting + running
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    async def _run(self, fn, *args):
+        executor = self._get_executor()
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-ins in progress, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                # Counted here rather than in the awaiting request, which may be cancelled
+                with self._lock:
+                    self.pending -= 1
+                    self.completed += 1
+                    self.wait_seconds += started - submitted
+                    self.hash_seconds += time.perf_counter() - started
+
+        return await asyncio.get_running_loop().run_in_executor(executor, timed)
+
+    async def hash(self, password):
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password, hashed_password):
+        """(valid, new_hash) like verify_and_update_password(), off the event loop"""
+        valid, new_hash = await self._run(verify_and_update_password, plain_password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self):
+        completed = self.completed
+        pending = self.pending
+        return {
+            'bcrypt_rounds': settings.AUTH_BCRYPT_ROUNDS,
+            'workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'running': min(pending, self.max_workers),
+            'queue_depth': max(0, pending - self.max_workers),
+            'peak_pending': self.peak_pending,
+            'completed': completed,
+            'rejected': self.rejected,
+            'rehashed': self.rehashed,
+            'mean_wait_ms': round(self.wait_seconds / completed * 1000, 1) if completed else None,
+            'mean_hash_ms': round(self.hash_seconds / completed * 1000, 1) if completed else None
+        }
+
+
+password_hasher = PasswordHasher()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
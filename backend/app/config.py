@@ -9,13 +9,85 @@ class Settings:
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./nexus_finance.db")
+    # Async driver for the API's sessions: "auto" uses asyncpg for PostgreSQL and keeps SQLite
+    # on its synchronous driver, "true" also sends SQLite through aiosqlite, "false" never
+    DATABASE_ASYNC: str = os.getenv("DATABASE_ASYNC", "auto")
+    # Switch SQLite databases to write-ahead logging (persists in the file once set)
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "false").lower() == "true"
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-development")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # bcrypt cost for new hashes; logins rehash stored hashes below it
+    AUTH_BCRYPT_ROUNDS: int = int(os.getenv("AUTH_BCRYPT_ROUNDS", "12"))
+    # Threads reserved for hashing/verifying passwords, and how many requests may wait for one
+    # before register/login answer 503 instead of queueing further
+    AUTH_HASH_WORKERS: int = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+    AUTH_HASH_QUEUE_SIZE: int = int(os.getenv("AUTH_HASH_QUEUE_SIZE", "64"))
+    # Authenticated-user principals cached by token subject (0 disables); the TTL bounds
+    # staleness for changes made outside this process's ORM session
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    AUTH_USER_CACHE_TTL: float = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+    
+    # Analytics
+    # Totals and trends read the transaction_rollups table; merchant, recurring and keyword
+    # insights need individual transactions and only look at this many recent months (0: all)
+    ANALYTICS_DETAIL_MONTHS: int = int(os.getenv("ANALYTICS_DETAIL_MONTHS", "12"))
+    # Where spending insights are aggregated: "pandas" (rows fetched and grouped in the worker)
+    # or "sql" (GROUP BY queries, so e.g. PostgreSQL installs keep the work in the database)
+    ANALYTICS_BACKEND: str = os.getenv("ANALYTICS_BACKEND", "pandas")
+    # Computed analytics results cached per user and data version: "memory" (per worker
+    # process, LRU within ANALYTICS_CACHE_MAX_BYTES of encoded results), "redis" (shared by
+    # all workers at ANALYTICS_CACHE_URL, size it with Redis maxmemory) or "off". The TTL
+    # bounds staleness for writes made outside this process's ORM session.
+    ANALYTICS_CACHE_BACKEND: str = os.getenv("ANALYTICS_CACHE_BACKEND", "memory")
+    ANALYTICS_CACHE_URL: str = os.getenv("ANALYTICS_CACHE_URL", "redis://localhost:6379/0")
+    ANALYTICS_CACHE_MAX_BYTES: int = int(os.getenv("ANALYTICS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    ANALYTICS_CACHE_MAX_ENTRIES: int = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "10000"))
+    ANALYTICS_CACHE_TTL: float = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+    # Seconds a Redis connect or command may take before it counts as a cache failure
+    ANALYTICS_CACHE_REDIS_TIMEOUT: float = float(os.getenv("ANALYTICS_CACHE_REDIS_TIMEOUT", "0.2"))
     
     # ML Settings
     ML_MODEL_PATH: str = "ml/transaction_classifier.pkl"
+    # Versioned artifacts from `python -m ml.train`, polled for hot-swap (0 disables polling)
+    ML_ARTIFACT_DIR: str = os.getenv("ML_ARTIFACT_DIR", "ml/artifacts")
+    ML_HOT_SWAP_INTERVAL: float = float(os.getenv("ML_HOT_SWAP_INTERVAL", "30"))
+    # Published versions kept in ML_ARTIFACT_DIR besides LATEST and CANDIDATE (older ones are pruned)
+    ML_ARTIFACT_KEEP: int = int(os.getenv("ML_ARTIFACT_KEEP", "10"))
+    # "pickle" serves the sklearn model; "numpy" memory-maps the exported arrays so workers
+    # share pages and never import sklearn (training and partial_fit need "pickle")
+    ML_ARTIFACT_FORMAT: str = os.getenv("ML_ARTIFACT_FORMAT", "pickle")
+    # "count" (CountVectorizer, fitted vocabulary) or "hashing" (stateless HashingVectorizer
+    # with a fixed ML_HASHING_FEATURES columns; new merchants need no refit)
+    ML_FEATURIZER: str = os.getenv("ML_FEATURIZER", "count")
+    ML_HASHING_FEATURES: int = int(os.getenv("ML_HASHING_FEATURES", str(2 ** 14)))
+    # Online learning from user category corrections (needs ML_ARTIFACT_FORMAT=pickle)
+    ML_ONLINE_LEARNING: bool = os.getenv("ML_ONLINE_LEARNING", "true").lower() == "true"
+    ML_ONLINE_BATCH_SIZE: int = int(os.getenv("ML_ONLINE_BATCH_SIZE", "32"))
+    ML_ONLINE_FLUSH_SECONDS: float = float(os.getenv("ML_ONLINE_FLUSH_SECONDS", "5"))
+    # Only the process holding this lock trains and publishes (default <ML_ARTIFACT_DIR>/online-learner.lock)
+    ML_ONLINE_LOCK_FILE: str = os.getenv("ML_ONLINE_LOCK_FILE", "")
+    ML_CHECKPOINT_SECONDS: float = float(os.getenv("ML_CHECKPOINT_SECONDS", "300"))
+    # Load/train the classifier in the startup hook (true) or on first prediction (false)
+    ML_EAGER_LOAD: bool = os.getenv("ML_EAGER_LOAD", "true").lower() == "true"
+    ML_PREDICTION_CACHE_SIZE: int = int(os.getenv("ML_PREDICTION_CACHE_SIZE", "10000"))
+    ML_PREDICTION_CACHE_TTL: float = float(os.getenv("ML_PREDICTION_CACHE_TTL", "3600"))
+    # Most descriptions one POST /api/v1/ml/predict-category/batch may send (the route needs no login)
+    ML_BATCH_MAX_DESCRIPTIONS: int = int(os.getenv("ML_BATCH_MAX_DESCRIPTIONS", "1000"))
+    # Shadow-score the CANDIDATE model (see ml/registry.py) on live traffic in a background thread
+    ML_SHADOW_MODE: bool = os.getenv("ML_SHADOW_MODE", "true").lower() == "true"
+    ML_SHADOW_BATCH_SIZE: int = int(os.getenv("ML_SHADOW_BATCH_SIZE", "64"))
+    ML_SHADOW_FLUSH_SECONDS: float = float(os.getenv("ML_SHADOW_FLUSH_SECONDS", "1"))
+    ML_SHADOW_QUEUE_SIZE: int = int(os.getenv("ML_SHADOW_QUEUE_SIZE", "10000"))
+    # Per-user overlay of category corrections, consulted before the model
+    ML_USER_OVERLAY: bool = os.getenv("ML_USER_OVERLAY", "true").lower() == "true"
+    ML_OVERLAY_CACHE_USERS: int = int(os.getenv("ML_OVERLAY_CACHE_USERS", "1000"))
+    # Seconds before a cached overlay is rebuilt, so workers see each other's corrections (0 disables)
+    ML_OVERLAY_CACHE_TTL: float = float(os.getenv("ML_OVERLAY_CACHE_TTL", "60"))
+    ML_OVERLAY_MAX_MERCHANTS: int = int(os.getenv("ML_OVERLAY_MAX_MERCHANTS", "256"))
+    # Minimum trigram similarity for a misspelled/truncated merchant name to count as a match
+    ML_FUZZY_MERCHANT_THRESHOLD: float = float(os.getenv("ML_FUZZY_MERCHANT_THRESHOLD", "0.55"))
     
 settings = Settings()
@@ -0,0 +1,120 @@
+"""
+In-process cache of authenticated-user principals.
+
+get_current_user used to load the full users row on every authenticated
+request - the most frequent query the API ran - although handlers only ever
+use current_user.id. The token subject (the user's email) now maps to a small
+AuthenticatedUser (id, email, is_active) in an LRU with a TTL, so a warm
+request does not touch the users table at all.
+
+Entries are dropped when a users row is inserted, updated or deleted through
+the ORM: immediately at flush, and again after commit so a request that read
+the old row in between cannot leave it cached. Bulk query.update()/delete()
+bypass ORM events; AUTH_USER_CACHE_TTL bounds how long such a change (or one
+made by another worker process) can go unnoticed.
+"""
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.cache import LRUCache
+from app.config import settings
+from models import User
+
+_PENDING_KEY = 'user_cache_invalidations'
+
+
+class AuthenticatedUser:
+    """What handlers get as current_user: only the columns authentication needs"""
+
+    __slots__ = ('id', 'email', 'is_active')
+
+    def __init__(self, id, email, is_active=True):
+        self.id = id
+        self.email = email
+        # Rows created before the column existed have NULL, which counts as active
+        self.is_active = is_active is not False
+
+    def __repr__(self):
+        return f"AuthenticatedUser(id={self.id}, email={self.email!r}, is_active={self.is_active})"
+
+
+class UserPrincipalCache:
+    """LRU + TTL of AuthenticatedUser keyed by token subject"""
+
+    def __init__(self, max_size=None, ttl_seconds=None):
+        self._cache = LRUCache(
+            settings.AUTH_USER_CACHE_SIZE if max_size is None else max_size,
+            settings.AUTH_USER_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        )
+        self.invalidations = 0
+
+    def get(self, subject):
+        return self._cache.get(subject)
+
+    def set(self, principal):
+        self._cache.set(principal.email, principal)
+
+    def invalidate(self, subject):
+        if self._cache.pop(subject) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return dict(self._cache.stats(), invalidations=self.invalidations)
+
+
+user_cache = UserPrincipalCache()
+
+
+def _changed_emails(target):
+    """The row's email plus, if it is being changed, the one it had before"""
+    emails = {target.email}
+    history = inspect(target).attrs.email.history
+    emails.update(history.deleted or ())
+    emails.discard(None)
+    return emails
+
+
+def _queue_invalidation(target):
+    emails = _changed_emails(target)
+    for email in emails:
+        user_cache.invalidate(email)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).update(emails)
+
+
+@event.listens_for(User.email, 'set', active_history=True)
+def _email_set(target, value, oldvalue, initiator):
+    # Registered for active_history: assigning an email to an expired User then loads
+    # the old one, so _changed_emails() can drop the principal cached under it
+    pass
+
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    _queue_invalidation(target)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    _queue_invalidation(target)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _queue_invalidation(target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_user_invalidations(session):
+    for email in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate(email)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_user_invalidations(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
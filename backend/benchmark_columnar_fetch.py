@@ -0,0 +1,180 @@
+"""
+Memory and latency of loading a user's transactions into a DataFrame.
+
+Seeds a throwaway SQLite database with one user per size (10k, 100k and 1M
+transactions by default), then loads each user's amount, date, category and
+currency the three ways the analytics endpoints have done it:
+
+    orm        select(Transaction) ORM objects -> list of dicts -> DataFrame
+               (what GET /advanced-analytics/ai-forecast did)
+    row_dicts  select of the columns -> a dict per row -> DataFrame
+               (what the spending insights' detail fetch did)
+    columnar   analytics.columnar.transaction_frame(): the columns streamed
+               into typed arrays
+
+    python benchmark_columnar_fetch.py
+    python benchmark_columnar_fetch.py --sizes 10000 100000 --repeats 5 --output fetch.json
+
+Reports the median load time, the peak memory traced while loading
+(tracemalloc, in a separate run since tracing slows allocation down) and the
+size of the resulting DataFrame, as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Point the models at the throwaway database before anything imports them
+_WORKDIR = tempfile.mkdtemp(prefix="columnar-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'bench.sqlite')}"
+
+import pandas as pd
+from sqlalchemy import insert, select
+
+from analytics.columnar import FORECAST_COLUMNS, transaction_frame
+from models import Account, AsyncSessionLocal, Transaction, User, create_tables, engine
+
+DESCRIPTIONS = [
+    'OK Zimbabwe groceries', 'ZESA prepaid token', 'EcoCash Agent cash in', 'Chicken Inn Avondale',
+    'ZUPCO fare', 'TelOne internet bill', 'Pick n Pay Borrowdale', 'Monthly Salary',
+    'Mbare market veg', 'CBZ ATM withdrawal', 'Netflix subscription', 'Puma fuel Samora Machel'
+]
+CATEGORIES = ['Groceries', 'Utilities', 'Transfer', 'Dining', 'Transport', 'Utilities',
+              'Groceries', 'Income', 'Groceries', 'Cash', 'Entertainment', 'Transport']
+CURRENCIES = ['USD', 'ZIG', 'ZAR']
+
+
+def seed_user(index, count, seed=42, batch=50000):
+    """A user with count transactions spread over five years; returns the user id"""
+    rng = random.Random(seed + index)
+    with engine.begin() as connection:
+        user_id = connection.execute(insert(User).values(
+            email=f"bench{index}@example.com", hashed_password="x", full_name=f"Bench {index}"
+        )).inserted_primary_key[0]
+        account_id = connection.execute(insert(Account).values(
+            user_id=user_id, name="Main", account_type="bank", currency="USD", balance=0.0
+        )).inserted_primary_key[0]
+        now = datetime.utcnow()
+        for start in range(0, count, batch):
+            rows = []
+            for i in range(start, min(start + batch, count)):
+                kind = rng.randrange(len(DESCRIPTIONS))
+                rows.append({
+                    'user_id': user_id, 'account_id': account_id,
+                    'description': DESCRIPTIONS[kind], 'category': CATEGORIES[kind],
+                    'currency': rng.choice(CURRENCIES),
+                    'amount': 1500.0 if kind == 7 else -round(rng.uniform(1, 150), 2),
+                    'transaction_date': now - timedelta(seconds=rng.uniform(0, 5 * 365 * 86400)),
+                })
+            connection.execute(insert(Transaction), rows)
+    return user_id
+
+
+async def load_orm(db, user_id):
+    transactions = (await db.execute(select(Transaction).where(Transaction.user_id == user_id))).scalars().all()
+    df = pd.DataFrame([{
+        'amount': t.amount,
+        'transaction_date': t.transaction_date.isoformat(),
+        'category': t.category,
+        'currency': t.currency
+    } for t in transactions])
+    # isoformat() drops zero microseconds, so these strings do not share one format; the
+    # endpoint's plain pd.to_datetime() failed on such a row (one in a million here)
+    df['transaction_date'] = pd.to_datetime(df['transaction_date'], format='ISO8601')
+    return df
+
+
+async def load_row_dicts(db, user_id):
+    query = select(*(getattr(Transaction, column) for column in FORECAST_COLUMNS)).where(Transaction.user_id == user_id)
+    df = pd.DataFrame([dict(row) for row in (await db.execute(query)).mappings()], columns=list(FORECAST_COLUMNS))
+    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+    return df
+
+
+async def load_columnar(db, user_id):
+    return await transaction_frame(db, user_id, FORECAST_COLUMNS)
+
+
+LOADERS = {'orm': load_orm, 'row_dicts': load_row_dicts, 'columnar': load_columnar}
+
+
+async def _load(loader, user_id):
+    # A fresh session each time, so no run finds the previous one's identity map
+    async with AsyncSessionLocal() as db:
+        return await loader(db, user_id)
+
+
+async def measure(loader, user_id, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        df = await _load(loader, user_id)
+        timings.append(time.perf_counter() - started)
+    rows, frame_bytes = len(df), int(df.memory_usage(deep=True).sum())
+    del df
+
+    tracemalloc.start()
+    try:
+        await _load(loader, user_id)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'rows': rows,
+        'median_ms': round(statistics.median(timings) * 1000, 1),
+        'min_ms': round(min(timings) * 1000, 1),
+        'peak_traced_mb': round(peak / 2 ** 20, 1),
+        'frame_mb': round(frame_bytes / 2 ** 20, 1),
+    }
+
+
+async def run_benchmark(sizes, repeats, paths):
+    results = {}
+    for index, size in enumerate(sizes):
+        started = time.perf_counter()
+        user_id = seed_user(index, size)
+        print(f"[*] Seeded {size:,} transactions in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        results[str(size)] = {}
+        for name in paths:
+            results[str(size)][name] = await measure(LOADERS[name], user_id, repeats)
+            print(f"[*] {size:,} {name}: {results[str(size)][name]}", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory and latency of loading transactions into a DataFrame")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="transactions per benchmarked user")
+    parser.add_argument("--repeats", type=int, default=3, help="timed loads per path and size")
+    parser.add_argument("--paths", nargs="+", choices=list(LOADERS), default=list(LOADERS))
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        create_tables()
+        results = {
+            'columns': list(FORECAST_COLUMNS),
+            'results': asyncio.run(run_benchmark(args.sizes, args.repeats, args.paths)),
+        }
+    finally:
+        engine.dispose()
+        shutil.rmtree(_WORKDIR, ignore_errors=True)
+    rendered = json.dumps(results, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Concurrency benchmark for the hot API endpoints.
+
+Starts the API under uvicorn against a throwaway SQLite database (or uses a
+running server given with --url), registers a few users, seeds each with
+transactions, then drives the endpoints below with N parallel clients for a
+fixed duration per concurrency level. Each client keeps one connection and
+issues requests back to back, picking endpoints with the weights in WORKLOAD.
+
+    python benchmark_concurrency.py                          # 25, 50, 100, 200 clients
+    python benchmark_concurrency.py --clients 100 250 --duration 10
+    python benchmark_concurrency.py --url http://localhost:8000 --output results.json
+
+Reports requests/second, p50/p95/p99 latency and errors per level, per
+endpoint and overall, as JSON. The started server inherits the environment, so
+DATABASE_ASYNC=true compares SQLite through aiosqlite with the default inline
+sessions.
+
+With --dashboard it instead compares loading the dashboard page both ways:
+the per-panel fan-out the React app used (DASHBOARD_FANOUT, spread over the
+six connections a browser opens per host) against one GET /api/v1/dashboard.
+Each client reloads the page back to back; latency is the whole page load.
+
+    python benchmark_concurrency.py --dashboard --clients 1 10 25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+
+# (name, weight) - reads dominate, as in the dashboard's own traffic
+WORKLOAD = [
+    ('list_transactions', 40),
+    ('list_accounts', 20),
+    ('create_transaction', 20),
+    ('spending_insights', 10),
+    ('financial_health', 10),
+]
+
+# What the dashboard requested on load, one call per panel
+DASHBOARD_FANOUT = [
+    '/api/v1/accounts',
+    '/api/v1/transactions?limit=10',
+    '/api/v1/analytics/spending-insights',
+    '/api/v1/analytics/financial-health',
+    '/api/v1/analytics/cash-flow-forecast?inflation_rate=0.02',
+    '/api/v1/goals',
+    '/api/v1/budgets',
+    '/api/v1/notifications',
+]
+BROWSER_CONNECTIONS = 6  # HTTP/1.1 connections a browser keeps per host
+
+DESCRIPTIONS = [
+    'OK Zimbabwe groceries', 'ZESA prepaid token', 'EcoCash Agent cash in', 'Chicken Inn Avondale',
+    'ZUPCO fare', 'TelOne internet bill', 'Pick n Pay Borrowdale', 'Monthly Salary',
+    'Edgars account payment', 'CBZ ATM withdrawal', 'Old Mutual premium', 'Nandos Sam Levy',
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir, workers=1):
+    """Run the API under uvicorn on a free port with its own database and artifacts"""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'benchmark.db')}",
+        ML_ARTIFACT_DIR=os.path.join(workdir, 'artifacts'),
+        ML_ONLINE_LEARNING='false',
+        ML_HOT_SWAP_INTERVAL='0',
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--timeout-keep-alive', '60', '--log-level', 'warning', '--no-access-log'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 180  # first start trains the classifier
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(url + '/health', timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("API did not become healthy in time")
+
+
+async def seed(url, users, transactions_per_user, run_id):
+    """Register users and give each transactions; returns [(headers, account_id)]"""
+    clients = []
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        for i in range(users):
+            response = await client.post('/api/v1/register', json={
+                'email': f"bench-{run_id}-{i}@nexusfinance.ai",
+                'password': 'benchmark-password',
+                'full_name': f"Benchmark User {i}"
+            })
+            response.raise_for_status()
+            headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+            accounts = (await client.get('/api/v1/accounts', headers=headers)).json()
+            clients.append((headers, accounts[0]['id']))
+
+        async def add(headers, account_id, n):
+            await client.post('/api/v1/transactions', headers=headers, params={
+                'description': DESCRIPTIONS[n % len(DESCRIPTIONS)],
+                'amount': round(random.uniform(-150, 150), 2),
+                'account_id': account_id
+            })
+
+        for headers, account_id in clients:
+            await asyncio.gather(*(add(headers, account_id, n) for n in range(transactions_per_user)))
+    return clients
+
+
+def _request_line(name, headers, account_id, rng):
+    if name == 'list_transactions':
+        return 'GET', '/api/v1/transactions?limit=50'
+    if name == 'list_accounts':
+        return 'GET', '/api/v1/accounts'
+    if name == 'create_transaction':
+        query = urlencode({
+            'description': rng.choice(DESCRIPTIONS),
+            'amount': round(rng.uniform(-150, 150), 2),
+            'account_id': account_id
+        })
+        return 'POST', '/api/v1/transactions?' + query
+    if name == 'spending_insights':
+        return 'GET', '/api/v1/analytics/spending-insights'
+    return 'GET', '/api/v1/analytics/financial-health'
+
+
+class _Connection:
+    """
+    Bare keep-alive HTTP/1.1 connection. The load generator shares the machine
+    with the server, and httpx spends several milliseconds of CPU per request
+    once hundreds of requests are in flight, which skewed the results towards
+    whichever server left the client more CPU; this costs a few microseconds.
+    """
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.reader = self.writer = None
+
+    async def request(self, method, target, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}", "Content-Length: 0"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        try:
+            status = int((await self.reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await self.reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                if key.lower() == 'content-length':
+                    length = int(value)
+            await self.reader.readexactly(length)
+        except (IndexError, ValueError, asyncio.IncompleteReadError, ConnectionError):
+            self.close()
+            raise ConnectionError(f"{method} {target} failed")
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def _summary(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2) if ordered else None
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+    }
+
+
+async def run_level(url, clients, concurrency, duration, seed_value=0):
+    """concurrency clients hammering the workload for duration seconds"""
+    names = [name for name, _ in WORKLOAD]
+    weights = [weight for _, weight in WORKLOAD]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    stop_at = time.perf_counter() + duration
+
+    async def worker(index):
+        rng = random.Random(seed_value * 100003 + index)
+        headers, account_id = clients[index % len(clients)]
+        connection = _Connection(url)
+        try:
+            while time.perf_counter() < stop_at:
+                name = rng.choices(names, weights)[0]
+                method, target = _request_line(name, headers, account_id, rng)
+                started = time.perf_counter()
+                try:
+                    ok = await connection.request(method, target, headers) < 400
+                except OSError:
+                    ok = False
+                if ok:
+                    latencies[name].append(time.perf_counter() - started)
+                else:
+                    errors[name] += 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    everything = [latency for values in latencies.values() for latency in values]
+    return {
+        'clients': concurrency,
+        'duration_s': round(elapsed, 2),
+        'overall': _summary(everything, sum(errors.values()), elapsed),
+        'endpoints': {name: _summary(latencies[name], errors[name], elapsed) for name in names},
+    }
+
+
+async def run_dashboard_level(url, clients, concurrency, duration, mode):
+    """concurrency users reloading the dashboard for duration seconds, as 'fanout' or one 'dashboard' call"""
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def load(connection, targets, headers):
+        statuses = []
+        for target in targets:
+            try:
+                statuses.append(await connection.request('GET', target, headers))
+            except OSError:
+                statuses.append(599)
+        return statuses
+
+    async def worker(index):
+        nonlocal errors
+        headers, _ = clients[index % len(clients)]
+        if mode == 'fanout':
+            connections = [_Connection(url) for _ in range(BROWSER_CONNECTIONS)]
+            batches = [DASHBOARD_FANOUT[i::BROWSER_CONNECTIONS] for i in range(BROWSER_CONNECTIONS)]
+        else:
+            connections = [_Connection(url)]
+            batches = [['/api/v1/dashboard']]
+        try:
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                results = await asyncio.gather(*(
+                    load(connection, batch, headers) for connection, batch in zip(connections, batches)
+                ))
+                if all(status < 400 for statuses in results for status in statuses):
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+        finally:
+            for connection in connections:
+                connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    summary = _summary(latencies, errors, elapsed)
+    return {
+        'mode': mode,
+        'clients': concurrency,
+        'duration_s': round(elapsed, 2),
+        'page_loads': summary.pop('requests'),
+        'page_loads_per_second': summary.pop('requests_per_second'),
+        **summary,
+    }
+
+
+async def run_dashboard_benchmark(url, levels, duration, users, transactions_per_user):
+    clients = await seed(url, users, transactions_per_user, run_id=int(time.time() * 1000))
+    results = []
+    for concurrency in levels:
+        for mode in ('fanout', 'dashboard'):
+            result = await run_dashboard_level(url, clients, concurrency, duration, mode)
+            print(f"[+] {concurrency:4d} clients {mode:9s}: {result['page_loads_per_second']:7.1f} pages/s  "
+                  f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                  f"errors {result['errors']}", file=sys.stderr)
+            results.append(result)
+    return results
+
+
+async def run_benchmark(url, levels, duration, users, transactions_per_user):
+    clients = await seed(url, users, transactions_per_user, run_id=int(time.time() * 1000))
+    results = []
+    for concurrency in levels:
+        result = await run_level(url, clients, concurrency, duration)
+        overall = result['overall']
+        print(f"[+] {concurrency:4d} clients: {overall['requests_per_second']:8.1f} req/s  "
+              f"p50 {overall['p50_ms']} ms  p95 {overall['p95_ms']} ms  p99 {overall['p99_ms']} ms  "
+              f"errors {overall['errors']}", file=sys.stderr)
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput of the hot endpoints under parallel clients")
+    parser.add_argument("--url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--clients", type=int, nargs="+",
+                        help="concurrency levels (default 25 50 100 200, or 1 10 25 with --dashboard)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=100, help="seeded transactions per user")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when starting the server")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--dashboard", action="store_true",
+                        help="compare the dashboard fan-out against GET /api/v1/dashboard")
+    args = parser.parse_args(argv)
+    levels = args.clients or ([1, 10, 25] if args.dashboard else [25, 50, 100, 200])
+    benchmark = run_dashboard_benchmark if args.dashboard else run_benchmark
+
+    process = None
+    with tempfile.TemporaryDirectory() as workdir:
+        url = args.url
+        if url is None:
+            process, url = start_server(workdir, args.workers)
+        try:
+            results = asyncio.run(benchmark(url, levels, args.duration, args.users, args.transactions))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    report = json.dumps({'url': args.url or 'local uvicorn + SQLite', 'levels': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Latency of recurring expense detection (analytics.recurring.detect_recurring).
+
+Builds an in-memory transaction frame per size (1M by default): irregular
+spending at a few thousand merchants, plus weekly, monthly and yearly payments
+to planted merchants whose descriptions carry changing reference numbers.
+Times the detector on it and checks every planted cadence is found:
+
+    python benchmark_recurring.py
+    python benchmark_recurring.py --sizes 100000 1000000 --repeats 10 --output recurring.json
+
+Needs no database; reports the median time and the patterns found, as JSON.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# The merchant key consults the merchant index; keep the benchmark off the real artifacts
+os.environ.setdefault("ML_ONLINE_LEARNING", "false")
+os.environ.setdefault("ML_HOT_SWAP_INTERVAL", "0")
+
+import numpy as np
+import pandas as pd
+
+from analytics.recurring import detect_recurring
+
+NOW = datetime(2026, 1, 1)
+PLANTED = {
+    # description prefix: (cadence, period in days, jitter in days)
+    'NETFLIX subscription': ('monthly', 30.44, 1),
+    'TelOne internet bill': ('monthly', 30.44, 2),
+    'ZUPCO weekly pass': ('weekly', 7, 1),
+    'Church tithe': ('weekly', 7, 0),
+    'Vehicle licence renewal': ('yearly', 365.25, 5),
+}
+
+
+def build_frame(size, merchants=3000, years=5, seed=42):
+    rng = np.random.default_rng(seed)
+    now = np.datetime64(NOW, 's')
+    planted = []
+    for index, (prefix, (_, period, jitter)) in enumerate(PLANTED.items()):
+        steps = int(years * 365.25 / period)
+        ages = np.arange(steps) * period + rng.uniform(-jitter, jitter, steps) + 1
+        planted.append(pd.DataFrame({
+            'description': [f"{prefix} REF{rng.integers(10000, 99999)}" for _ in range(steps)],
+            'amount': -np.round(rng.normal(20 + index * 10, 0.5, steps), 2),
+            'transaction_date': now - (ages * 86400).astype('timedelta64[s]'),
+        }))
+    noise = size - sum(len(frame) for frame in planted)
+    names = np.array([f"Merchant {i} shop" for i in range(merchants)], dtype=object)
+    frame = pd.concat(planted + [pd.DataFrame({
+        'description': names[rng.integers(0, merchants, noise)],
+        'amount': np.where(rng.random(noise) < 0.1, 1, -1) * np.round(rng.uniform(1, 150, noise), 2),
+        'transaction_date': now - rng.uniform(0, years * 365.25 * 86400, noise).astype('timedelta64[s]'),
+    })], ignore_index=True)
+    frame['transaction_date'] = frame['transaction_date'].astype('datetime64[ns]')
+    return frame.sample(frac=1, random_state=seed, ignore_index=True)
+
+
+def measure(size, repeats):
+    frame = build_frame(size)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        patterns = detect_recurring(frame, NOW)
+        timings.append(time.perf_counter() - started)
+    found = {row.description.split(' REF')[0]: row.frequency for row in patterns.itertuples()}
+    return {
+        'rows': len(frame),
+        'median_ms': round(statistics.median(timings) * 1000, 1),
+        'min_ms': round(min(timings) * 1000, 1),
+        'patterns': len(patterns),
+        'planted_found': all(found.get(prefix) == cadence for prefix, (cadence, _, _) in PLANTED.items()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latency of recurring expense detection")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000000], help="transactions per frame")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per size")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = measure(size, args.repeats)
+        print(f"[*] {size:,}: {results[str(size)]}", file=sys.stderr)
+    rendered = json.dumps(results, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+
+
+if __name__ == "__main__":
+    main()
@@ -68,8 +68,9 @@ Version: 1.0 (Beta Release for User Acceptance Testing)
 # Standard library imports
 # These are Python's built-in modules for datetime handling and type checking
 from datetime import datetime, timedelta
+import asyncio
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import json
 
 # Third-party framework imports
@@ -81,7 +82,10 @@ import uvicorn  # ASGI server for running the application
 
 # Database imports
 # SQLAlchemy provides our ORM layer, abstracting direct SQL and preventing injection attacks
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession  # Non-blocking sessions for the hot endpoints
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool  # Keeps CPU-heavy analytics off the event loop
 
 # Internal application modules
 # These are custom modules I developed for this project - each serves specific functionality
@@ -90,6 +94,9 @@ from app.config import settings  # Configuration management (loads from .env fil
 # Database models (Chapter 4, Section 4.5 - 13 tables in 3NF normalization)
 from models import (
     SessionLocal,  # Database session factory
+    AsyncSessionLocal,  # Async session factory (asyncpg; SQLite sessions run inline)
+    engine,
+    async_engine,
     create_tables,  # Table creation utility
     User,  # User authentication and profile data
     Account,  # Multi-currency financial accounts (USD, ZAR, ZiG)
@@ -99,23 +106,47 @@ from models import (
     Investment,  # Investment tracking (added in extended features)
     Notification,  # User notification system
     RecurringTransaction,  # Bills and recurring payments
-    UserPreference  # User settings and preferences
+    UserPreference,  # User settings and preferences
+    CategoryCorrection,  # User fixes to predicted categories (online learning feedback)
+    TransactionRollup,  # Monthly per-category totals, maintained on every transaction write
+    backfill_rollups
 )
 
 # Authentication utilities (implements JWT with bcrypt - Chapter 4, Section 4.9)
 from app.auth import (
-    get_password_hash,  # Hashes passwords using bcrypt (cost factor 12)
-    verify_password,  # Verifies password against hash
+    password_hasher,  # Hashes/verifies passwords with bcrypt on a bounded thread pool
     create_access_token,  # Generates JWT tokens (24-hour expiry)
     verify_token  # Validates JWT tokens and extracts payload
 )
+from app.user_cache import AuthenticatedUser, user_cache  # Token subject -> cached user principal
+from app.analytics_cache import analytics_cache  # Analytics results per user and data version
 
 # Machine Learning components (Chapter 5, Section 5.5)
 # The transaction classifier was trained on 1,183 Zimbabwe-specific transactions
-from ml.transaction_classifier import classifier  # Multinomial Naive Bayes model (92.1% accuracy)
+from ml.transaction_classifier import (  # Multinomial Naive Bayes model (92.1% accuracy)
+    read_model_metadata,
+    classifier,  # Lazy handle to the single shared classifier instance
+    get_classifier,
+    is_classifier_initialized
+)
+from ml.merchant_index import merchant_index  # Known merchants resolved before the ML model
+from ml.fuzzy_merchants import fuzzy_merchants  # Misspelled/truncated merchant names ("CHKN INN")
+from ml.hot_swap import model_watcher  # Swaps in newly published model artifacts without a restart
+from ml.online_learning import online_learner  # Feeds user corrections into partial_fit in the background
+from ml.registry import list_models  # Published classifier versions and their metadata
+from ml.shadow import shadow_scorer  # Scores a candidate model against live traffic off the request path
+from ml.user_overlay import user_overlays  # Each user's own merchant -> category corrections
+from ml.categorization import model_prediction, resolve_description  # Overlay, verified merchants, then the model
 
 # Analytics engine (provides financial insights and forecasting)
-from analytics.financial_analytics import analytics_engine  # Rule-based + statistical analysis
+from analytics.financial_analytics import (  # Rule-based + statistical analysis
+    DETAIL_COLUMNS,
+    ROLLUP_COLUMNS,
+    analytics_engine
+)
+from analytics.columnar import transaction_frame  # Selected transaction columns straight into typed arrays
+from analytics.sql_analytics import sql_analytics  # The same spending insights as GROUP BY queries (ANALYTICS_BACKEND=sql)
+from analytics.recurring import sync_recurring_transactions  # Detected recurring expenses -> RecurringTransaction rows
 
 # Advanced forecasting (ARIMA time-series with inflation adjustment)
 from advanced_ai.forecasting import advanced_forecaster  # Handles Zimbabwe's hyperinflation context
@@ -205,7 +236,32 @@ def get_db():
         db.close()  # Always close session, even if endpoint raises exception
         # This is critical for preventing connection leaks in production
 
-def get_current_user(token: str = Depends(security), db: Session = Depends(get_db)):
+async def get_async_db():
+    """
+    Async Database Session Dependency
+    
+    Purpose:
+        Same lifecycle as get_db(), but every query is awaited, so while one request
+        waits on the database the event loop keeps serving the others. The hot
+        endpoints (accounts, transactions, analytics) and authentication use it;
+        the rest still run on get_db().
+    
+    Implementation Notes:
+        - Backed by asyncpg for PostgreSQL (models/database.py): a synchronous query
+          inside an async def handler would stall every other request on the worker
+          for a network round trip
+        - SQLite keeps its synchronous driver (DATABASE_ASYNC=auto): the session is an
+          InlineSession whose awaited calls run the query directly, since aiosqlite's
+          thread hand-offs made the default setup slower, not faster
+        - benchmark_concurrency.py measures the endpoints under 100+ clients (NFR3)
+    
+    Usage:
+        db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_current_user(token: str = Depends(security), db: AsyncSession = Depends(get_async_db)):
     """
     User Authentication Dependency
     
@@ -222,14 +278,15 @@ def get_current_user(token: str = Depends(security), db: Session = Depends(get_d
     
     Parameters:
         token: HTTPAuthorizationCredentials - Extracted by FastAPI from header
-        db: Session - Database session from get_db dependency
+        db: AsyncSession - Database session from get_async_db dependency
     
     Returns:
-        User: Authenticated user object from database
+        AuthenticatedUser: id, email and is_active of the authenticated user
     
     Raises:
         HTTPException 401: Invalid token, expired token, or token verification failed
         HTTPException 404: Token valid but user not found in database (edge case)
+        HTTPException 403: User account has been deactivated
     
     Security Notes:
         - Implements stateless authentication (no server-side session storage)
@@ -257,20 +314,32 @@ def get_current_user(token: str = Depends(security), db: Session = Depends(get_d
             headers={"WWW-Authenticate": "Bearer"},  # Tells client to retry with valid token
         )
     
-    # Step 2: Query database for user based on email from token
-    # I store email in the "sub" (subject) claim as it's unique and unchanging
-    # Using .first() instead of .one() because I want None if user doesn't exist
-    # rather than raising exception (I handle that explicitly below)
-    user = db.query(User).filter(User.email == payload.get("sub")).first()
+    # Step 2: Resolve the user from the email in the token
+    # I store email in the "sub" (subject) claim as it's unique and unchanging.
+    # The cache (app/user_cache.py) answers most requests without touching the users
+    # table; on a miss only the three columns authentication needs are read
+    subject = payload.get("sub")
+    user = user_cache.get(subject)
+    if user is None:
+        row = (await db.execute(
+            select(User.id, User.email, User.is_active).where(User.email == subject)
+        )).first()
+        
+        if not row:
+            # Edge case: Token is valid but user was deleted from database after token issued
+            # Unlikely but possible if admin deleted user or user requested account deletion
+            # Not cached, so the same email registering again is seen straight away
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        user = AuthenticatedUser(row.id, row.email, row.is_active)
+        user_cache.set(user)
     
-    if not user:
-        # Edge case: Token is valid but user was deleted from database after token issued
-        # Unlikely but possible if admin deleted user or user requested account deletion
-        # I could also check token issue time vs user deletion time, but that adds complexity
-        raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active:
+        # Deactivation invalidates the cached principal, so this takes effect immediately
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is deactivated")
     
-    # Step 3: Return authenticated user object
-    # Endpoint can now access user.id, user.email, user.full_name etc.
+    # Step 3: Return the authenticated principal
+    # Endpoints get user.id, user.email and user.is_active; load the User row if more is needed
     return user
 
 """
@@ -297,7 +366,8 @@ def startup_event():
     Implementation Notes:
         - create_tables() uses SQLAlchemy's create_all(), which only creates missing tables
         - Won't drop or modify existing tables (safe for production restarts)
-        - ML model loading happens when ml.transaction_classifier module imports
+        - The shared ML classifier is loaded here when ML_EAGER_LOAD is set,
+          otherwise on the first prediction request
     
     Production Considerations:
         In production, I should:
@@ -314,12 +384,53 @@ def startup_event():
     create_tables()
     print("[+] Database tables created")
     
-    # The ML model is loaded when the classifier module is imported at the top of this file
-    # I just log confirmation here for operational visibility
-    print("[+] ML model initialized and ready")
+    # Existing transactions are rolled up once, on the first start with transaction_rollups
+    rollup_rows = backfill_rollups(engine)
+    if rollup_rows:
+        print(f"[+] Built {rollup_rows} transaction rollup rows from existing transactions")
+    
+    # Build the in-memory merchant lookup from merchant_categories
+    # (kept in sync afterwards by ORM events in ml/merchant_index.py)
+    db = SessionLocal()
+    try:
+        merchant_count = merchant_index.load(db)
+    finally:
+        db.close()
+    print(f"[+] Merchant index loaded ({merchant_count} merchants)")
+    
+    # Load (or train) the shared classifier before accepting traffic unless
+    # ML_EAGER_LOAD is off, in which case the first prediction pays for it
+    if settings.ML_EAGER_LOAD:
+        get_classifier()
+        print("[+] ML model initialized and ready")
+    else:
+        print("[*] ML model will be initialized on first use")
+    
+    # Watch ML_ARTIFACT_DIR for models published by `python -m ml.train`
+    model_watcher.start()
+    
+    # Learn from category corrections (partial_fit needs the sklearn model); only the
+    # worker that gets the learner's lock file trains and publishes
+    if settings.ML_ONLINE_LEARNING and settings.ML_ARTIFACT_FORMAT == 'pickle':
+        online_learner.start()
+    
+    # Compare a published CANDIDATE model with the live one on real traffic
+    if settings.ML_SHADOW_MODE:
+        shadow_scorer.start()
     # During beta testing, seeing this message confirmed the server started correctly
     # for the 300+ users who participated (Chapter 6, Section 6.5)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers started in startup_event() and close pooled connections"""
+    model_watcher.stop()
+    if settings.ML_ONLINE_LEARNING and settings.ML_ARTIFACT_FORMAT == 'pickle':
+        online_learner.stop()  # Applies stored corrections and checkpoints (learner worker only)
+    shadow_scorer.stop()
+    password_hasher.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # Health check
 @app.get("/")
 async def root():
@@ -331,21 +442,40 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow(),
+        "password_hashing": password_hasher.stats(),
+        "user_cache": user_cache.stats(),
+        "analytics_cache": analytics_cache.stats()
+    }
 
 @app.get("/v1/models")
 async def get_models():
     """Get information about available ML models"""
+    # Metadata of the classifier actually serving, from the registry (or the
+    # model itself when it was trained in-process and never published)
+    classifier_info = {
+        "name": "Transaction Classifier",
+        "type": "Multinomial Naive Bayes",
+        "status": "not_loaded"
+    }
+    if is_classifier_initialized():
+        metadata = read_model_metadata(classifier.model_version) or classifier.metadata or {}
+        classifier_info.update({
+            "version": classifier.model_version,
+            "status": "active",
+            "accuracy": metadata.get("accuracy"),
+            "training_samples": metadata.get("training_samples"),
+            "training_data_hash": metadata.get("training_data_hash"),
+            "trained_at": metadata.get("trained_at"),
+            "featurizer": metadata.get("featurizer"),
+            "categories": classifier.categories
+        })
+    
     return {
         "models": [
-            {
-                "name": "Transaction Classifier",
-                "type": "Multinomial Naive Bayes",
-                "version": "1.0",
-                "status": "active",
-                "accuracy": "87%",
-                "categories": ["Food & Dining", "Transport", "Shopping", "Utilities", "Healthcare", "Entertainment", "Education", "Personal", "Bills", "Other"]
-            },
+            classifier_info,
             {
                 "name": "Cash Flow Forecaster",
                 "type": "Time Series ARIMA",
@@ -361,6 +491,8 @@ async def get_models():
             }
         ],
         "total_models": 3,
+        "classifier_registry": list_models(),
+        "shadow": shadow_scorer.stats(),
         "last_updated": datetime.utcnow().isoformat()
     }
 
@@ -376,19 +508,26 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
+class BatchPredictionRequest(BaseModel):
+    # Capped: the route is unauthenticated and one request holds the scorer for all of them
+    descriptions: List[str] = Field(..., max_length=settings.ML_BATCH_MAX_DESCRIPTIONS)
+    amounts: Optional[List[Optional[float]]] = None
+    top_k: Optional[int] = None
+
 @app.post("/api/v1/register")
 async def register_user(
     req: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     import logging
     logging.basicConfig(level=logging.DEBUG)
     logging.debug(f"Register request: email={req.email}, full_name={req.full_name}, phone_number={req.phone_number}")
-    existing_user = db.query(User).filter(User.email == req.email).first()
+    existing_user = (await db.execute(select(User).where(User.email == req.email))).scalars().first()
     if existing_user:
         logging.debug("Email already registered")
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(req.password)
+    # bcrypt runs on the hashing pool; the event loop keeps serving other requests
+    hashed_password = await password_hasher.hash(req.password)
     logging.debug(f"Hashed password: {hashed_password}")
     user = User(
         email=req.email,
@@ -397,8 +536,7 @@ async def register_user(
         phone_number=req.phone_number
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     logging.debug(f"User created with ID: {user.id}")
     default_accounts = [
         Account(user_id=user.id, name="Cash USD", account_type="cash", currency="USD", balance=0, color="#4CAF50"),
@@ -408,7 +546,7 @@ async def register_user(
     ]
     for account in default_accounts:
         db.add(account)
-    db.commit()
+    await db.commit()
     logging.debug(f"Default accounts created for user {user.id}")
     access_token = create_access_token(data={"sub": user.email})
     logging.debug(f"Access token generated: {access_token}")
@@ -423,12 +561,12 @@ async def register_user(
 @app.post("/api/v1/login")
 async def login_user(
     req: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     import logging
     logging.basicConfig(level=logging.DEBUG)
     logging.debug(f"Login request: email={req.email}")
-    user = db.query(User).filter(User.email == req.email).first()
+    user = (await db.execute(select(User).where(User.email == req.email))).scalars().first()
     if not user:
         logging.debug("User not found")
         raise HTTPException(
@@ -437,7 +575,8 @@ async def login_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     logging.debug(f"User found: {user.email}, Hashed password: {user.hashed_password}")
-    if not verify_password(req.password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify(req.password, user.hashed_password)
+    if not valid:
         logging.debug("Password verification failed")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -445,6 +584,11 @@ async def login_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     logging.debug("Password verification succeeded")
+    if new_hash:
+        # Stored hash predates the current AUTH_BCRYPT_ROUNDS (or scheme); upgrade it now
+        # that we have the plain password
+        user.hashed_password = new_hash
+        await db.commit()
     access_token = create_access_token(data={"sub": user.email})
     logging.debug(f"Access token generated: {access_token}")
     return {
@@ -456,9 +600,9 @@ async def login_user(
 
 # Account Management
 @app.get("/api/v1/accounts")
-async def get_user_accounts(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).all()
-    return accounts
+async def get_user_accounts(current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(Account).where(Account.user_id == current_user.id))
+    return result.scalars().all()
 
 @app.post("/api/v1/accounts")
 async def create_account(
@@ -467,8 +611,8 @@ async def create_account(
     currency: str,
     balance: float = 0.0,
     color: str = "#666666",
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     account = Account(
         user_id=current_user.id,
@@ -480,11 +624,69 @@ async def create_account(
     )
     
     db.add(account)
-    db.commit()
-    db.refresh(account)
+    await db.commit()
+    await db.refresh(account)
     
     return {"message": "Account created successfully", "account": account}
 
+def limit_probabilities(prediction, top_k):
+    """Apply predict_category()'s top_k rule to a prediction that didn't come from the model"""
+    if top_k is None:
+        return prediction
+    probabilities = prediction.pop('all_probabilities', {})
+    if top_k > 0:
+        ranked = sorted(probabilities.items(), key=lambda item: item[1], reverse=True)
+        prediction['all_probabilities'] = dict(ranked[:top_k])
+    return prediction
+
+# Categorization shared by transaction creation and the prediction endpoint
+def categorize_description(description: str, amount: Optional[float] = None,
+                           user_id: Optional[int] = None, db: Optional[Session] = None,
+                           top_k: Optional[int] = None, overlay=None):
+    """
+    The user's own corrections for this merchant first, then verified merchants
+    from the index, otherwise the ML classifier. 'merchant' carries the
+    canonical merchant name whenever one is recognized, exactly or fuzzily
+    (ml/categorization.py, also used by `python -m ml.recategorize`).
+    top_k limits all_probabilities as in predict_category() (0 omits it).
+    Model predictions carry 'model_input', the text the classifier scored
+    (fuzzy matches prepend the merchant name); callers pop it before returning
+    or storing the prediction. With an overlay already loaded (user_overlays.get)
+    no Session is needed, so the call can run in a worker thread.
+    """
+    decided, model_input, merchant = resolve_description(description, user_id, db, overlay=overlay)
+    if decided is not None:
+        return limit_probabilities(decided, top_k)
+    prediction = model_prediction(classifier.predict_category(model_input, amount, top_k=top_k), merchant)
+    prediction['model_input'] = model_input
+    return prediction
+
+def categorize_descriptions(descriptions: List[str], amounts: Optional[List[Optional[float]]] = None,
+                            top_k: Optional[int] = None):
+    """
+    categorize_description() for a whole statement, without a user's overlay.
+    Verified merchants are answered from the index; everything else is scored
+    in one predict_categories() call, as ml/recategorize.py does.
+    """
+    amounts = amounts if amounts is not None else [None] * len(descriptions)
+    predictions = [None] * len(descriptions)
+    pending = []
+    for position, description in enumerate(descriptions):
+        decided, model_input, merchant = resolve_description(description)
+        if decided is not None:
+            predictions[position] = limit_probabilities(decided, top_k)
+        else:
+            pending.append((position, model_input, merchant))
+    if pending:
+        scored = classifier.predict_categories(
+            [model_input for _, model_input, _ in pending],
+            [amounts[position] for position, _, _ in pending],
+            top_k=top_k
+        )
+        for (position, _, merchant), prediction in zip(pending, scored):
+            predictions[position] = model_prediction(prediction, merchant)
+    return predictions
+
 # Transaction Management
 @app.post("/api/v1/transactions")
 async def create_transaction(
@@ -492,20 +694,32 @@ async def create_transaction(
     amount: float,
     account_id: int,
     currency: str = "USD",
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verify account belongs to user
-    account = db.query(Account).filter(
-        Account.id == account_id, 
+    account = (await db.execute(select(Account).where(
+        Account.id == account_id,
         Account.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    # Predict category using ML
-    category_prediction = classifier.predict_category(description, amount)
+    # Predict category (user's corrections, then known merchants, then ML);
+    # only the winning category is stored, so skip the per-class distribution.
+    # Only the overlay's database read goes through the session (run_sync awaits its
+    # queries); merchant matching and scoring are CPU work for a worker thread
+    overlay = None
+    if settings.ML_USER_OVERLAY:
+        overlay = await db.run_sync(lambda session: user_overlays.get(session, current_user.id))
+    category_prediction = await run_in_threadpool(
+        categorize_description, description, amount, top_k=0, overlay=overlay
+    )
+    model_input = category_prediction.pop('model_input', None)
+    if model_input is not None:
+        # Non-blocking: a published candidate model scores the same input in the background
+        shadow_scorer.submit(model_input, amount, category_prediction)
     
     # Create transaction
     transaction = Transaction(
@@ -514,16 +728,21 @@ async def create_transaction(
         amount=amount,
         description=description,
         category=category_prediction['category'],
+        merchant=category_prediction.get('merchant'),
         currency=currency,
         transaction_date=datetime.utcnow()
     )
     
-    # Update account balance
-    account.balance += amount
-    
+    # Update account balance in SQL: requests for the same account now interleave at every
+    # await, so reading the balance and writing it back could lose a concurrent update
     db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
+    new_balance = float((await db.execute(
+        update(Account)
+        .where(Account.id == account.id)
+        .values(balance=Account.balance + amount)
+        .returning(Account.balance)
+    )).scalar_one())  # RETURNING skips SQLite's REAL affinity
+    await db.commit()  # column defaults are already on the object, so no refresh round trip
     
     return {
         "message": "Transaction created successfully",
@@ -532,11 +751,12 @@ async def create_transaction(
             "amount": transaction.amount,
             "description": transaction.description,
             "category": transaction.category,
+            "merchant": transaction.merchant,
             "currency": transaction.currency,
             "transaction_date": transaction.transaction_date
         },
         "category_prediction": category_prediction,
-        "new_balance": account.balance
+        "new_balance": new_balance
     }
 
 @app.get("/api/v1/transactions")
@@ -545,89 +765,196 @@ async def get_transactions(
     end_date: Optional[str] = None,
     category: Optional[str] = None,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    query = select(Transaction).where(Transaction.user_id == current_user.id)
     
     if start_date:
         start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-        query = query.filter(Transaction.transaction_date >= start_dt)
+        query = query.where(Transaction.transaction_date >= start_dt)
     
     if end_date:
         end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-        query = query.filter(Transaction.transaction_date <= end_dt)
+        query = query.where(Transaction.transaction_date <= end_dt)
     
     if category:
-        query = query.filter(Transaction.category == category)
+        query = query.where(Transaction.category == category)
     
-    transactions = query.order_by(Transaction.transaction_date.desc()).limit(limit).all()
+    result = await db.execute(query.order_by(Transaction.transaction_date.desc()).limit(limit))
     
-    return transactions
+    return result.scalars().all()
 
-# Analytics Endpoints
-@app.get("/api/v1/analytics/spending-insights")
-async def get_spending_insights(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+@app.put("/api/v1/transactions/{transaction_id}/category")
+async def correct_transaction_category(
+    transaction_id: int,
+    category: str,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    transactions = db.query(Transaction).filter(Transaction.user_id == current_user.id).all()
-    transaction_data = [{
-        'amount': t.amount,
-        'description': t.description,
-        'category': t.category,
-        'currency': t.currency,
-        'transaction_date': t.transaction_date.isoformat()
-    } for t in transactions]
+    """Let the user fix a predicted category; the fix also trains the model in the background"""
+    transaction = (await db.execute(select(Transaction).where(
+        Transaction.id == transaction_id,
+        Transaction.user_id == current_user.id
+    ))).scalars().first()
     
-    insights = analytics_engine.calculate_spending_insights(transaction_data)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
     
-    # Add Zimbabwe-specific insights
-    zimbabwe_insights = analytics_engine.generate_zimbabwe_specific_insights(transaction_data)
-    insights['zimbabwe_context'] = zimbabwe_insights
+    if category not in classifier.categories:
+        raise HTTPException(status_code=400, detail=f"Unknown category '{category}'")
+    
+    # A second correction of the same transaction replaces the first in the user's overlay
+    already_corrected = (await db.execute(select(CategoryCorrection.id).where(
+        CategoryCorrection.transaction_id == transaction.id
+    ).limit(1))).first() is not None
+    previous_category = transaction.category
     
+    correction = CategoryCorrection(
+        user_id=current_user.id,
+        transaction_id=transaction.id,
+        description=transaction.description,
+        predicted_category=previous_category,
+        corrected_category=category
+    )
+    transaction.category = category
+    db.add(correction)
+    await db.commit()
+    await db.refresh(transaction)
+    
+    user_overlays.record(current_user.id, transaction.description, category,
+                         previous_category if already_corrected else None)
+    
+    # The stored correction is what the online learner (in whichever worker holds its
+    # lock) reads; this only makes it poll now if it runs in this process
+    online_learner.notify()
+    
+    return {
+        "message": "Category updated",
+        "transaction_id": transaction.id,
+        "category": transaction.category,
+        "queued_for_learning": settings.ML_ONLINE_LEARNING and settings.ML_ARTIFACT_FORMAT == 'pickle'
+    }
+
+# Analytics Endpoints
+async def fetch_rollups(db, user_id):
+    """The user's transaction_rollups rows as the dicts analytics_engine works on"""
+    result = await db.execute(
+        select(*(getattr(TransactionRollup, column) for column in ROLLUP_COLUMNS)).where(
+            TransactionRollup.user_id == user_id,
+            TransactionRollup.transaction_count != 0
+        )
+    )
+    return [dict(row) for row in result.mappings()]
+
+def detail_window_start(months=None):
+    """First day of the oldest month whose transactions feed per-transaction insights (None: all)"""
+    months = settings.ANALYTICS_DETAIL_MONTHS if months is None else months
+    if months <= 0:
+        return None
+    now = datetime.utcnow()
+    first = now.year * 12 + now.month - months  # months counted from year 0, current one included
+    return datetime(first // 12, first % 12 + 1, 1)
+
+async def fetch_recent_transactions(db, user_id):
+    """The columns per-transaction insights read, for the last ANALYTICS_DETAIL_MONTHS months, as a typed DataFrame"""
+    return await transaction_frame(db, user_id, DETAIL_COLUMNS, since=detail_window_start())
+
+async def cached_analytics(user_id, endpoint, params, compute):
+    """The cached result of endpoint for the user's current data, or await compute() and cache it"""
+    # The version is read before compute() reads the data (see app/analytics_cache.py)
+    key, result = await analytics_cache.lookup_async(user_id, endpoint, params)
+    if result is None:
+        result = await compute()
+        await analytics_cache.store_async(key, result)
+    return result
+
+def detail_window(since):
+    """
+    The 'detail_window' of spending insights: the period the per-transaction
+    figures cover (top_merchants, recurring_expenses and zimbabwe_context's
+    usage counts). Totals, trends, categories and currency_breakdown come from
+    the rollups and cover all of the user's transactions. since is None when
+    ANALYTICS_DETAIL_MONTHS is 0 (every transaction).
+    """
+    return {
+        'since': since.date().isoformat() if since else None,
+        'months': settings.ANALYTICS_DETAIL_MONTHS if since else None
+    }
+
+def spending_insights(rollups, transactions):
+    insights = analytics_engine.calculate_spending_insights(rollups, transactions)
+    # Add Zimbabwe-specific insights
+    insights['zimbabwe_context'] = analytics_engine.generate_zimbabwe_specific_insights(rollups, transactions)
+    insights['detail_window'] = detail_window(detail_window_start())
+    return insights
+
+async def sql_spending_insights(db, user_id):
+    """spending_insights() aggregated by the database (ANALYTICS_BACKEND=sql)"""
+    since = detail_window_start()
+    insights = await sql_analytics.spending_insights(db, user_id, since)
+    insights['detail_window'] = detail_window(since)
     return insights
 
+@app.get("/api/v1/analytics/spending-insights")
+async def get_spending_insights(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Spending trends, categories, merchants and recurring expenses.
+
+    Totals, monthly trends, category breakdowns and the currency breakdown
+    cover all of the user's transactions; top merchants, recurring expenses and
+    the mobile money / bank / informal sector usage cover only the last
+    ANALYTICS_DETAIL_MONTHS months, which 'detail_window' reports.
+    """
+    async def compute():
+        if settings.ANALYTICS_BACKEND == 'sql':
+            return await sql_spending_insights(db, current_user.id)
+        rollups = await fetch_rollups(db, current_user.id)
+        transactions = await fetch_recent_transactions(db, current_user.id)
+        
+        # pandas work runs in the threadpool so other requests keep being served meanwhile
+        return await run_in_threadpool(spending_insights, rollups, transactions)
+    
+    return await cached_analytics(current_user.id, 'spending_insights', None, compute)
+
 @app.get("/api/v1/analytics/cash-flow-forecast")
 async def get_cash_flow_forecast(
     inflation_rate: float = 0.02,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    transactions = db.query(Transaction).filter(Transaction.user_id == current_user.id).all()
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).all()
-    
-    transaction_data = [{
-        'amount': t.amount,
-        'transaction_date': t.transaction_date.isoformat()
-    } for t in transactions]
-    
-    account_data = [{
-        'balance': acc.balance,
-        'currency': acc.currency
-    } for acc in accounts]
+    async def compute():
+        rollups = await fetch_rollups(db, current_user.id)
+        accounts = (await db.execute(select(Account).where(Account.user_id == current_user.id))).scalars().all()
+        
+        account_data = [{
+            'balance': acc.balance,
+            'currency': acc.currency
+        } for acc in accounts]
+        
+        return await run_in_threadpool(
+            analytics_engine.generate_cash_flow_forecast, rollups, account_data, inflation_rate
+        )
     
-    forecast = analytics_engine.generate_cash_flow_forecast(
-        transaction_data, account_data, inflation_rate
+    return await cached_analytics(
+        current_user.id, 'cash_flow_forecast', {'inflation_rate': inflation_rate}, compute
     )
-    return forecast
 
 @app.get("/api/v1/advanced-analytics/ai-forecast")
 async def get_ai_forecast(
     inflation_rate: float = 0.02,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get advanced AI-powered financial forecast"""
-    transactions = db.query(Transaction).filter(Transaction.user_id == current_user.id).all()
-    transaction_data = [{
-        'amount': t.amount,
-        'transaction_date': t.transaction_date.isoformat(),
-        'category': t.category,
-        'currency': t.currency
-    } for t in transactions]
-    forecast = advanced_forecaster.generate_advanced_forecast(transaction_data, inflation_rate)
-    return forecast
+    async def compute():
+        transactions = await transaction_frame(db, current_user.id)
+        return await run_in_threadpool(advanced_forecaster.generate_advanced_forecast, transactions, inflation_rate)
+    
+    return await cached_analytics(current_user.id, 'ai_forecast', {'inflation_rate': inflation_rate}, compute)
 
 @app.get("/api/v1/market/trends")
 async def get_market_trends():
@@ -654,30 +981,25 @@ async def get_market_trends():
     }
 @app.get("/api/v1/analytics/financial-health")
 async def get_financial_health(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    transactions = db.query(Transaction).filter(Transaction.user_id == current_user.id).all()
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).all()
-    goals = db.query(FinancialGoal).filter(FinancialGoal.user_id == current_user.id).all()
-    
-    transaction_data = [{
-        'amount': t.amount,
-        'category': t.category,
-        'currency': t.currency,
-        'transaction_date': t.transaction_date.isoformat()
-    } for t in transactions]
-    
-    account_data = [{'balance': acc.balance} for acc in accounts]
-    goal_data = [{
-        'current_amount': goal.current_amount,
-        'target_amount': goal.target_amount
-    } for goal in goals]
-    
-    health_score = analytics_engine.calculate_financial_health_score(
-        transaction_data, account_data, goal_data
-    )
-    return health_score
+    async def compute():
+        rollups = await fetch_rollups(db, current_user.id)
+        accounts = (await db.execute(select(Account).where(Account.user_id == current_user.id))).scalars().all()
+        goals = (await db.execute(select(FinancialGoal).where(FinancialGoal.user_id == current_user.id))).scalars().all()
+        
+        account_data = [{'balance': acc.balance} for acc in accounts]
+        goal_data = [{
+            'current_amount': goal.current_amount,
+            'target_amount': goal.target_amount
+        } for goal in goals]
+        
+        return await run_in_threadpool(
+            analytics_engine.calculate_financial_health_score, rollups, account_data, goal_data
+        )
+    
+    return await cached_analytics(current_user.id, 'financial_health', None, compute)
 
 # Financial Goals
 @app.post("/api/v1/goals")
@@ -688,7 +1010,7 @@ async def create_financial_goal(
     deadline: str,
     category: str = "savings",
     priority: str = "medium",
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     goal = FinancialGoal(
@@ -709,17 +1031,17 @@ async def create_financial_goal(
 
 @app.get("/api/v1/goals")
 async def get_financial_goals(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    goals = db.query(FinancialGoal).filter(FinancialGoal.user_id == current_user.id).all()
-    return goals
+    result = await db.execute(select(FinancialGoal).where(FinancialGoal.user_id == current_user.id))
+    return result.scalars().all()
 
 @app.put("/api/v1/goals/{goal_id}")
 async def update_goal_progress(
     goal_id: int,
     current_amount: float,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     goal = db.query(FinancialGoal).filter(
@@ -738,43 +1060,71 @@ async def update_goal_progress(
 
 # ML Model Endpoints
 @app.get("/api/v1/ml/predict-category")
-async def predict_category(description: str, amount: Optional[float] = None):
-    prediction = classifier.predict_category(description, amount)
+async def predict_category(description: str, amount: Optional[float] = None, top_k: Optional[int] = None):
+    """Called as the user types; pass top_k to get only the N most likely categories (0 for none)"""
+    if top_k is not None and top_k < 0:
+        raise HTTPException(status_code=400, detail="top_k must be zero or positive")
+    prediction = categorize_description(description, amount, top_k=top_k)
+    prediction.pop('model_input', None)
     return prediction
 
+@app.post("/api/v1/ml/predict-category/batch")
+async def predict_category_batch(req: BatchPredictionRequest):
+    """Categorize a whole statement: known merchants from the index, the rest in one model pass"""
+    if req.amounts is not None and len(req.amounts) != len(req.descriptions):
+        raise HTTPException(status_code=400, detail="descriptions and amounts must have the same length")
+    if req.top_k is not None and req.top_k < 0:
+        raise HTTPException(status_code=400, detail="top_k must be zero or positive")
+    
+    # Same resolution as the single-description endpoint; matching and scoring run off the event loop
+    predictions = await run_in_threadpool(categorize_descriptions, req.descriptions, req.amounts, req.top_k)
+    return {"predictions": predictions, "count": len(predictions)}
+
 @app.get("/api/v1/ml/model-info")
 async def get_model_info():
+    if not is_classifier_initialized():
+        return {"is_trained": False, "initialized": False, "model_type": "Multinomial Naive Bayes"}
     return {
         "is_trained": classifier.is_trained,
+        "initialized": True,
+        "initialization": classifier.initialization,
+        "model_version": classifier.model_version,
+        "hot_swap": model_watcher.stats(),
+        "online_learning": online_learner.stats(),
         "categories": classifier.categories,
-        "model_type": "Multinomial Naive Bayes"
+        "model_type": "Multinomial Naive Bayes",
+        "prediction_cache": classifier.prediction_cache.stats(),
+        "merchant_index": merchant_index.stats(),
+        "fuzzy_merchants": fuzzy_merchants.stats(),
+        "user_overlays": user_overlays.stats()
     }
 
 # EXTENDED FEATURES - Budgets, Investments, Notifications
 
+def budget_summary(budget):
+    progress = (budget.spent_amount / budget.amount * 100) if budget.amount > 0 else 0
+    status = "exceeded" if progress >= 100 else "warning" if progress >= budget.alert_threshold * 100 else "on_track"
+    
+    return {
+        "id": budget.id,
+        "category": budget.category,
+        "amount": budget.amount,
+        "spent_amount": budget.spent_amount,
+        "remaining": budget.amount - budget.spent_amount,
+        "currency": budget.currency,
+        "progress": round(progress, 1),
+        "status": status,
+        "period": budget.period
+    }
+
 @app.get("/api/v1/budgets")
-async def get_budgets(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_budgets(current_user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Get all user budgets with progress"""
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id, Budget.is_active == True).all()
+    budgets = (await db.execute(
+        select(Budget).where(Budget.user_id == current_user.id, Budget.is_active == True)
+    )).scalars().all()
     
-    budget_data = []
-    for budget in budgets:
-        progress = (budget.spent_amount / budget.amount * 100) if budget.amount > 0 else 0
-        status = "exceeded" if progress >= 100 else "warning" if progress >= budget.alert_threshold * 100 else "on_track"
-        
-        budget_data.append({
-            "id": budget.id,
-            "category": budget.category,
-            "amount": budget.amount,
-            "spent_amount": budget.spent_amount,
-            "remaining": budget.amount - budget.spent_amount,
-            "currency": budget.currency,
-            "progress": round(progress, 1),
-            "status": status,
-            "period": budget.period
-        })
-    
-    return budget_data
+    return [budget_summary(budget) for budget in budgets]
 
 @app.post("/api/v1/budgets")
 async def create_budget(
@@ -782,7 +1132,7 @@ async def create_budget(
     amount: float,
     currency: str = "USD",
     period: str = "monthly",
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new budget"""
@@ -809,7 +1159,7 @@ async def create_budget(
 @app.delete("/api/v1/budgets/{budget_id}")
 async def delete_budget(
     budget_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a budget"""
@@ -827,7 +1177,7 @@ async def delete_budget(
     return {"message": "Budget deleted successfully"}
 
 @app.get("/api/v1/investments")
-async def get_investments(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_investments(current_user: AuthenticatedUser = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get all user investments with returns"""
     investments = db.query(Investment).filter(Investment.user_id == current_user.id).all()
     
@@ -874,7 +1224,7 @@ async def create_investment(
     expected_return: float = None,
     risk_level: str = "medium",
     notes: str = "",
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new investment"""
@@ -902,7 +1252,7 @@ async def create_investment(
 @app.delete("/api/v1/investments/{investment_id}")
 async def delete_investment(
     investment_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete an investment"""
@@ -922,25 +1272,189 @@ async def delete_investment(
 @app.get("/api/v1/notifications")
 async def get_notifications(
     unread_only: bool = False,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user notifications"""
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    query = select(Notification).where(Notification.user_id == current_user.id)
     if unread_only:
-        query = query.filter(Notification.is_read == False)
+        query = query.where(Notification.is_read == False)
     
-    notifications = query.order_by(Notification.created_at.desc()).limit(50).all()
-    unread_count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
+    notifications = (await db.execute(query.order_by(Notification.created_at.desc()).limit(50))).scalars().all()
+    unread_count = (await db.execute(
+        select(func.count()).select_from(Notification).where(
+            Notification.user_id == current_user.id,
+            Notification.is_read == False
+        )
+    )).scalar()
     
     return {"notifications": notifications, "unread_count": unread_count}
 
+# Everything the dashboard page shows, in the order it lays the panels out
+DASHBOARD_SECTIONS = (
+    'accounts', 'transactions', 'spending_insights', 'financial_health',
+    'cash_flow_forecast', 'goals', 'budgets', 'notifications'
+)
+DASHBOARD_ANALYTICS = ('spending_insights', 'financial_health', 'cash_flow_forecast')
+
+async def in_own_session(load):
+    # One session per query: an AsyncSession runs a single statement at a time,
+    # so queries that should overlap each need their own connection
+    async with AsyncSessionLocal() as db:
+        return await load(db)
+
+def all_rows(statement, scalar=False):
+    async def load(db):
+        result = await db.execute(statement)
+        return result.scalar() if scalar else result.scalars().all()
+    return load
+
+@app.get("/api/v1/dashboard")
+async def get_dashboard(
+    sections: Optional[str] = None,
+    transaction_limit: int = 10,
+    inflation_rate: float = 0.02,
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    The dashboard in one round trip.
+    
+    The page used to issue a request per panel, each authenticating again and each
+    analytics panel loading the user's data on its own. Here the rows the selected
+    sections need are queried concurrently, the monthly rollups once for all
+    analytics, and the analytics then run side by side in the threadpool.
+    
+    Analytics sections share analytics_cache entries with their own endpoints;
+    only the ones not cached for the user's current data are computed.
+    
+    sections is a comma-separated subset of DASHBOARD_SECTIONS (default: all). A
+    section that fails is reported under "errors" instead of failing the page.
+    """
+    if sections:
+        selected = list(dict.fromkeys(name.strip() for name in sections.split(',') if name.strip()))
+        unknown = [name for name in selected if name not in DASHBOARD_SECTIONS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown dashboard sections: {', '.join(unknown) or repr(sections)}; "
+                       f"choose from {', '.join(DASHBOARD_SECTIONS)}"
+            )
+    else:
+        selected = list(DASHBOARD_SECTIONS)
+    if transaction_limit < 0:
+        raise HTTPException(status_code=400, detail="transaction_limit must be zero or positive")
+    
+    user_id = current_user.id
+    results, errors = {}, {}
+    
+    # Analytics cached for the user's current data need none of their queries
+    cached_sections = [section for section in selected if section in DASHBOARD_ANALYTICS]
+    lookups = await asyncio.gather(*(
+        analytics_cache.lookup_async(
+            user_id, section, {'inflation_rate': inflation_rate} if section == 'cash_flow_forecast' else None
+        ) for section in cached_sections
+    ))
+    cache_keys = {}
+    for section, (cache_keys[section], cached) in zip(cached_sections, lookups):
+        if cached is not None:
+            results[section] = cached
+    analytics = [name for name in selected if name in DASHBOARD_ANALYTICS and name not in results]
+    
+    # Only the queries the selected sections read (the SQL backend's spending insights run their own)
+    needed = set(selected) - set(results)
+    sql_insights = 'spending_insights' in needed and settings.ANALYTICS_BACKEND == 'sql'
+    queries = {}
+    rollup_sections = set(DASHBOARD_ANALYTICS) - ({'spending_insights'} if sql_insights else set())
+    if needed & rollup_sections:
+        queries['rollups'] = lambda db: fetch_rollups(db, user_id)
+    if 'spending_insights' in needed and not sql_insights:
+        queries['recent_transactions'] = lambda db: fetch_recent_transactions(db, user_id)
+    if 'transactions' in needed:
+        queries['transactions'] = all_rows(select(Transaction).where(
+            Transaction.user_id == user_id
+        ).order_by(Transaction.transaction_date.desc()).limit(transaction_limit))
+    if {'accounts', 'financial_health', 'cash_flow_forecast'} & needed:
+        queries['accounts'] = all_rows(select(Account).where(Account.user_id == user_id))
+    if {'goals', 'financial_health'} & needed:
+        queries['goals'] = all_rows(select(FinancialGoal).where(FinancialGoal.user_id == user_id))
+    if 'budgets' in selected:
+        queries['budgets'] = all_rows(select(Budget).where(Budget.user_id == user_id, Budget.is_active == True))
+    if 'notifications' in selected:
+        queries['notifications'] = all_rows(select(Notification).where(
+            Notification.user_id == user_id
+        ).order_by(Notification.created_at.desc()).limit(50))
+        queries['unread_count'] = all_rows(select(func.count()).select_from(Notification).where(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ), scalar=True)
+    
+    fetched = await asyncio.gather(*(in_own_session(load) for load in queries.values()), return_exceptions=True)
+    rows = dict(zip(queries, fetched))
+    
+    def needs(*keys):
+        # A failed query fails every section built from it
+        for key in keys:
+            if isinstance(rows[key], Exception):
+                raise rows[key]
+        return [rows[key] for key in keys]
+    
+    builders = {
+        'accounts': lambda: needs('accounts')[0],
+        'transactions': lambda: needs('transactions')[0],
+        'goals': lambda: needs('goals')[0],
+        'budgets': lambda: [budget_summary(budget) for budget in needs('budgets')[0]],
+        'notifications': lambda: dict(zip(('notifications', 'unread_count'), needs('notifications', 'unread_count'))),
+    }
+    
+    def failed(section, error):
+        errors[section] = str(error)
+        print(f"[!] Dashboard section {section} failed for user {user_id}: {error}")
+    
+    for section in selected:
+        if section in builders:
+            try:
+                results[section] = builders[section]()
+            except Exception as e:
+                failed(section, e)
+    
+    if analytics:
+        computations = {
+            'spending_insights': lambda: spending_insights(*needs('rollups', 'recent_transactions')),
+            'financial_health': lambda: analytics_engine.calculate_financial_health_score(
+                needs('rollups')[0],
+                [{'balance': acc.balance} for acc in needs('accounts')[0]],
+                [{'current_amount': goal.current_amount, 'target_amount': goal.target_amount}
+                 for goal in needs('goals')[0]]
+            ),
+            'cash_flow_forecast': lambda: analytics_engine.generate_cash_flow_forecast(
+                needs('rollups')[0],
+                [{'balance': acc.balance, 'currency': acc.currency} for acc in needs('accounts')[0]],
+                inflation_rate
+            ),
+        }
+        
+        def run(section):
+            if section == 'spending_insights' and sql_insights:
+                # Aggregated by the database, on a connection of its own
+                return in_own_session(lambda db: sql_spending_insights(db, user_id))
+            return run_in_threadpool(computations[section])
+        
+        outcomes = await asyncio.gather(*(run(section) for section in analytics), return_exceptions=True)
+        for section, outcome in zip(analytics, outcomes):
+            if isinstance(outcome, Exception):
+                failed(section, outcome)
+            else:
+                results[section] = outcome
+                await analytics_cache.store_async(cache_keys[section], outcome)
+    
+    dashboard = {section: results[section] for section in selected if section in results}
+    if errors:
+        dashboard['errors'] = errors
+    return dashboard
+
 @app.get("/api/v1/recurring-transactions")
 async def get_recurring_transactions(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get recurring bills and payments"""
@@ -951,8 +1465,29 @@ async def get_recurring_transactions(
     
     return recurring
 
+@app.post("/api/v1/recurring-transactions/detect")
+def detect_recurring_transactions(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Detect recurring expenses in the user's history and update their recurring transactions
+    
+    Creates a row for each newly detected weekly, monthly or yearly expense,
+    moves the next due date and amount of active ones, and deactivates those
+    whose payments stopped. Also run for every user by
+    `python -m analytics.recurring sync`.
+    """
+    # Plain def: the detection is CPU work on a sync session, so FastAPI runs it in the threadpool
+    changes = sync_recurring_transactions(db, current_user.id)
+    recurring = db.query(RecurringTransaction).filter(
+        RecurringTransaction.user_id == current_user.id,
+        RecurringTransaction.is_active == True
+    ).order_by(RecurringTransaction.next_due_date).all()
+    return {**changes, 'recurring_transactions': recurring}
+
 @app.get("/api/v1/preferences")
-async def get_preferences(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_preferences(current_user: AuthenticatedUser = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get user preferences"""
     preferences = db.query(UserPreference).filter(UserPreference.user_id == current_user.id).first()
     if not preferences:
@@ -1,5 +1,5 @@
-from .transaction_classifier import AdvancedTransactionClassifier
+from .transaction_classifier import (
+    AdvancedTransactionClassifier, classifier, get_classifier, is_classifier_initialized
+)
 
-classifier = AdvancedTransactionClassifier()
-
-__all__ = ["classifier", "AdvancedTransactionClassifier"]
+__all__ = ["classifier", "get_classifier", "is_classifier_initialized", "AdvancedTransactionClassifier"]
@@ -0,0 +1,444 @@
+"""
+Microbenchmarks for the transaction classifier inference path.
+
+Run from the backend directory:
+
+    python -m ml.benchmarks
+    python -m ml.benchmarks --cold-start   # needs a published artifact (python -m ml.train)
+    python -m ml.benchmarks --featurizers  # CountVectorizer vs HashingVectorizer
+    python -m ml.benchmarks --suite --output bench.json
+    python -m ml.benchmarks --serialization  # response size/encode cost by top_k
+
+Compares the original sklearn request path (uncompiled re.sub normalizers,
+vectorizer.transform, predict_proba and predict) against the single-pass
+NaiveBayesScorer used by predict_category() (with the prediction cache off
+and on), reporting p50/p99 latency. --cold-start starts a fresh interpreter
+per artifact format and reports time-to-first-prediction and resident memory.
+--featurizers trains both featurizer modes on the same seeded synthetic data
+and compares accuracy, latency and memory.
+
+--suite is the reproducible end-to-end run: it trains a fresh classifier on
+seeded synthetic data and reports cold load from pickle, single-prediction
+p50/p95/p99, batch throughput at 1/10/100/10k rows, training time and peak
+traced memory as one JSON document, so runs on different commits can be diffed.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+
+import numpy as np
+
+
+def _percentiles(samples_s):
+    """p50/p95/p99 of a list of durations, in microseconds"""
+    micros = np.asarray(samples_s) * 1e6
+    return {
+        'p50_us': round(float(np.percentile(micros, 50)), 2),
+        'p95_us': round(float(np.percentile(micros, 95)), 2),
+        'p99_us': round(float(np.percentile(micros, 99)), 2),
+        'mean_us': round(float(micros.mean()), 2),
+    }
+
+
+def _time_calls(fn, inputs, repeats):
+    samples = []
+    for _ in range(repeats):
+        for description, amount in inputs:
+            start = time.perf_counter()
+            fn(description, amount)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+@contextmanager
+def prediction_cache_disabled(classifier):
+    """A zero-size cache never stores, so every call goes through the scorer"""
+    cache = classifier.prediction_cache
+    max_size = cache.max_size
+    cache.clear()
+    cache.max_size = 0
+    try:
+        yield
+    finally:
+        cache.max_size = max_size
+
+
+def legacy_predict(classifier, description, amount=None):
+    """The pre-scorer request path, kept here only as a benchmark baseline"""
+    text = description.lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    X = classifier.vectorizer.transform([text])
+    probabilities = classifier.model.predict_proba(X)[0]
+    predicted_category = classifier.model.predict(X)[0]
+    confidence = np.max(probabilities)
+    predicted_category = classifier.apply_amount_rules(predicted_category, amount)
+    return {
+        'category': predicted_category,
+        'confidence': float(confidence),
+        'all_probabilities': dict(zip(classifier.model.classes_, probabilities))
+    }
+
+
+def benchmark_single_prediction(classifier, num_inputs=500, repeats=3, seed=42):
+    """p50/p99 latency of legacy_predict() vs predict_category()"""
+    df = classifier.generate_zimbabwe_synthetic_data(num_inputs, seed=seed)
+    inputs = list(zip(df['description'], -df['amount']))[:num_inputs]
+
+    # Warm up both paths so first-call allocation doesn't skew p99
+    for description, amount in inputs[:20]:
+        legacy_predict(classifier, description, amount)
+        classifier.predict_category(description, amount)
+
+    before = _percentiles(_time_calls(
+        lambda d, a: legacy_predict(classifier, d, a), inputs, repeats))
+
+    with prediction_cache_disabled(classifier):
+        after = _percentiles(_time_calls(classifier.predict_category, inputs, repeats))
+
+    cached = _percentiles(_time_calls(classifier.predict_category, inputs, repeats))
+
+    return {
+        'inputs': len(inputs),
+        'repeats': repeats,
+        'legacy_sklearn_path': before,
+        'single_pass_scorer': after,
+        'with_prediction_cache': cached,
+        'p50_speedup': round(before['p50_us'] / after['p50_us'], 1),
+    }
+
+
+def compare_featurizers(num_samples=2500, num_inputs=500, seed=42):
+    """Accuracy / latency / memory of the count and hashing featurizer modes"""
+    from ml.transaction_classifier import AdvancedTransactionClassifier
+    # Pay the sklearn import cost up front so it isn't charged to the first mode's training
+    import sklearn.metrics, sklearn.model_selection, sklearn.naive_bayes  # noqa: F401
+
+    results = {}
+    for featurizer in ('count', 'hashing'):
+        classifier = AdvancedTransactionClassifier(auto_initialize=False)
+        classifier.featurizer = featurizer
+        classifier.prediction_cache.max_size = 0  # measure the scorer, not the cache
+
+        train_df = classifier.generate_zimbabwe_synthetic_data(num_samples, seed=seed)
+        started = time.perf_counter()
+        accuracy = classifier.train(train_df.copy(), save=False)
+        train_seconds = time.perf_counter() - started
+
+        # Second, traced run for peak memory (tracemalloc slows the timed run down)
+        tracemalloc.start()
+        classifier.train(train_df.copy(), save=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        eval_df = classifier.generate_zimbabwe_synthetic_data(num_inputs, seed=seed + 1)
+        inputs = [(d, None) for d in eval_df['description']]
+        latency = _percentiles(_time_calls(classifier.predict_category, inputs, 3))
+
+        results[featurizer] = {
+            'accuracy': round(float(accuracy), 4),
+            'train_seconds': round(train_seconds, 4),
+            'train_peak_memory_kb': round(peak / 1024, 1),
+            'n_features': int(classifier.model.feature_log_prob_.shape[1]),
+            'model_params_kb': round(classifier.model.feature_log_prob_.nbytes / 1024, 1),
+            'vectorizer_pickle_kb': round(len(pickle.dumps(classifier.vectorizer)) / 1024, 1),
+            'predict_latency': latency,
+        }
+    return results
+
+
+def benchmark_cold_load(classifier, repeats=5):
+    """Seconds to load a pickled model into a new classifier (pickle read + scorer build)"""
+    from ml.transaction_classifier import AdvancedTransactionClassifier
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'transaction_classifier.pkl')
+        classifier.save_model(path)
+        samples = []
+        for _ in range(repeats):
+            fresh = AdvancedTransactionClassifier(auto_initialize=False)
+            started = time.perf_counter()
+            fresh.load_model(path)
+            samples.append(time.perf_counter() - started)
+        size = os.path.getsize(path)
+    return {
+        'repeats': repeats,
+        'first_seconds': round(samples[0], 5),
+        'median_seconds': round(float(np.median(samples)), 5),
+        'pickle_kb': round(size / 1024, 1),
+    }
+
+
+def benchmark_batch_throughput(classifier, inputs, sizes=(1, 10, 100, 10000), min_rows=20000):
+    """Rows/second of predict_categories() at each batch size (each size scores >= min_rows rows)"""
+    results = {}
+    for size in sizes:
+        batches = [inputs[i:i + size] for i in range(0, len(inputs) - size + 1, size)]
+        calls = max(3, -(-min_rows // size))
+        samples = []
+        for call in range(calls):
+            batch = batches[call % len(batches)]
+            descriptions = [d for d, _ in batch]
+            amounts = [a for _, a in batch]
+            started = time.perf_counter()
+            classifier.predict_categories(descriptions, amounts)
+            samples.append(time.perf_counter() - started)
+        total = sum(samples)
+        results[str(size)] = {
+            'calls': calls,
+            'rows_per_second': round(calls * size / total, 1),
+            'p50_call_ms': round(float(np.percentile(samples, 50)) * 1e3, 4),
+        }
+    return results
+
+
+def benchmark_training(num_samples=2500, seed=42):
+    """Train a fresh classifier on seeded data; returns (classifier, timings and peak memory)"""
+    from ml.transaction_classifier import AdvancedTransactionClassifier
+    import sklearn.metrics, sklearn.model_selection, sklearn.naive_bayes  # noqa: F401
+
+    classifier = AdvancedTransactionClassifier(auto_initialize=False)
+    train_df = classifier.generate_zimbabwe_synthetic_data(num_samples, seed=seed)
+    started = time.perf_counter()
+    accuracy = classifier.train(train_df.copy(), save=False)
+    train_seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    classifier.train(train_df.copy(), save=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return classifier, {
+        'samples': len(train_df),
+        'accuracy': round(float(accuracy), 4),
+        'train_seconds': round(train_seconds, 4),
+        'train_peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def _traced_peak_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def _environment():
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(seed=42, train_samples=2500, num_inputs=10000, repeats=3):
+    """The full reproducible benchmark run, as a JSON-serializable dict"""
+    from ml.synthetic_data import iter_zimbabwe_synthetic_chunks
+
+    classifier, training = benchmark_training(train_samples, seed)
+
+    # Shuffled evaluation rows from a different seed than the training data
+    eval_df = next(iter_zimbabwe_synthetic_chunks(num_inputs, num_inputs, seed=seed + 1))
+    inputs = list(zip(eval_df['description'], -eval_df['amount']))
+
+    for description, amount in inputs[:50]:
+        classifier.predict_category(description, amount)
+    single = inputs[:1000]
+    with prediction_cache_disabled(classifier):
+        uncached = _percentiles(_time_calls(classifier.predict_category, single, repeats))
+        batch = benchmark_batch_throughput(classifier, inputs)
+        batch_peak = _traced_peak_kb(lambda: classifier.predict_categories(
+            [d for d, _ in inputs], [a for _, a in inputs]))
+    _time_calls(classifier.predict_category, single, 1)  # fill the cache
+    cached = _percentiles(_time_calls(classifier.predict_category, single, repeats))
+
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        classifier.publish_model(artifact_dir)
+        process_cold_start = benchmark_cold_start('pickle', artifact_dir)
+
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': _environment(),
+        'config': {
+            'seed': seed,
+            'train_samples': train_samples,
+            'eval_inputs': len(inputs),
+            'distinct_eval_descriptions': int(eval_df['description'].nunique()),
+            'single_prediction_inputs': len(single),
+            'repeats': repeats,
+            'featurizer': classifier.featurizer,
+        },
+        'training': training,
+        'cold_load_pickle': benchmark_cold_load(classifier),
+        'process_cold_start_pickle': process_cold_start,
+        'single_prediction': {
+            'uncached': uncached,
+            'cached': cached,
+        },
+        'batch_throughput': batch,
+        'peak_memory_kb': {
+            'training': training['train_peak_memory_kb'],
+            f'batch_{len(inputs)}': batch_peak,
+        },
+    }
+
+
+def _render_json(content):
+    """Encode a response body the way FastAPI's JSONResponse does"""
+    from fastapi.encoders import jsonable_encoder
+
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def benchmark_serialization(classifier, num_inputs=500, repeats=3, seed=42):
+    """
+    Cost of predict_category() plus JSON encoding of its response for each
+    all_probabilities shape: the old full dict of NumPy floats, the full dict of
+    native floats, top_k=3 and top_k=0 (no distribution).
+    """
+    df = classifier.generate_zimbabwe_synthetic_data(num_inputs, seed=seed)
+    inputs = list(zip(df['description'], -df['amount']))[:num_inputs]
+
+    def numpy_full(description, amount):
+        # The response shape before top_k: every class, np.float64 values
+        scorer = classifier.scorer
+        category, confidence, probabilities = scorer.score(classifier.preprocess_text(description))
+        return {'category': classifier.apply_amount_rules(category, amount), 'confidence': confidence,
+                'all_probabilities': dict(zip(scorer.classes, probabilities))}
+
+    variants = {
+        'numpy_full_distribution': numpy_full,
+        'native_full_distribution': lambda d, a: classifier.predict_category(d, a),
+        'top_k_3': lambda d, a: classifier.predict_category(d, a, top_k=3),
+        'top_k_0': lambda d, a: classifier.predict_category(d, a, top_k=0),
+    }
+    results = {}
+    with prediction_cache_disabled(classifier):
+        for name, predict in variants.items():
+            for description, amount in inputs[:20]:
+                _render_json(predict(description, amount))
+            results[name] = {
+                'response_bytes': len(_render_json(predict(*inputs[0]))),
+                'predict': _percentiles(_time_calls(predict, inputs, repeats)),
+                'predict_and_encode': _percentiles(_time_calls(
+                    lambda d, a: _render_json(predict(d, a)), inputs, repeats)),
+            }
+    return results
+
+
+# Executed in a fresh interpreter so imports and page mappings start cold
+_COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from ml.transaction_classifier import get_classifier
+classifier = get_classifier()
+classifier.predict_category('OK Zimbabwe', -20)
+elapsed = time.perf_counter() - started
+memory = {}
+for path in ('/proc/self/smaps_rollup', '/proc/self/status'):
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty', 'VmRSS'):
+                    memory.setdefault(key, int(value.split()[0]))
+    except OSError:
+        pass
+print(json.dumps({
+    'cold_start_seconds': round(elapsed, 4),
+    'source': classifier.initialization['source'],
+    'rss_kb': memory.get('Rss', memory.get('VmRSS')),
+    'pss_kb': memory.get('Pss'),
+    'private_kb': memory.get('Private_Clean', 0) + memory.get('Private_Dirty', 0) if 'Pss' in memory else None,
+    'sklearn_imported': 'sklearn' in sys.modules,
+    'pandas_imported': 'pandas' in sys.modules,
+}))
+"""
+
+
+def benchmark_cold_start(artifact_format, artifact_dir=None):
+    """Time-to-first-prediction and memory of a new worker serving one artifact format"""
+    env = dict(os.environ, ML_ARTIFACT_FORMAT=artifact_format)
+    if artifact_dir:
+        env['ML_ARTIFACT_DIR'] = artifact_dir
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, '-c', _COLD_START_SCRIPT],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transaction classifier microbenchmarks")
+    parser.add_argument("--cold-start", action="store_true",
+                        help="compare worker cold start for pickle vs numpy artifacts")
+    parser.add_argument("--featurizers", action="store_true",
+                        help="compare CountVectorizer and HashingVectorizer modes")
+    parser.add_argument("--serialization", action="store_true",
+                        help="response size and encoding cost for each top_k setting")
+    parser.add_argument("--suite", action="store_true",
+                        help="full reproducible run, emitted as JSON")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the --suite JSON to this file")
+    args = parser.parse_args()
+
+    if args.suite:
+        # Training progress goes to stderr so stdout is only the JSON document
+        with redirect_stdout(sys.stderr):
+            result = run_suite(seed=args.seed)
+        document = json.dumps(result, indent=2, sort_keys=True)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(document + '\n')
+        print(document)
+    elif args.serialization:
+        from ml.transaction_classifier import classifier
+
+        for name, result in benchmark_serialization(classifier).items():
+            print(f"[*] {name:<25} {json.dumps(result)}")
+    elif args.featurizers:
+        for featurizer, result in compare_featurizers().items():
+            print(f"[*] {featurizer:<7} {json.dumps(result)}")
+    elif args.cold_start:
+        for artifact_format in ('pickle', 'numpy'):
+            result = benchmark_cold_start(artifact_format)
+            print(f"[*] {artifact_format:<6} {json.dumps(result)}")
+    else:
+        from ml.transaction_classifier import classifier
+
+        result = benchmark_single_prediction(classifier)
+        print(f"[*] Single prediction latency over {result['inputs']} inputs x {result['repeats']}")
+        for name in ('legacy_sklearn_path', 'single_pass_scorer', 'with_prediction_cache'):
+            stats = result[name]
+            print(f"    {name:<22} p50={stats['p50_us']:>8.1f}us  p99={stats['p99_us']:>8.1f}us")
+        print(f"[+] p50 speedup: {result['p50_speedup']}x")
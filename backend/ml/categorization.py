@@ -0,0 +1,96 @@
+"""
+How a transaction description is categorized, shared by the API and batch jobs.
+
+In order: the user's own corrections for the merchant (ml/user_overlay.py), a
+verified merchant from the index (ml/merchant_index.py), otherwise the ML
+classifier - given the correctly spelled merchant name alongside the raw text
+when the trigram index recognizes a misspelled one (ml/fuzzy_merchants.py).
+
+resolve_description() runs every step before the model, so a caller can score
+what is left one description at a time (main.categorize_description) or in
+batches (ml/recategorize.py) and still assign what the other would. Only the
+overlay depends on the user: resolve_merchant() and overlay_prediction() split
+the two so a batch job resolves each distinct description's merchant once.
+"""
+
+from app.config import settings
+from ml.fuzzy_merchants import fuzzy_merchants
+from ml.merchant_index import merchant_index
+from ml.user_overlay import user_overlays
+
+
+def resolve_description(description, user_id=None, db=None, count=True, overlay=None):
+    """
+    (prediction, model_input, merchant) for a description.
+
+    prediction is set when the user's overlay or a verified merchant decides
+    the category; otherwise it is None and model_input is the text to give the
+    classifier. merchant is the recognized merchant entry, exact or fuzzy, or
+    None. The overlay needs both user_id and a Session, or the user's overlay
+    already loaded with user_overlays.get(); count=False leaves the merchant
+    index's hit counters alone (batch jobs).
+    """
+    merchant = merchant_index.lookup(description) if count else merchant_index.match(description)
+    personal = overlay_prediction(description, merchant, user_id, db, overlay)
+    if personal:
+        return personal, None, merchant
+    return _resolve_indexed(description, merchant)
+
+
+def resolve_merchant(description, count=True):
+    """
+    resolve_description() without the user's overlay: the part that depends
+    only on the text, so batch jobs can compute it once per distinct
+    description and apply each user's overlay with overlay_prediction().
+    """
+    merchant = merchant_index.lookup(description) if count else merchant_index.match(description)
+    return _resolve_indexed(description, merchant)
+
+
+def overlay_prediction(description, merchant, user_id, db, overlay=None):
+    """
+    The user's own category for the description, or None. merchant is the
+    merchant index's match (a fuzzy match is ignored: overlays are keyed by
+    indexed names or the payee).
+    """
+    if not settings.ML_USER_OVERLAY:
+        return None
+    if overlay is None and (user_id is None or db is None):
+        return None
+    if merchant and merchant['match_type'] == 'fuzzy':
+        merchant = None
+    personal = user_overlays.predict(db, user_id, description, merchant['merchant_name'] if merchant else '', overlay)
+    if personal and merchant:
+        personal['merchant'] = merchant['merchant_name']
+    return personal
+
+
+def _resolve_indexed(description, merchant):
+    """The verified merchant's category, else the model input (with a fuzzy merchant's name)"""
+    if merchant and merchant['is_verified']:
+        # Verified merchants skip vectorization and the model entirely
+        return {
+            'category': merchant['category'],
+            'confidence': 1.0,
+            'all_probabilities': {merchant['category']: 1.0},
+            'source': 'merchant_index',
+            'merchant': merchant['merchant_name']
+        }, None, merchant
+
+    model_input = description
+    if merchant is None:
+        merchant = fuzzy_merchants.match(description)
+        if merchant:
+            # Give the model the correctly spelled name alongside the raw text
+            model_input = f"{merchant['merchant_name']} {description}"
+    return None, model_input, merchant
+
+
+def model_prediction(prediction, merchant):
+    """Mark a classifier prediction as the model's and attach the merchant resolve_description() found"""
+    prediction['source'] = 'ml_model'
+    if merchant:
+        prediction['merchant'] = merchant['merchant_name']
+        if merchant['match_type'] == 'fuzzy':
+            prediction['merchant_match_score'] = merchant['score']
+    return prediction
@@ -0,0 +1,185 @@
+"""
+Character trigram index for truncated and misspelled merchant names.
+
+Mobile-money and bank descriptions arrive as "PICKNPAY BORROWDA" or "CHKN INN".
+Neither the bag-of-words model nor the exact token trie in ml/merchant_index.py
+recognizes those, but they still share most of their character trigrams with
+the real name. Every known merchant - the synthetic-data vendor lists plus the
+merchant_categories table - is indexed by the trigrams of its normalized name
+(and of the name with spaces removed) in an inverted index, trigram -> names.
+
+A lookup only visits names that share at least one trigram with the
+description, so cost grows with the posting lists touched, not with the number
+of merchants. Each window of one to three consecutive description tokens is
+scored against those candidates with an IDF-weighted Jaccard similarity, so
+trigrams shared by many names ("inn", "atm") count for little and a trailing
+location ("BORROWDA") does not dilute the merchant's own window. The few best
+candidates per window are re-scored with an edit-based ratio on the names with
+spaces removed, which is what separates "CHKN INN" (Chicken Inn) from Pizza Inn,
+and windows further into the description lose a little, since statements lead
+with the merchant.
+
+The merchant table part is rebuilt lazily whenever merchant_index changes.
+"""
+
+import difflib
+import math
+import threading
+
+from app.config import settings
+from ml.merchant_index import merchant_index
+from ml.scoring import normalize_description
+
+MAX_WINDOW_TOKENS = 3
+MIN_SHARED_TRIGRAMS = 3
+RERANK_CANDIDATES = 5
+POSITION_PENALTY = 0.05  # per token the window starts after the beginning
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two spaces in front and one behind"""
+    grams = set()
+    for word in text.split():
+        padded = '  ' + word + ' '
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def _vendor_entries():
+    from ml.synthetic_data import ZIMBABWE_VENDORS
+
+    categories = {}
+    for category, vendor_list in ZIMBABWE_VENDORS.items():
+        for vendor in vendor_list:
+            categories.setdefault(vendor, set()).add(category)
+    # Vendors listed under several categories ("Old Mutual") only normalize the name
+    return [
+        {
+            'merchant_id': None,
+            'merchant_name': vendor,
+            'category': next(iter(found)) if len(found) == 1 else None,
+            'is_verified': False,
+            'source': 'vendor_list'
+        }
+        for vendor, found in categories.items()
+    ]
+
+
+class FuzzyMerchantIndex:
+    """Inverted trigram index over known merchant names"""
+
+    def __init__(self, threshold=None):
+        self.threshold = settings.ML_FUZZY_MERCHANT_THRESHOLD if threshold is None else threshold
+        self._lock = threading.Lock()
+        self._generation = None
+        self._keys = []       # key id -> (total trigram weight, squashed name, entry)
+        self._postings = {}   # trigram -> key ids
+        self._idf = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def build(self, entries):
+        """Index the given merchant entries (later entries win for the same normalized name)"""
+        by_name = {}
+        for entry in entries:
+            name = normalize_description(entry['merchant_name'])
+            if name:
+                by_name[name] = entry
+
+        variants = []
+        postings = {}
+        for name, entry in by_name.items():
+            for variant in {name, name.replace(' ', '')}:
+                grams = trigrams(variant)
+                for gram in grams:
+                    postings.setdefault(gram, []).append(len(variants))
+                variants.append((grams, name.replace(' ', ''), entry))
+
+        total = max(len(variants), 1)
+        idf = {gram: math.log(1 + total / len(ids)) for gram, ids in postings.items()}
+        keys = [(self._weight(grams, idf), squashed, entry) for grams, squashed, entry in variants]
+        self._keys, self._postings, self._idf = keys, postings, idf
+
+    def _refresh(self):
+        if self._generation == merchant_index.generation and self._keys:
+            return
+        with self._lock:
+            generation = merchant_index.generation
+            if self._generation == generation and self._keys:
+                return
+            # Table rows come last so they override the vendor lists
+            self.build(_vendor_entries() + [dict(e, source='merchant_table') for e in merchant_index.entries()])
+            self._generation = generation
+
+    def _weight(self, grams, idf):
+        return sum(idf.get(gram, 0.0) for gram in grams)
+
+    def match(self, description):
+        """
+        Best fuzzy merchant for a description: the entry plus match_type 'fuzzy'
+        and its score, or None if nothing reaches the threshold.
+        """
+        self._refresh()
+        self.lookups += 1
+        keys, postings, idf = self._keys, self._postings, self._idf
+        tokens = normalize_description(description).split()
+
+        best_score, best_entry = 0.0, None
+        for start in range(len(tokens)):
+            for end in range(start + 1, min(start + MAX_WINDOW_TOKENS, len(tokens)) + 1):
+                window = ' '.join(tokens[start:end])
+                squashed = window.replace(' ', '')
+                query = trigrams(window) | trigrams(squashed)
+                # key id -> [shared trigrams, shared trigram weight]
+                shared = {}
+                for gram in query:
+                    weight = idf.get(gram)
+                    for key_id in postings.get(gram, ()):
+                        found = shared.get(key_id)
+                        if found is None:
+                            shared[key_id] = [1, weight]
+                        else:
+                            found[0] += 1
+                            found[1] += weight
+
+                if not shared:
+                    continue
+                query_weight = self._weight(query, idf)
+                matcher = difflib.SequenceMatcher(None, '', squashed)  # b is analysed once per window
+                candidates = sorted(
+                    ((common / (query_weight + keys[key_id][0] - common), key_id)
+                     for key_id, (count, common) in shared.items() if count >= MIN_SHARED_TRIGRAMS),
+                    reverse=True
+                )[:RERANK_CANDIDATES]
+
+                penalty = POSITION_PENALTY * start
+                for jaccard, key_id in candidates:
+                    _, name, entry = keys[key_id]
+                    matcher.set_seq1(name)
+                    # Cheap upper bounds first; ratio() is the expensive part
+                    if 0.5 * (jaccard + matcher.real_quick_ratio()) - penalty <= best_score:
+                        continue
+                    if 0.5 * (jaccard + matcher.quick_ratio()) - penalty <= best_score:
+                        continue
+                    score = 0.5 * (jaccard + matcher.ratio()) - penalty
+                    if score > best_score:
+                        best_score, best_entry = score, entry
+
+        if best_entry is None or best_score < self.threshold:
+            return None
+        self.hits += 1
+        return dict(best_entry, match_type='fuzzy', score=round(best_score, 4))
+
+    def stats(self):
+        return {
+            'names_indexed': len(self._keys),
+            'trigrams': len(self._postings),
+            'threshold': self.threshold,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0.0
+        }
+
+
+fuzzy_merchants = FuzzyMerchantIndex()
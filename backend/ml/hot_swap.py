@@ -0,0 +1,96 @@
+"""
+Background hot-swap of the transaction classifier.
+
+ModelWatcher polls the LATEST pointer in ML_ARTIFACT_DIR on a daemon thread.
+When `python -m ml.train` publishes a new version, the watcher unpickles it off
+the request path (or maps the NumPy export when ML_ARTIFACT_FORMAT=numpy) and
+installs it, which replaces the live scorer with one reference assignment.
+Requests already scoring keep the old model object until they return; nothing
+on the request path waits for the load.
+"""
+
+import logging
+import threading
+from datetime import datetime
+
+from app.config import settings
+from ml.transaction_classifier import (
+    artifact_path, get_classifier, is_classifier_initialized,
+    numpy_artifact_path, read_latest_version, read_model_file
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWatcher:
+    def __init__(self, artifact_dir=None, poll_interval=None):
+        self.artifact_dir = artifact_dir or settings.ML_ARTIFACT_DIR
+        self.poll_interval = settings.ML_HOT_SWAP_INTERVAL if poll_interval is None else poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.swaps = 0
+        self.last_swap_at = None
+        self.last_error = None
+
+    def check_once(self):
+        """Install the published version if the live model is not it or based on it. Returns True on swap."""
+        # A lazily-created classifier loads the latest artifact itself on first use
+        if not is_classifier_initialized():
+            return False
+
+        version = read_latest_version(self.artifact_dir)
+        classifier = get_classifier()
+        # published_version, not model_version: after online updates (ml/online_learning.py)
+        # the live model is a newer, unpublished descendant of LATEST and must be kept
+        if version is None or version == classifier.published_version:
+            return False
+
+        try:
+            if settings.ML_ARTIFACT_FORMAT == 'numpy':
+                classifier.load_numpy_artifact(numpy_artifact_path(version, self.artifact_dir))
+            else:
+                data = read_model_file(artifact_path(version, self.artifact_dir))
+                classifier.install_model(data['model'], data['vectorizer'], data['categories'], version)
+                classifier.metadata = data.get('metadata')
+        except Exception as e:
+            # Keep serving the current model; retry on the next poll
+            self.last_error = f"{version}: {e}"
+            logger.warning("Model hot-swap to %s failed: %s", version, e)
+            return False
+
+        self.swaps += 1
+        self.last_swap_at = datetime.utcnow().isoformat()
+        self.last_error = None
+        logger.info("Hot-swapped classifier to version %s", version)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_once()
+
+    def start(self):
+        if self.poll_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'artifact_dir': self.artifact_dir,
+            'poll_interval_seconds': self.poll_interval,
+            'published_version': read_latest_version(self.artifact_dir),
+            'swaps': self.swaps,
+            'last_swap_at': self.last_swap_at,
+            'last_error': self.last_error
+        }
+
+
+model_watcher = ModelWatcher()
@@ -0,0 +1,225 @@
+"""
+In-memory index over the merchant_categories table.
+
+Known merchants are resolved before the Naive Bayes model runs. Merchant names
+are normalized with the same rules as the classifier and stored in a token trie,
+so a description is matched by walking its tokens once from each start position:
+"OK ZIMBABWE HARARE" finds "OK Zimbabwe" as a prefix, "POS OK ZIMBABWE" finds it
+as a token match, and "OKZIMBABWE" finds it through the squashed-name key.
+
+The index is kept in step with the table through ORM events: inserts, updates
+and deletes of MerchantCategory rows are applied when their session commits and
+dropped if it rolls back. Bulk query.update()/delete() bypass ORM events, so call
+load() after those.
+"""
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ml.scoring import normalize_description
+from models import MerchantCategory
+
+# Terminal marker in trie nodes; tokens are \w+ so this can never collide. Its value is
+# the frozenset of merchant ids whose name ends there: "Old Mutual" can be listed under
+# both investment and insurance. Writers replace the set instead of mutating it, so
+# match() can read it without the lock.
+_END = '$'
+
+_PENDING_KEY = 'merchant_index_changes'
+
+
+def _merchant_entry(row):
+    return {
+        'merchant_id': row.id,
+        'merchant_name': row.merchant_name,
+        'category': row.category,
+        'subcategory': row.subcategory,
+        'is_verified': bool(row.is_verified)
+    }
+
+
+class MerchantIndex:
+    """Token trie of known merchant names with hit-rate counters"""
+
+    def __init__(self):
+        self._root = {}
+        self._entries = {}  # merchant id -> entry dict
+        self._keys = {}     # merchant id -> token tuples indexed for it
+        self._lock = threading.Lock()
+        self.is_loaded = False
+        self.generation = 0  # bumped on every change so derived indexes know to rebuild
+        self.lookups = 0
+        self.hits = 0
+        self.verified_hits = 0
+        self.match_types = {'exact': 0, 'prefix': 0, 'token': 0}
+
+    @staticmethod
+    def _keys_for(merchant_name):
+        tokens = normalize_description(merchant_name).split()
+        if not tokens:
+            return []
+        keys = [tuple(tokens)]
+        if len(tokens) > 1:
+            keys.append((''.join(tokens),))
+        return keys
+
+    def _remove_locked(self, merchant_id):
+        self._entries.pop(merchant_id, None)
+        for key in self._keys.pop(merchant_id, []):
+            node = self._root
+            for token in key:
+                node = node.get(token)
+                if node is None:
+                    break
+            else:
+                remaining = node.get(_END, frozenset()) - {merchant_id}
+                if remaining:
+                    node[_END] = remaining
+                else:
+                    node.pop(_END, None)
+
+    def upsert(self, entry):
+        """Add or replace one merchant"""
+        with self._lock:
+            self._remove_locked(entry['merchant_id'])
+            keys = self._keys_for(entry['merchant_name'])
+            for key in keys:
+                node = self._root
+                for token in key:
+                    node = node.setdefault(token, {})
+                node[_END] = node.get(_END, frozenset()) | {entry['merchant_id']}
+            self._entries[entry['merchant_id']] = entry
+            self._keys[entry['merchant_id']] = keys
+            self.generation += 1
+
+    def remove(self, merchant_id):
+        """Drop one merchant"""
+        with self._lock:
+            self._remove_locked(merchant_id)
+            self.generation += 1
+
+    def entries(self):
+        """Snapshot of every indexed merchant entry"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def load(self, db):
+        """(Re)build the whole index from the merchant_categories table"""
+        rows = db.query(MerchantCategory).all()
+        with self._lock:
+            self._root = {}
+            self._entries = {}
+            self._keys = {}
+            self.generation += 1
+        for row in rows:
+            self.upsert(_merchant_entry(row))
+        self.is_loaded = True
+        return len(rows)
+
+    def match(self, description):
+        """
+        Find the first known merchant in a description.
+
+        Returns the merchant entry plus match_type ('exact', 'prefix' or
+        'token'), or None. Scans each start position once and keeps the
+        longest merchant name that matches there. Does not touch the counters.
+        """
+        tokens = normalize_description(description).split()
+        root = self._root
+        for start in range(len(tokens)):
+            node = root
+            best = None
+            position = start
+            while position < len(tokens):
+                node = node.get(tokens[position])
+                if node is None:
+                    break
+                position += 1
+                if _END in node:
+                    best = (node[_END], position)
+            if best is None:
+                continue
+
+            merchant_ids, end = best
+            entry = self._pick(merchant_ids)
+            if entry is None:
+                continue
+            if start == 0:
+                match_type = 'exact' if end == len(tokens) else 'prefix'
+            else:
+                match_type = 'token'
+            return dict(entry, match_type=match_type)
+        return None
+
+    def _pick(self, merchant_ids):
+        """The entry for one of the merchants sharing a name: verified first, then lowest id"""
+        entries = [self._entries.get(merchant_id) for merchant_id in merchant_ids]
+        entries = [entry for entry in entries if entry is not None]
+        if not entries:
+            return None
+        return min(entries, key=lambda entry: (not entry['is_verified'], entry['merchant_id']))
+
+    def lookup(self, description):
+        """match() for the request path, counting lookups and hits"""
+        self.lookups += 1
+        merchant = self.match(description)
+        if merchant is not None:
+            self.hits += 1
+            self.match_types[merchant['match_type']] += 1
+            if merchant['is_verified']:
+                self.verified_hits += 1
+        return merchant
+
+    def stats(self):
+        return {
+            'is_loaded': self.is_loaded,
+            'merchants': len(self._entries),
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'verified_hits': self.verified_hits,
+            'match_types': dict(self.match_types),
+            'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0.0
+        }
+
+
+merchant_index = MerchantIndex()
+
+
+# Incremental refresh: queue row changes on the session, apply them on commit
+def _queue_change(target, action):
+    session = Session.object_session(target)
+    if session is None:
+        return
+    payload = target.id if action == 'remove' else _merchant_entry(target)
+    session.info.setdefault(_PENDING_KEY, []).append((action, payload))
+
+
+@event.listens_for(MerchantCategory, 'after_insert')
+def _merchant_inserted(mapper, connection, target):
+    _queue_change(target, 'upsert')
+
+
+@event.listens_for(MerchantCategory, 'after_update')
+def _merchant_updated(mapper, connection, target):
+    _queue_change(target, 'upsert')
+
+
+@event.listens_for(MerchantCategory, 'after_delete')
+def _merchant_deleted(mapper, connection, target):
+    _queue_change(target, 'remove')
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_merchant_changes(session):
+    for action, payload in session.info.pop(_PENDING_KEY, []):
+        if action == 'remove':
+            merchant_index.remove(payload)
+        else:
+            merchant_index.upsert(payload)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_merchant_changes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
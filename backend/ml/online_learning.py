@@ -0,0 +1,278 @@
+"""
+Online learning from user category corrections.
+
+The correction endpoint stores a CategoryCorrection row and returns; it never
+waits for the model. A daemon thread reads the corrections it has not applied
+yet from category_corrections in mini-batches (up to ML_ONLINE_BATCH_SIZE rows,
+polled every ML_ONLINE_FLUSH_SECONDS or as soon as this process records one)
+into AdvancedTransactionClassifier.partial_fit(), and every
+ML_CHECKPOINT_SECONDS publishes the updated model as a new versioned artifact so
+restarts - and other workers, through ml/hot_swap.py - pick it up.
+
+Only one process trains. start() takes an exclusive lock on ML_ONLINE_LOCK_FILE
+(default <ML_ARTIFACT_DIR>/online-learner.lock); the worker that gets it is the
+learner, the others only serve the models it publishes. Because corrections are
+read from the table rather than handed over in memory, the learner sees those
+recorded by every worker, and after a restart it resumes after the
+last_correction_id stored in the live model's metadata. On several hosts
+sharing one artifact directory, enable ML_ONLINE_LEARNING on one host only
+(file locks are not reliable over network filesystems).
+
+The updated model is live straight away under a new, unpublished version; its
+published_version stays the LATEST version it was updated from, which is what
+ml/hot_swap.py compares LATEST against, so the watcher does not reinstall the
+base model over it. A checkpoint publishes only if LATEST still names that base
+version and the live model is still the one the updates produced. If either
+changed (ml.registry promote, ml.train, a hot-swap), the updates are dropped and
+their corrections replayed onto the new live model once it is installed,
+instead of overwriting the promotion or publishing a model without them. Each publish prunes all
+but the newest ML_ARTIFACT_KEEP versions (see ml/registry.py).
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from ml.hot_swap import model_watcher
+from ml.registry import prune_models
+from ml.transaction_classifier import get_classifier, read_latest_version
+from models import CategoryCorrection, SessionLocal
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def _try_lock(path):
+    """Open and exclusively lock path without blocking; the open file, or None if another process holds it"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handle = open(path, 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        return None
+    # The lock goes away with the process, so a crashed learner never blocks its successor
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+class OnlineLearner:
+    def __init__(self, batch_size=None, flush_seconds=None, checkpoint_seconds=None, lock_file=None):
+        self.batch_size = batch_size or settings.ML_ONLINE_BATCH_SIZE
+        self.flush_seconds = settings.ML_ONLINE_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.checkpoint_seconds = (settings.ML_CHECKPOINT_SECONDS
+                                   if checkpoint_seconds is None else checkpoint_seconds)
+        self.lock_file = lock_file or settings.ML_ONLINE_LOCK_FILE or os.path.join(
+            settings.ML_ARTIFACT_DIR, 'online-learner.lock'
+        )
+        self._lock_handle = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._dirty = False
+        self._base_version = None  # LATEST when the unpublished updates started
+        self._updated_version = None  # model_version the last update installed
+        self._last_checkpoint = time.monotonic()
+        self.last_correction_id = None       # Newest correction applied to the in-memory model
+        self.published_correction_id = None  # Newest correction in a published model
+        self.role = 'stopped'
+        self.notified = 0
+        self.applied = 0
+        self.skipped = 0
+        self.batches = 0
+        self.checkpoints = 0
+        self.conflicts = 0
+        self.pruned = 0
+        self.last_checkpoint_at = None
+        self.last_error = None
+
+    def notify(self):
+        """A correction was just stored; have this process's learner (if it is the one) poll now"""
+        self.notified += 1
+        self._wake.set()
+
+    def _resume_point(self):
+        """Correction id to continue after: the live model's, else everything stored so far"""
+        metadata = get_classifier().metadata or {}
+        if metadata.get('last_correction_id') is not None:
+            return metadata['last_correction_id']
+        # A model without the marker was not trained on stored corrections by this learner;
+        # start with the next one rather than replaying the whole history into it
+        with SessionLocal() as db:
+            return db.scalar(select(func.max(CategoryCorrection.id))) or 0
+
+    def _next_batch(self):
+        with SessionLocal() as db:
+            return db.execute(
+                select(CategoryCorrection.id, CategoryCorrection.description, CategoryCorrection.corrected_category)
+                .where(CategoryCorrection.id > self.last_correction_id)
+                .order_by(CategoryCorrection.id)
+                .limit(self.batch_size)
+            ).all()
+
+    def _ready(self, classifier):
+        """
+        Whether updates can be applied to the in-memory model. With nothing
+        unpublished it must be the live version; if LATEST was moved and the
+        watcher has not installed it yet, install it first.
+        """
+        if self._dirty:
+            return True
+        live = read_latest_version()
+        if live is None or classifier.published_version == live:
+            self._base_version = live
+            return True
+        model_watcher.check_once()
+        if classifier.published_version == live:
+            self._base_version = live
+            return True
+        return False
+
+    def _apply(self, batch):
+        classifier = get_classifier()
+        if not self._ready(classifier):
+            return False
+        descriptions = [row.description for row in batch]
+        categories = [row.corrected_category for row in batch]
+        try:
+            classifier.partial_fit(descriptions, categories)
+        except Exception as e:
+            # A batch the model cannot take (e.g. a category it does not have) is skipped,
+            # not retried on every poll
+            self.last_error = str(e)
+            self.skipped += len(batch)
+            logger.warning("Online update of %d corrections failed: %s", len(batch), e)
+        else:
+            self.applied += len(batch)
+            self.batches += 1
+            self._dirty = True
+            self._updated_version = classifier.model_version
+        self.last_correction_id = batch[-1].id
+        return True
+
+    def poll(self):
+        """Apply every stored correction not applied yet. Returns how many were read."""
+        read = 0
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch or not self._apply(batch):
+                break
+            read += len(batch)
+            if len(batch) < self.batch_size:
+                break
+        return read
+
+    def checkpoint(self):
+        """Publish the updated model if anything changed and LATEST has not moved since"""
+        self._last_checkpoint = time.monotonic()
+        if not self._dirty:
+            return False
+        classifier = get_classifier()
+        if read_latest_version() != self._base_version or classifier.model_version != self._updated_version:
+            # Promoted, retrained or swapped meanwhile: keep the new live model and replay
+            # these corrections onto it, rather than publishing a model that lacks them
+            self.conflicts += 1
+            self._dirty = False
+            self.last_correction_id = self.published_correction_id
+            logger.info("Live model moved off %s; replaying corrections onto the new one", self._updated_version)
+            return False
+        try:
+            classifier.metadata = dict(classifier.metadata or {}, last_correction_id=self.last_correction_id)
+            classifier.publish_model()
+        except Exception as e:
+            self.last_error = f"checkpoint: {e}"
+            logger.warning("Online learning checkpoint failed: %s", e)
+            return False
+        self._dirty = False
+        self._base_version = classifier.model_version
+        self.published_correction_id = self.last_correction_id
+        self.checkpoints += 1
+        self.last_checkpoint_at = datetime.utcnow().isoformat()
+
+        try:
+            self.pruned += len(prune_models(settings.ML_ARTIFACT_KEEP))
+        except OSError as e:
+            logger.warning("Pruning old model artifacts failed: %s", e)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Reading category corrections failed: %s", e)
+            if time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds:
+                self.checkpoint()
+
+    def start(self):
+        """Become the learner if no other process is; otherwise leave learning to that one"""
+        if self._thread and self._thread.is_alive():
+            return True
+        self._lock_handle = self._lock_handle or _try_lock(self.lock_file)
+        if self._lock_handle is None:
+            self.role = 'follower'
+            logger.info("Online learning runs in another worker (%s is locked)", self.lock_file)
+            return False
+        self.role = 'learner'
+        self.last_correction_id = self.published_correction_id = self._resume_point()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="online-learner", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        if self.role != 'learner':
+            return
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self._stop.clear()
+        self.poll()  # Corrections stored since the last poll
+        self.checkpoint()
+        self._lock_handle.close()
+        self._lock_handle = None
+        self.role = 'stopped'
+
+    def stats(self):
+        return {
+            'role': self.role,
+            'running': bool(self._thread and self._thread.is_alive()),
+            'lock_file': self.lock_file,
+            'last_correction_id': self.last_correction_id,
+            'published_correction_id': self.published_correction_id,
+            'notified': self.notified,
+            'applied': self.applied,
+            'skipped': self.skipped,
+            'batches': self.batches,
+            'checkpoints': self.checkpoints,
+            'conflicts': self.conflicts,
+            'pruned_artifacts': self.pruned,
+            'last_checkpoint_at': self.last_checkpoint_at,
+            'last_error': self.last_error
+        }
+
+
+online_learner = OnlineLearner()
@@ -0,0 +1,186 @@
+"""
+Bulk re-categorization of stored transactions after the classifier improves.
+
+    python -m ml.recategorize --chunk-size 10000
+    python -m ml.recategorize --resume            # continue from the checkpoint file
+
+The transactions table is walked in primary-key order with keyset pagination
+(WHERE id > last_id ORDER BY id LIMIT chunk), one chunk in memory at a time, so
+memory stays flat no matter how large the table is. Each description is
+resolved the way transaction creation resolves it today (ml/categorization.py):
+the user's own corrections for the merchant, then a verified merchant, and only
+the rest is scored with one predict_categories() call per chunk. The merchant
+resolution (index match, fuzzy match) depends only on the text, so it is cached
+per distinct description across users and chunks; only the overlay lookup runs
+per (user, description). Only rows
+whose category actually changed are written back, as one executemany UPDATE by
+primary key. Transactions a user has corrected by hand are never touched. The Core UPDATE bypasses the ORM flush
+that maintains transaction_rollups, so each chunk moves its changed rows between
+rollup categories itself, in the same database transaction, and bumps the
+changed users' analytics cache versions (app/analytics_cache.py) after commit.
+
+After every chunk the last processed id is committed and written to the
+checkpoint file, so an interrupted run resumes where it stopped.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from sqlalchemy import bindparam, exists, select, update
+
+from app.analytics_cache import analytics_cache
+from models import SessionLocal, Transaction, CategoryCorrection, RollupDeltas
+from app.cache import LRUCache
+from ml.categorization import overlay_prediction, resolve_merchant
+from ml.merchant_index import merchant_index
+from ml.transaction_classifier import get_classifier
+
+DEFAULT_CHECKPOINT = "ml/recategorize_checkpoint.json"
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, state):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+
+def recategorize_transactions(db, classifier, chunk_size=10000, start_after_id=0,
+                              checkpoint_path=None, dry_run=False, progress=print,
+                              merchant_cache_size=100000):
+    """Re-score every transaction with id > start_after_id. Returns the final progress state."""
+    if not merchant_index.is_loaded:
+        merchant_index.load(db)
+    corrected = exists().where(CategoryCorrection.transaction_id == Transaction.id)
+    # Core executemany (no ORM bulk-update bookkeeping): UPDATE transactions SET category WHERE id
+    transactions = Transaction.__table__
+    update_stmt = (
+        update(transactions)
+        .where(transactions.c.id == bindparam('row_id'))
+        .values(category=bindparam('new_category'))
+    )
+    merchants = LRUCache(merchant_cache_size)
+    state = {
+        'last_id': start_after_id,
+        'processed': 0,
+        'changed': 0,
+        'model_version': classifier.model_version
+    }
+    started = time.perf_counter()
+
+    while True:
+        stmt = (
+            select(Transaction.id, Transaction.description, Transaction.amount, Transaction.category,
+                   Transaction.user_id, Transaction.currency, Transaction.transaction_date)
+            .where(Transaction.id > state['last_id'], ~corrected)
+            .order_by(Transaction.id)
+            .limit(chunk_size)
+        )
+        rows = db.execute(stmt).all()
+        if not rows:
+            break
+
+        # Merchants per description, overlays per (user, description); the model scores the rest
+        resolved = {}
+        categories = [None] * len(rows)
+        unresolved = []
+        for position, row in enumerate(rows):
+            key = (row.user_id, row.description)
+            if key not in resolved:
+                merchant_resolution = merchants.get(row.description)
+                if merchant_resolution is None:
+                    merchant_resolution = resolve_merchant(row.description, count=False)
+                    merchants.set(row.description, merchant_resolution)
+                personal = overlay_prediction(row.description, merchant_resolution[2], row.user_id, db)
+                resolved[key] = (personal, None, merchant_resolution[2]) if personal else merchant_resolution
+            decided, model_input, _ = resolved[key]
+            if decided is not None:
+                categories[position] = decided['category']
+            else:
+                unresolved.append((position, model_input))
+        if unresolved:
+            predictions = classifier.predict_categories(
+                [model_input for _, model_input in unresolved],
+                [rows[position].amount for position, _ in unresolved]
+            )
+            for (position, _), prediction in zip(unresolved, predictions):
+                categories[position] = prediction['category']
+
+        changes = []
+        changed_users = set()
+        rollups = RollupDeltas()
+        for row, category in zip(rows, categories):
+            if category != row.category:
+                changes.append({'row_id': row.id, 'new_category': category})
+                changed_users.add(row.user_id)
+                rollups.add(row.user_id, row.transaction_date, row.category, row.currency, row.amount, sign=-1)
+                rollups.add(row.user_id, row.transaction_date, category, row.currency, row.amount)
+
+        if changes and not dry_run:
+            db.execute(update_stmt, changes)
+            rollups.apply(db.connection())
+        db.commit()
+        if not dry_run:
+            analytics_cache.bump(changed_users)
+
+        state['last_id'] = rows[-1].id
+        state['processed'] += len(rows)
+        state['changed'] += len(changes)
+        if checkpoint_path and not dry_run:
+            write_checkpoint(checkpoint_path, state)
+
+        elapsed = time.perf_counter() - started
+        progress(f"[*] {state['processed']} processed, {state['changed']} changed, "
+                 f"last id {state['last_id']} ({state['processed'] / elapsed:,.0f} rows/s)")
+
+    state['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-categorize stored transactions with the current model")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--start-after-id", type=int, default=0, help="only rows with a greater id")
+    parser.add_argument("--resume", action="store_true", help="start after the id in the checkpoint file")
+    parser.add_argument("--checkpoint-file", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--dry-run", action="store_true", help="count changes without writing them")
+    args = parser.parse_args(argv)
+
+    start_after_id = args.start_after_id
+    if args.resume:
+        checkpoint = read_checkpoint(args.checkpoint_file)
+        if checkpoint:
+            start_after_id = checkpoint['last_id']
+            print(f"[*] Resuming after transaction id {start_after_id}")
+
+    classifier = get_classifier()
+    db = SessionLocal()
+    try:
+        state = recategorize_transactions(
+            db, classifier,
+            chunk_size=args.chunk_size,
+            start_after_id=start_after_id,
+            checkpoint_path=args.checkpoint_file,
+            dry_run=args.dry_run
+        )
+    finally:
+        db.close()
+
+    print(f"[+] Done: {state['processed']} transactions scored, {state['changed']} "
+          f"{'would change' if args.dry_run else 'updated'} in {state['elapsed_seconds']}s "
+          f"(model {state['model_version']})")
+    return state
+
+
+if __name__ == "__main__":
+    main()
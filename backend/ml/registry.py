@@ -0,0 +1,123 @@
+"""
+Model registry over the versioned artifacts in ML_ARTIFACT_DIR.
+
+Every `publish_model()` writes transaction_classifier-<version>.json next to the
+pickle and NumPy export, recording where the model came from: test accuracy,
+number of training rows and a hash of the training data, featurizer, and for
+online updates the parent version. Two pointer files say what each version is
+for: LATEST is the model serving traffic (ml/hot_swap.py follows it) and
+CANDIDATE is the one scored in shadow against live traffic (ml/shadow.py).
+
+    python -m ml.registry list
+    python -m ml.registry candidate <version>     # start shadow-scoring a version
+    python -m ml.registry candidate --clear
+    python -m ml.registry promote <version>       # make it live (clears CANDIDATE if it was)
+    python -m ml.registry prune [--keep 10]       # delete all but the newest versions
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+
+from app.config import settings
+from ml.transaction_classifier import (
+    CANDIDATE_POINTER, LATEST_POINTER, artifact_path, metadata_path, numpy_artifact_path,
+    read_model_metadata, read_pointer, write_pointer
+)
+
+_PREFIX = 'transaction_classifier-'
+
+
+def list_models(artifact_dir=None):
+    """Metadata for every published version, newest first, with its status"""
+    artifact_dir = artifact_dir or settings.ML_ARTIFACT_DIR
+    live = read_pointer(LATEST_POINTER, artifact_dir)
+    candidate = read_pointer(CANDIDATE_POINTER, artifact_dir)
+
+    versions = set()
+    for path in glob.glob(os.path.join(artifact_dir, _PREFIX + '*.pkl')):
+        versions.add(os.path.basename(path)[len(_PREFIX):-len('.pkl')])
+
+    models = []
+    for version in sorted(versions, reverse=True):
+        # Artifacts published before the registry existed have no metadata file
+        metadata = read_model_metadata(version, artifact_dir) or {'version': version}
+        if version == live:
+            status = 'live'
+        elif version == candidate:
+            status = 'candidate'
+        else:
+            status = 'archived'
+        models.append(dict(metadata, status=status))
+    return models
+
+
+def set_candidate(version, artifact_dir=None):
+    """Shadow-score a published version (None stops shadow scoring)"""
+    if version is not None and not os.path.exists(artifact_path(version, artifact_dir)):
+        raise FileNotFoundError(f"No published artifact for version {version}")
+    write_pointer(CANDIDATE_POINTER, version, artifact_dir)
+
+
+def promote(version, artifact_dir=None):
+    """Make a published version the live model; hot-swap picks it up on the next poll"""
+    if not os.path.exists(artifact_path(version, artifact_dir)):
+        raise FileNotFoundError(f"No published artifact for version {version}")
+    write_pointer(LATEST_POINTER, version, artifact_dir)
+    if read_pointer(CANDIDATE_POINTER, artifact_dir) == version:
+        write_pointer(CANDIDATE_POINTER, None, artifact_dir)
+
+
+def prune_models(keep, artifact_dir=None):
+    """
+    Delete the artifacts of all but the newest `keep` versions, never LATEST or
+    CANDIDATE; returns the deleted versions. Every online learning checkpoint
+    publishes a version, so without this the directory only grows.
+    """
+    artifact_dir = artifact_dir or settings.ML_ARTIFACT_DIR
+    pinned = {read_pointer(LATEST_POINTER, artifact_dir), read_pointer(CANDIDATE_POINTER, artifact_dir)}
+    versions = [model['version'] for model in list_models(artifact_dir)]  # Newest first
+    pruned = [version for version in versions[max(keep, 0):] if version not in pinned]
+    for version in pruned:
+        # A worker serving a memory-mapped export keeps its pages after the unlink
+        for path in (artifact_path(version, artifact_dir), metadata_path(version, artifact_dir)):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(numpy_artifact_path(version, artifact_dir), ignore_errors=True)
+    return pruned
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and manage published classifier versions")
+    parser.add_argument("--artifact-dir", default=settings.ML_ARTIFACT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show published versions")
+    candidate = commands.add_parser("candidate", help="set the version scored in shadow")
+    candidate.add_argument("version", nargs="?")
+    candidate.add_argument("--clear", action="store_true")
+    promote_cmd = commands.add_parser("promote", help="make a version live")
+    promote_cmd.add_argument("version")
+    prune = commands.add_parser("prune", help="delete old versions")
+    prune.add_argument("--keep", type=int, default=settings.ML_ARTIFACT_KEEP)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for model in list_models(args.artifact_dir):
+            print(json.dumps(model))
+    elif args.command == "candidate":
+        if not args.clear and not args.version:
+            parser.error("candidate needs a version or --clear")
+        set_candidate(None if args.clear else args.version, args.artifact_dir)
+        print(f"[+] Candidate {'cleared' if args.clear else 'set to ' + args.version}")
+    elif args.command == "prune":
+        pruned = prune_models(args.keep, args.artifact_dir)
+        print(f"[+] Pruned {len(pruned)} versions, kept the newest {args.keep} plus LATEST and CANDIDATE")
+    else:
+        promote(args.version, args.artifact_dir)
+        print(f"[+] Version {args.version} is now live")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Low-latency inference path for the Multinomial Naive Bayes transaction classifier.
+
+The sklearn pipeline (vectorizer.transform -> predict_proba -> predict) builds a
+sparse matrix and computes the joint log-likelihood twice for every request.
+NaiveBayesScorer keeps the fitted parameters as plain NumPy arrays and scores a
+description in one pass: tokenize, look up vocabulary indices, sum the matching
+rows of feature_log_prob_ onto the class log priors, and softmax once to get both
+the label and the confidence.
+
+Only NumPy and the standard library are imported here so the scorer can run in
+processes that never load sklearn. save_scorer() writes the fitted arrays as
+.npy files; NaiveBayesScorer.load(..., mmap_mode='r') maps them read-only, so
+every uvicorn worker on a host shares the same physical pages.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Precompiled normalizers (same rules as AdvancedTransactionClassifier.preprocess_text)
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_DIGITS_RE = re.compile(r'\d+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# CountVectorizer's default token_pattern
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+_FIRST_ROW = np.zeros(1, dtype=np.intp)
+
+
+def murmurhash3_32(text, seed=0):
+    """Signed 32-bit MurmurHash3 (x86) of a UTF-8 string, as used by sklearn's HashingVectorizer"""
+    data = text.encode('utf-8')
+    length = len(data)
+    h = seed & 0xFFFFFFFF
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    tail_start = length - (length % 4)
+    for i in range(0, tail_start, 4):
+        k = int.from_bytes(data[i:i + 4], 'little')
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xE6546B64) & 0xFFFFFFFF
+    k = int.from_bytes(data[tail_start:], 'little') if length % 4 else 0
+    if k:
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+def hashed_feature_index(n_features):
+    """gram -> column mapping identical to HashingVectorizer(alternate_sign=False)"""
+    @lru_cache(maxsize=65536)
+    def index(gram):
+        h = murmurhash3_32(gram)
+        if h == -0x80000000:
+            return (0x7FFFFFFF - (n_features - 1)) % n_features
+        return abs(h) % n_features
+    return index
+
+
+def normalize_description(text):
+    """Lowercase and strip punctuation, digits and extra whitespace"""
+    if not isinstance(text, str):
+        text = str(text)
+    text = text.lower()
+    text = _PUNCTUATION_RE.sub('', text)
+    text = _DIGITS_RE.sub('', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+class NaiveBayesScorer:
+    """
+    Single-pass scorer over fitted MultinomialNB parameters.
+
+    feature_log_prob is stored transposed (n_features x n_classes) so gathering
+    the rows for a description's tokens is a contiguous fancy-index.
+
+    With a CountVectorizer, n-grams are looked up in the fitted vocabulary. With
+    a HashingVectorizer (featurizer='hashing', vocabulary=None) they are hashed
+    into n_features columns exactly as sklearn does, so no vocabulary is stored.
+    """
+
+    def __init__(self, vocabulary, feature_log_prob_T, class_log_prior, classes,
+                 ngram_range=(1, 2), token_pattern=DEFAULT_TOKEN_PATTERN, version=None,
+                 categories=None, featurizer='count'):
+        self.version = version
+        self.featurizer = featurizer
+        self.vocabulary = vocabulary
+        # No copy when already C-contiguous, so memory-mapped arrays stay mapped
+        self.feature_log_prob_T = np.ascontiguousarray(feature_log_prob_T)
+        self.class_log_prior = np.asarray(class_log_prior)
+        self.classes = [str(c) for c in classes]
+        self.categories = list(categories) if categories is not None else list(self.classes)
+        self.ngram_range = tuple(ngram_range)
+        self.min_n, self.max_n = self.ngram_range
+        self.token_pattern = token_pattern
+        self._token_re = re.compile(token_pattern)
+        if featurizer == 'hashing':
+            self._lookup = hashed_feature_index(self.feature_log_prob_T.shape[0])
+        else:
+            self._lookup = vocabulary.get
+
+    @classmethod
+    def from_sklearn(cls, model, vectorizer, version=None):
+        """Build a scorer from a fitted MultinomialNB and Count/HashingVectorizer"""
+        hashing = not hasattr(vectorizer, 'vocabulary_')
+        return cls(
+            version=version,
+            featurizer='hashing' if hashing else 'count',
+            vocabulary=None if hashing else vectorizer.vocabulary_,
+            feature_log_prob_T=np.asarray(model.feature_log_prob_).T,
+            class_log_prior=model.class_log_prior_,
+            classes=model.classes_,
+            ngram_range=vectorizer.ngram_range,
+            token_pattern=vectorizer.token_pattern,
+        )
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load a scorer written by save_scorer()"""
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        featurizer = meta.get('featurizer', 'count')
+        vocabulary = None
+        if featurizer == 'count':
+            terms = np.load(os.path.join(directory, 'vocabulary.npy'))
+            vocabulary = {str(term): index for index, term in enumerate(terms)}
+        return cls(
+            featurizer=featurizer,
+            vocabulary=vocabulary,
+            feature_log_prob_T=np.load(os.path.join(directory, 'feature_log_prob_T.npy'), mmap_mode=mmap_mode),
+            class_log_prior=np.load(os.path.join(directory, 'class_log_prior.npy'), mmap_mode=mmap_mode),
+            classes=meta['classes'],
+            ngram_range=meta['ngram_range'],
+            token_pattern=meta['token_pattern'],
+            version=meta['version'],
+            categories=meta['categories'],
+        )
+
+    def feature_indices(self, processed_text):
+        """Feature indices for every n-gram in the text (repeats count twice)"""
+        tokens = self._token_re.findall(processed_text)
+        lookup = self._lookup
+        indices = []
+        for n in range(self.min_n, self.max_n + 1):
+            if n == 1:
+                grams = tokens
+            else:
+                grams = [' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+            for gram in grams:
+                index = lookup(gram)
+                if index is not None:
+                    indices.append(index)
+        return indices
+
+    def _finish(self, jll):
+        """Turn joint log-likelihoods into (best index, probabilities)"""
+        jll = jll - jll.max(axis=-1, keepdims=True)
+        probabilities = np.exp(jll)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        return probabilities.argmax(axis=-1), probabilities
+
+    def score(self, processed_text):
+        """Return (label, confidence, probabilities) for one preprocessed description"""
+        indices = self.feature_indices(processed_text)
+        if indices:
+            # reduceat (rather than .sum) so rows accumulate in the same order as score_many()
+            gathered = self.feature_log_prob_T[indices]
+            jll = self.class_log_prior + np.add.reduceat(gathered, _FIRST_ROW, axis=0)[0]
+        else:
+            jll = self.class_log_prior.copy()
+        best, probabilities = self._finish(jll)
+        return self.classes[best], float(probabilities[best]), probabilities
+
+    def score_many(self, processed_texts):
+        """Return (labels, confidences, probability matrix) for a batch of descriptions"""
+        rows = [self.feature_indices(text) for text in processed_texts]
+        jll = np.tile(self.class_log_prior, (len(rows), 1))
+
+        lengths = np.fromiter((len(r) for r in rows), dtype=np.intp, count=len(rows))
+        non_empty = np.flatnonzero(lengths)
+        if len(non_empty):
+            flat = np.fromiter((i for r in rows for i in r), dtype=np.intp, count=int(lengths.sum()))
+            offsets = np.concatenate(([0], np.cumsum(lengths[non_empty])[:-1]))
+            jll[non_empty] += np.add.reduceat(self.feature_log_prob_T[flat], offsets, axis=0)
+
+        best, probabilities = self._finish(jll)
+        labels = [self.classes[i] for i in best]
+        confidences = probabilities[np.arange(len(rows)), best]
+        return labels, confidences, probabilities
+
+
+def top_k_indices(probabilities, k):
+    """
+    Column indices of the k largest probabilities along the last axis, highest first.
+
+    argpartition finds the k winners in linear time; only those k are sorted.
+    """
+    n = probabilities.shape[-1]
+    if k >= n:
+        return np.argsort(probabilities, axis=-1)[..., ::-1]
+    top = np.argpartition(probabilities, n - k, axis=-1)[..., n - k:]
+    if probabilities.ndim == 1:
+        return top[np.argsort(probabilities[top])[::-1]]
+    order = np.argsort(np.take_along_axis(probabilities, top, axis=-1), axis=-1)[..., ::-1]
+    return np.take_along_axis(top, order, axis=-1)
+
+
+def save_scorer(scorer, directory, categories=None):
+    """
+    Write a scorer as plain .npy arrays plus a small meta.json.
+
+    vocabulary.npy holds the terms ordered by feature index (count featurizer
+    only); the log-probability matrix is stored already transposed so it can be
+    used straight from the map.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if scorer.featurizer == 'count':
+        terms = [None] * len(scorer.vocabulary)
+        for term, index in scorer.vocabulary.items():
+            terms[index] = term
+        np.save(os.path.join(directory, 'vocabulary.npy'), np.array(terms, dtype=str))
+    np.save(os.path.join(directory, 'feature_log_prob_T.npy'), np.ascontiguousarray(scorer.feature_log_prob_T))
+    np.save(os.path.join(directory, 'class_log_prior.npy'), np.asarray(scorer.class_log_prior))
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({
+            'version': scorer.version,
+            'featurizer': scorer.featurizer,
+            'classes': scorer.classes,
+            'categories': list(categories) if categories is not None else scorer.categories,
+            'ngram_range': list(scorer.ngram_range),
+            'token_pattern': scorer.token_pattern,
+        }, f, indent=2)
@@ -0,0 +1,189 @@
+"""
+Shadow scoring of a candidate classifier against live traffic.
+
+When a version is published as CANDIDATE (`python -m ml.train --candidate` or
+`python -m ml.registry candidate <version>`), create_transaction hands the
+exact text the live model scored (with the merchant name prepended on fuzzy
+matches) to ShadowScorer.submit(), which only puts it on a bounded in-process
+queue - the request never waits for the candidate. A
+daemon thread loads the candidate off the request path, drains the queue in
+batches through predict_categories(), and counts how often the candidate agrees
+with the live model, per live category and per disagreement pair.
+
+The CANDIDATE pointer is re-read between batches; changing or clearing it
+resets the counters. Each worker process keeps its own counts.
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime
+
+from app.config import settings
+from ml.transaction_classifier import (
+    CANDIDATE_POINTER, AdvancedTransactionClassifier,
+    artifact_path, numpy_artifact_path, read_pointer
+)
+
+TOP_DISAGREEMENTS = 10
+
+
+class ShadowScorer:
+    def __init__(self, artifact_dir=None, batch_size=None, flush_seconds=None, max_queue=None):
+        self.artifact_dir = artifact_dir or settings.ML_ARTIFACT_DIR
+        self.batch_size = batch_size or settings.ML_SHADOW_BATCH_SIZE
+        self.flush_seconds = settings.ML_SHADOW_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._queue = queue.Queue(maxsize=max_queue or settings.ML_SHADOW_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._thread = None
+        self.candidate = None
+        self.candidate_version = None
+        self.last_error = None
+        self._reset_counts()
+
+    def _reset_counts(self):
+        self.submitted = 0
+        self.dropped = 0
+        self.scored = 0
+        self.agreed = 0
+        self.scoring_seconds = 0.0
+        self.candidate_confidence_total = 0.0
+        self.live_confidence_total = 0.0
+        self.by_category = {}      # live category -> [scored, agreed]
+        self.disagreements = {}    # (live, candidate) -> count
+        self.started_at = datetime.utcnow().isoformat()
+
+    def submit(self, description, amount, live_prediction):
+        """Queue one live prediction for shadow scoring. Never blocks; False when skipped."""
+        if self.candidate_version is None:
+            return False
+        try:
+            self._queue.put_nowait((description, amount, live_prediction['category'],
+                                    live_prediction['confidence']))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def refresh_candidate(self):
+        """Load, swap or drop the candidate to match the CANDIDATE pointer. Returns True on change."""
+        version = read_pointer(CANDIDATE_POINTER, self.artifact_dir)
+        if version == self.candidate_version:
+            return False
+        candidate = None
+        if version is not None:
+            try:
+                candidate = AdvancedTransactionClassifier(auto_initialize=False)
+                if settings.ML_ARTIFACT_FORMAT == 'numpy':
+                    candidate.load_numpy_artifact(numpy_artifact_path(version, self.artifact_dir))
+                else:
+                    candidate.load_model(artifact_path(version, self.artifact_dir))
+                if not candidate.is_trained:
+                    raise FileNotFoundError(artifact_path(version, self.artifact_dir))
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                print(f"[!] Could not load shadow candidate {version}: {e}")
+                return False
+
+        # Items queued for the previous candidate would be counted against the new one
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self.candidate = candidate
+        self.candidate_version = version
+        self.last_error = None
+        self._reset_counts()
+        print(f"[+] Shadow scoring {'candidate ' + version if version else 'stopped'}")
+        return True
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_seconds)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _score(self, batch):
+        candidate = self.candidate
+        if candidate is None:
+            return
+        started = time.perf_counter()
+        try:
+            predictions = candidate.predict_categories(
+                [description for description, _, _, _ in batch],
+                [amount for _, amount, _, _ in batch]
+            )
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"[!] Shadow scoring of {len(batch)} transactions failed: {e}")
+            return
+        self.scoring_seconds += time.perf_counter() - started
+
+        for (_, _, live_category, live_confidence), prediction in zip(batch, predictions):
+            counts = self.by_category.setdefault(live_category, [0, 0])
+            counts[0] += 1
+            self.scored += 1
+            self.live_confidence_total += live_confidence
+            self.candidate_confidence_total += prediction['confidence']
+            if prediction['category'] == live_category:
+                counts[1] += 1
+                self.agreed += 1
+            else:
+                pair = (live_category, prediction['category'])
+                self.disagreements[pair] = self.disagreements.get(pair, 0) + 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_candidate()
+            batch = self._next_batch()
+            if batch:
+                self._score(batch)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.refresh_candidate()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+
+    def stats(self):
+        scored = self.scored
+        top = sorted(self.disagreements.items(), key=lambda item: item[1], reverse=True)[:TOP_DISAGREEMENTS]
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'candidate_version': self.candidate_version,
+            'since': self.started_at,
+            'queue_depth': self._queue.qsize(),
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'scored': scored,
+            'agreement_rate': round(self.agreed / scored, 4) if scored else None,
+            'mean_live_confidence': round(self.live_confidence_total / scored, 4) if scored else None,
+            'mean_candidate_confidence': round(self.candidate_confidence_total / scored, 4) if scored else None,
+            'candidate_us_per_transaction': round(self.scoring_seconds / scored * 1e6, 1) if scored else None,
+            'agreement_by_live_category': {
+                category: round(agreed / total, 4) for category, (total, agreed) in sorted(self.by_category.items())
+            },
+            'top_disagreements': [
+                {'live': live, 'candidate': candidate, 'count': count} for (live, candidate), count in top
+            ],
+            'last_error': self.last_error
+        }
+
+
+shadow_scorer = ShadowScorer()
@@ -0,0 +1,46 @@
+"""
+Offline training entry point for the transaction classifier.
+
+Trains outside the API process and publishes a versioned artifact that running
+servers pick up through ml/hot_swap.py without a restart:
+
+    python -m ml.train --samples 2500 --seed 42
+    python -m ml.train --featurizer hashing --candidate   # shadow-score before going live
+"""
+
+import argparse
+
+from app.config import settings
+from ml.transaction_classifier import CANDIDATE_POINTER, AdvancedTransactionClassifier
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and publish a transaction classifier artifact")
+    parser.add_argument("--samples", type=int, default=2500, help="synthetic transactions to generate")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible training data")
+    parser.add_argument("--artifact-dir", default=settings.ML_ARTIFACT_DIR,
+                        help="directory for versioned artifacts (default: ML_ARTIFACT_DIR)")
+    parser.add_argument("--featurizer", choices=("count", "hashing"), default=settings.ML_FEATURIZER)
+    parser.add_argument("--candidate", action="store_true",
+                        help="publish as the shadow-scored CANDIDATE instead of making it live")
+    args = parser.parse_args(argv)
+
+    classifier = AdvancedTransactionClassifier(auto_initialize=False)
+    classifier.featurizer = args.featurizer
+    df = classifier.generate_zimbabwe_synthetic_data(args.samples, seed=args.seed)
+    accuracy = classifier.train(df, save=False)
+    path = classifier.publish_model(args.artifact_dir, pointer=CANDIDATE_POINTER if args.candidate else None)
+
+    report = classifier.metadata['classification_report']
+    print(f"[*] {'category':<16} {'precision':>9} {'recall':>9} {'f1':>9} {'support':>8}")
+    for category in classifier.categories:
+        if category in report:
+            row = report[category]
+            print(f"[*] {category:<16} {row['precision']:>9.3f} {row['recall']:>9.3f} "
+                  f"{row['f1-score']:>9.3f} {int(row['support']):>8}")
+    print(f"[+] Version {classifier.model_version} (accuracy {accuracy:.3f}) written to {path}")
+    return path
+
+
+if __name__ == "__main__":
+    main()
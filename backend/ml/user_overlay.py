@@ -0,0 +1,194 @@
+"""
+Per-user category overlay built from CategoryCorrection rows.
+
+The global model learns one category per merchant, but users disagree: "Old
+Mutual" is insurance for one user and investment for another. Each user's
+corrections are folded into a small table of merchant key -> {category: count}
+that is consulted before the model, so once a user has corrected a merchant
+their own label wins for that merchant from then on.
+
+The merchant key is the known merchant's name when the merchant index matches
+the description. Otherwise it is the payee: the normalized description without
+the payment-channel words statements put in front of it ("ecocash payment",
+"pos purchase", "transfer to"), cut to its first two tokens ("POS PURCHASE OLD
+MUTUAL PREMIUM" -> "old mutual"). Keying on the leading tokens alone collapsed
+"ECOCASH PAYMENT ZESA" and "ECOCASH PAYMENT TO JOHN" into "ecocash payment", so
+one correction re-categorized every mobile-money payee.
+
+Overlays are built lazily from the database and kept in an LRU keyed by
+user_id (ML_OVERLAY_CACHE_USERS users at most, each rebuilt after
+ML_OVERLAY_CACHE_TTL seconds so corrections handled by another worker are
+picked up). Each overlay keeps at most
+ML_OVERLAY_MAX_MERCHANTS merchants, dropping the least recently corrected one
+when full. The correction endpoint updates a cached overlay in place through
+record(), so it never has to be rebuilt on writes.
+"""
+
+import threading
+from collections import OrderedDict
+
+from app.cache import LRUCache
+from app.config import settings
+from ml.merchant_index import merchant_index
+from ml.scoring import normalize_description
+from models import CategoryCorrection
+
+MERCHANT_KEY_TOKENS = 2
+
+# Leading words of a statement line that name the payment channel, not the payee
+CHANNEL_TOKENS = frozenset([
+    'ecocash', 'onemoney', 'telecash', 'innbucks', 'mukuru', 'zipit', 'rtgs', 'eft',
+    'pos', 'purchase', 'payment', 'pmt', 'bill', 'merchant', 'card', 'debit', 'credit',
+    'transfer', 'trf', 'send', 'sent', 'money', 'paid', 'pay', 'to', 'from', 'ref', 'txn',
+    'online', 'web', 'mobile',
+])
+
+
+def payee_tokens(description):
+    """Normalized tokens of a description after its leading payment-channel words
+
+    A description made only of channel words ("ECOCASH CASH IN") is its own payee.
+    """
+    tokens = normalize_description(description).split()
+    start = 0
+    while start < len(tokens) and tokens[start] in CHANNEL_TOKENS:
+        start += 1
+    return tokens[start:] if start < len(tokens) else tokens
+
+
+def merchant_key(description, merchant_name=None):
+    """Overlay key for a description (the known merchant's name when the index matches one)
+
+    merchant_name=None looks the description up in the merchant index; pass ''
+    to key by the payee alone.
+    """
+    if merchant_name is None:
+        merchant = merchant_index.match(description)
+        merchant_name = merchant['merchant_name'] if merchant else None
+    if merchant_name:
+        return normalize_description(merchant_name)
+    return ' '.join(payee_tokens(description)[:MERCHANT_KEY_TOKENS])
+
+
+class UserOverlay:
+    """One user's merchant key -> category counts, least recently corrected first"""
+
+    def __init__(self, max_merchants):
+        self.max_merchants = max_merchants
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key, category, previous_category=None):
+        """Count one correction; previous_category undoes an earlier correction of the same transaction"""
+        if not key:
+            return
+        with self._lock:
+            counts = self._counts.setdefault(key, {})
+            if previous_category and counts.get(previous_category):
+                counts[previous_category] -= 1
+                if not counts[previous_category]:
+                    del counts[previous_category]
+            counts[category] = counts.get(category, 0) + 1
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_merchants:
+                self._counts.popitem(last=False)
+
+    def lookup(self, key):
+        """(category, share of this user's corrections, counts) for a merchant key, or None"""
+        counts = self._counts.get(key)
+        if not counts:
+            return None
+        counts = dict(counts)
+        total = sum(counts.values())
+        category = max(counts, key=counts.get)
+        return category, counts[category] / total, counts
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class UserOverlayStore:
+    """LRU of UserOverlay objects keyed by user_id"""
+
+    def __init__(self, max_users=None, max_merchants=None):
+        self.max_merchants = max_merchants or settings.ML_OVERLAY_MAX_MERCHANTS
+        # The TTL bounds how long a worker serves an overlay missing corrections made through another
+        self._cache = LRUCache(max_users or settings.ML_OVERLAY_CACHE_USERS, settings.ML_OVERLAY_CACHE_TTL or None)
+        self.builds = 0
+        self.overrides = 0
+
+    def build(self, db, user_id):
+        """Fold a user's corrections into a new overlay (latest correction per transaction wins)"""
+        rows = (
+            db.query(CategoryCorrection.transaction_id, CategoryCorrection.description,
+                     CategoryCorrection.corrected_category)
+            .filter(CategoryCorrection.user_id == user_id)
+            .order_by(CategoryCorrection.id)
+            .all()
+        )
+        latest = {}
+        for transaction_id, description, category in rows:
+            latest.pop(transaction_id, None)
+            latest[transaction_id] = (description, category)
+
+        overlay = UserOverlay(self.max_merchants)
+        for description, category in latest.values():
+            overlay.add(merchant_key(description), category)
+        self.builds += 1
+        return overlay
+
+    def get(self, db, user_id):
+        overlay = self._cache.get(user_id)
+        if overlay is None:
+            overlay = self.build(db, user_id)
+            self._cache.set(user_id, overlay)
+        return overlay
+
+    def predict(self, db, user_id, description, merchant_name=None, overlay=None):
+        """
+        Prediction dict from the user's own corrections, or None if they never
+        corrected this merchant. An overlay already loaded with get() is used
+        as is, so the lookup needs no database session (worker threads).
+        """
+        if overlay is None:
+            overlay = self.get(db, user_id)
+        match = overlay.lookup(merchant_key(description, merchant_name))
+        if match is None and merchant_name:
+            # Corrections made before the merchant was indexed were keyed by their payee
+            match = overlay.lookup(merchant_key(description, ''))
+        if match is None:
+            return None
+        category, share, counts = match
+        self.overrides += 1
+        total = sum(counts.values())
+        return {
+            'category': category,
+            'confidence': share,
+            'all_probabilities': {c: n / total for c, n in counts.items()},
+            'source': 'user_overlay',
+            'corrections': total
+        }
+
+    def record(self, user_id, description, category, previous_category=None):
+        """Apply a committed correction to the user's cached overlay, if there is one"""
+        overlay = self._cache.get(user_id)
+        if overlay is not None:
+            overlay.add(merchant_key(description), category, previous_category)
+
+    def invalidate(self, user_id):
+        self._cache.pop(user_id)
+
+    def stats(self):
+        cache = self._cache.stats()
+        return {
+            'users_cached': cache['size'],
+            'max_users': cache['max_size'],
+            'max_merchants_per_user': self.max_merchants,
+            'hit_rate': cache['hit_rate'],
+            'evictions': cache['evictions'],
+            'builds': self.builds,
+            'overrides': self.overrides
+        }
+
+
+user_overlays = UserOverlayStore()
@@ -1,19 +1,26 @@
-from .database import Base, engine, SessionLocal
+from .database import Base, engine, SessionLocal, async_engine, AsyncSessionLocal, InlineSession
 from .user_models import User, Account, Transaction, FinancialGoal, ExchangeRate
 from .advanced_models import (
     AuditLog, Notification, Budget, Investment, RecurringTransaction,
     SavingsChallenge, FinancialInsight, UserPreference, ExchangeRateHistory,
-    MerchantCategory
+    MerchantCategory, CategoryCorrection, TransactionRollup
 )
+# Keeps transaction_rollups in step with every ORM write of transactions
+from .rollups import RollupDeltas, backfill_rollups, month_bucket, rebuild_rollups
 
 # Create all tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so indexes added to them later are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 __all__ = [
-    "Base", "engine", "SessionLocal", "User", "Account", "Transaction", 
+    "Base", "engine", "SessionLocal", "async_engine", "AsyncSessionLocal", "InlineSession", "User", "Account", "Transaction", 
     "FinancialGoal", "ExchangeRate", "create_tables", "AuditLog", 
     "Notification", "Budget", "Investment", "RecurringTransaction",
     "SavingsChallenge", "FinancialInsight", "UserPreference", 
-    "ExchangeRateHistory", "MerchantCategory"
+    "ExchangeRateHistory", "MerchantCategory", "CategoryCorrection", "TransactionRollup",
+    "RollupDeltas", "backfill_rollups", "month_bucket", "rebuild_rollups"
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, UniqueConstraint
 from datetime import datetime
 from .database import Base
 
@@ -158,3 +158,38 @@ class MerchantCategory(Base):
     is_verified = Column(Boolean, default=False)
     logo_url = Column(String(255))
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class CategoryCorrection(Base):
+    """User corrections of ML-predicted transaction categories (online learning feedback)"""
+    __tablename__ = "category_corrections"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), index=True)
+    description = Column(String(255), nullable=False)
+    predicted_category = Column(String(100))
+    corrected_category = Column(String(100), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class TransactionRollup(Base):
+    """
+    Per-user monthly totals of transactions by category and currency, kept in step
+    with the transactions table on every write (see models/rollups.py) so analytics
+    read a few rows per month instead of every transaction ever made
+    """
+    __tablename__ = "transaction_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "category", "currency", name="uq_transaction_rollup_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(String(7), nullable=False)  # YYYY-MM
+    category = Column(String(100), nullable=False, default="")  # "" for uncategorized transactions
+    currency = Column(String(3), nullable=False)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    income_amount = Column(Float, nullable=False, default=0.0)  # sum of positive amounts
+    income_count = Column(Integer, nullable=False, default=0)
+    expense_amount = Column(Float, nullable=False, default=0.0)  # sum of negative amounts (<= 0)
+    expense_count = Column(Integer, nullable=False, default=0)
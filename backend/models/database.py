@@ -1,12 +1,152 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+_URL = make_url(settings.DATABASE_URL)
+_BACKEND = _URL.get_backend_name()
+
 engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # SQLite specific
+    settings.DATABASE_URL,
+    connect_args={"check_same_thread": False},  # SQLite specific
+    # SQLite sessions run on the event loop (InlineSession below) and must never wait for a
+    # pooled connection: the request holding one cannot give it back while the loop waits.
+    # Connections past the pool size are opened on demand and closed when returned.
+    **({"max_overflow": -1} if _BACKEND == "sqlite" and _URL.database not in (None, "", ":memory:") else {})
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# Async drivers for the same database: aiosqlite runs SQLite calls on a helper
+# thread, asyncpg speaks the PostgreSQL protocol natively on the event loop
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url=None):
+    """DATABASE_URL with its driver swapped for the async one (an explicit async driver is kept)"""
+    url = make_url(url or settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    if url.get_driver_name() in ("aiosqlite", "asyncpg"):
+        return url
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+# SQLite stays on the synchronous driver unless DATABASE_ASYNC asks for aiosqlite: a local
+# file has no network round trip to overlap, and aiosqlite's hand-off of every statement to
+# its own thread cost ~20% of the throughput and doubled p95 (benchmark_concurrency.py)
+_ASYNC_MODE = settings.DATABASE_ASYNC.lower()
+ASYNC_DATABASE = _ASYNC_MODE == "true" or (_ASYNC_MODE == "auto" and _BACKEND != "sqlite")
+
+# aiosqlite logs two DEBUG records per statement, and register/login switch the root
+# logger to DEBUG, so formatting them became a large share of each request under load
+logging.getLogger("aiosqlite").setLevel(logging.INFO)
+
+
+class InlineSession:
+    """
+    The AsyncSession methods the API uses, over a regular Session that runs
+    each call inline on the event loop.
+
+    The handlers are written against AsyncSession; without an async driver
+    (SQLite by default) get_async_db() hands them this instead, so their
+    queries run as they did before the async layer existed.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    @property
+    def info(self):
+        return self.sync_session.info
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return self.sync_session.execute(statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return self.sync_session.scalar(statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return self.sync_session.scalars(statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        self.sync_session.delete(instance)
+
+    async def flush(self, objects=None):
+        self.sync_session.flush(objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        self.sync_session.refresh(instance, attribute_names)
+
+    async def commit(self):
+        self.sync_session.commit()
+
+    async def rollback(self):
+        self.sync_session.rollback()
+
+    async def close(self):
+        self.sync_session.close()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.sync_session.close()
+
+
+if ASYNC_DATABASE:
+    # A transaction write holds SQLite's single write lock across several statements (row,
+    # rollups, account balance), and under load other writers can queue behind it for longer
+    # than pysqlite's 5 s default busy timeout
+    async_engine = create_async_engine(
+        async_database_url(),
+        connect_args={"timeout": 30} if _BACKEND == "sqlite" else {}
+    )
+
+    # expire_on_commit=False: handlers return ORM objects after commit, and reloading
+    # expired attributes would need an await that FastAPI's serializer cannot do
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+else:
+    async_engine = None
+    # Same options as the async sessions, so handlers behave alike on either path
+    _InlineSessionLocal = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+
+    def AsyncSessionLocal():
+        return InlineSession(_InlineSessionLocal())
+
+
+def _sqlite_wal(dbapi_connection, connection_record):
+    # WAL lets readers and the single writer proceed together instead of every reader
+    # blocking a writer. The mode is stored in the database file and stays after this
+    # setting is turned off, so it is opt-in (SQLITE_WAL) rather than applied on connect.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+if _BACKEND == "sqlite" and settings.SQLITE_WAL:
+    event.listen(engine, "connect", _sqlite_wal)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "connect", _sqlite_wal)
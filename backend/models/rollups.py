@@ -0,0 +1,217 @@
+"""
+Maintenance of transaction_rollups: per-user monthly totals by category and currency.
+
+Every ORM flush that inserts, updates or deletes Transaction rows adds the
+difference it makes to each affected (user_id, month, category, currency) row,
+on the flush's own connection, so the rollups commit or roll back together with
+the transactions themselves. Old values are read in before_flush (an update or
+delete subtracts what the row contributed before), new ones in after_flush (so
+column defaults such as transaction_date are already applied).
+
+Writers that bypass the ORM - ml/recategorize.py's Core executemany UPDATE -
+fill a RollupDeltas themselves and apply it before committing. rebuild_rollups()
+recomputes rows from the transactions table; it runs on the first start after
+upgrading and can repair the table:
+
+    python -m models.rollups rebuild [--user-id 42 ...]
+"""
+
+import argparse
+
+from sqlalchemy import and_, case, delete, event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from .advanced_models import TransactionRollup
+from .user_models import Transaction
+
+ROLLUP_KEY = ('user_id', 'month', 'category', 'currency')
+ROLLUP_FIELDS = (
+    'total_amount', 'transaction_count', 'income_amount',
+    'income_count', 'expense_amount', 'expense_count'
+)
+
+# Transaction columns a rollup row depends on, in RollupDeltas.add() order
+_TRACKED = ('user_id', 'transaction_date', 'category', 'currency', 'amount')
+_PENDING_KEY = 'transaction_rollup_deltas'
+
+
+def month_bucket(column, dialect_name):
+    """SQL expression for the YYYY-MM month of a datetime column"""
+    if dialect_name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
+
+
+class RollupDeltas:
+    """Changes to rollup rows, summed per key and written with one upsert"""
+
+    def __init__(self):
+        self.changes = {}
+
+    def add(self, user_id, transaction_date, category, currency, amount, sign=1):
+        """Count one transaction in (sign=1) or out of (sign=-1) its rollup row"""
+        if user_id is None or transaction_date is None or amount is None:
+            return
+        key = (user_id, transaction_date.strftime('%Y-%m'), category or '', currency)
+        change = self.changes.setdefault(key, [0.0, 0, 0.0, 0, 0.0, 0])
+        change[0] += sign * amount
+        change[1] += sign
+        if amount > 0:
+            change[2] += sign * amount
+            change[3] += sign
+        elif amount < 0:
+            change[4] += sign * amount
+            change[5] += sign
+
+    def apply(self, connection):
+        rows = [
+            dict(zip(ROLLUP_KEY, key), **dict(zip(ROLLUP_FIELDS, change)))
+            for key, change in self.changes.items()
+            if any(change)  # moved out and back in within the same flush
+        ]
+        self.changes = {}
+        if rows:
+            _upsert(connection, rows)
+        return len(rows)
+
+
+def _upsert(connection, rows):
+    table = TransactionRollup.__table__
+    dialect_name = connection.dialect.name
+    if dialect_name in ('sqlite', 'postgresql'):
+        if dialect_name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY),
+            set_={field: table.c[field] + stmt.excluded[field] for field in ROLLUP_FIELDS}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # No portable upsert: add to the row if it exists, insert it otherwise
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(and_(*(table.c[column] == row[column] for column in ROLLUP_KEY)))
+            .values({field: table.c[field] + row[field] for field in ROLLUP_FIELDS})
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(row))
+
+
+def rebuild_rollups(connection, user_ids=None):
+    """Recompute the rollups of all users (or only user_ids) from transactions; returns rows written"""
+    rollups = TransactionRollup.__table__
+    transactions = Transaction.__table__
+    amount = transactions.c.amount
+    month = month_bucket(transactions.c.transaction_date, connection.dialect.name)
+    category = func.coalesce(transactions.c.category, '')
+
+    query = select(
+        transactions.c.user_id, month, category, transactions.c.currency,
+        func.sum(amount),
+        func.count(),
+        func.sum(case((amount > 0, amount), else_=0.0)),
+        func.sum(case((amount > 0, 1), else_=0)),
+        func.sum(case((amount < 0, amount), else_=0.0)),
+        func.sum(case((amount < 0, 1), else_=0)),
+    ).where(
+        transactions.c.user_id.isnot(None),
+        transactions.c.transaction_date.isnot(None)
+    ).group_by(transactions.c.user_id, month, category, transactions.c.currency)
+
+    clear = delete(rollups)
+    if user_ids is not None:
+        query = query.where(transactions.c.user_id.in_(list(user_ids)))
+        clear = clear.where(rollups.c.user_id.in_(list(user_ids)))
+
+    connection.execute(clear)
+    result = connection.execute(insert(rollups).from_select(list(ROLLUP_KEY + ROLLUP_FIELDS), query))
+    return result.rowcount
+
+
+def backfill_rollups(bind):
+    """Build the rollups of existing transactions if there are none yet (first start after upgrading)"""
+    with bind.begin() as connection:
+        if connection.execute(select(TransactionRollup.id).limit(1)).first() is not None:
+            return 0
+        if connection.execute(select(Transaction.id).limit(1)).first() is None:
+            return 0
+        return rebuild_rollups(connection)
+
+
+def _previous_values(target):
+    """The tracked columns as stored before this flush"""
+    state = inspect(target)
+    values = []
+    for name in _TRACKED:
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.added:
+            values.append(None)  # was NULL before being set
+        else:
+            values.append(getattr(target, name))
+    return values
+
+
+def _current_values(target):
+    return [getattr(target, name) for name in _TRACKED]
+
+
+def _load_previous(target, value, oldvalue, initiator):
+    # Registered for active_history: assigning to an expired column then loads the stored
+    # value first, so _previous_values() knows which rollup row to take the transaction out of
+    pass
+
+
+for _name in _TRACKED:
+    event.listen(getattr(Transaction, _name), 'set', _load_previous, active_history=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _remove_previous(session, flush_context, instances):
+    deltas = RollupDeltas()
+    changed = []
+    for target in session.dirty:
+        if isinstance(target, Transaction) and target not in session.deleted and session.is_modified(target):
+            deltas.add(*_previous_values(target), sign=-1)
+            changed.append(target)
+    for target in session.deleted:
+        if isinstance(target, Transaction):
+            deltas.add(*_previous_values(target), sign=-1)
+    session.info[_PENDING_KEY] = (deltas, changed)
+
+
+@event.listens_for(Session, 'after_flush')
+def _add_current(session, flush_context):
+    deltas, changed = session.info.pop(_PENDING_KEY, (RollupDeltas(), []))
+    for target in session.new:
+        if isinstance(target, Transaction):
+            deltas.add(*_current_values(target))
+    for target in changed:
+        deltas.add(*_current_values(target))
+    # Same connection, same database transaction as the rows just flushed
+    deltas.apply(session.connection())
+
+
+def main(argv=None):
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description="Maintain the transaction_rollups table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="recompute rollups from the transactions table")
+    rebuild.add_argument("--user-id", type=int, nargs="+", help="only these users")
+    args = parser.parse_args(argv)
+
+    TransactionRollup.__table__.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        written = rebuild_rollups(connection, args.user_id)
+    print(f"[+] Rebuilt {written} rollup rows for {'users ' + str(args.user_id) if args.user_id else 'all users'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Shared setup for the backend unit tests.
+
+Settings are read once when app.config is imported, so the environment is
+pointed at a throwaway database and artifact directory before any test module
+imports the application. Background threads (hot-swap polling, online
+learning, shadow scoring) are off; tests drive them by hand.
+
+    cd backend
+    python -m pytest tests -q
+"""
+
+import os
+import sys
+import tempfile
+
+_WORKDIR = tempfile.mkdtemp(prefix="nexus-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'test.sqlite')}"
+os.environ["ML_ARTIFACT_DIR"] = os.path.join(_WORKDIR, "artifacts")
+os.environ["ML_HOT_SWAP_INTERVAL"] = "0"
+os.environ["ML_ONLINE_LEARNING"] = "false"
+os.environ["ML_SHADOW_MODE"] = "false"
+os.environ["ANALYTICS_CACHE_BACKEND"] = "memory"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,115 @@
+"""
+Cached analytics must stop being served once the user's data changes: the data
+version is bumped after a committed ORM write, and not after a rollback.
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.analytics_cache import analytics_cache
+from models import Account, FinancialGoal, SessionLocal, Transaction, User, create_tables
+
+RESULT = {'total_expenses': -12.5}
+
+
+@pytest.fixture
+def db():
+    create_tables()
+    analytics_cache.clear()
+    with SessionLocal() as session:
+        yield session
+
+
+def new_user(db):
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def user_id(db):
+    return new_user(db)
+
+
+def cache_result(user_id):
+    key, cached = analytics_cache.lookup(user_id, 'spending_insights')
+    assert cached is None
+    analytics_cache.store(key, RESULT)
+    assert cached_result(user_id) == RESULT
+
+
+def cached_result(user_id):
+    return analytics_cache.lookup(user_id, 'spending_insights')[1]
+
+
+def transaction(user_id, amount=-12.5):
+    return Transaction(user_id=user_id, amount=amount, description="OK Zimbabwe", category="groceries",
+                       currency="USD", transaction_date=datetime(2024, 3, 15))
+
+
+@pytest.mark.parametrize("make_row", [
+    transaction,
+    lambda user_id: Account(user_id=user_id, name="Wallet", currency="USD"),
+    lambda user_id: FinancialGoal(user_id=user_id, title="School fees", target_amount=500.0, currency="USD"),
+])
+def test_insert_bumps_version_at_commit(db, user_id, make_row):
+    cache_result(user_id)
+    db.add(make_row(user_id))
+    db.flush()
+    # Not committed yet: other requests still see the old data, so the result stays valid
+    assert cached_result(user_id) == RESULT
+    db.commit()
+    assert cached_result(user_id) is None
+
+
+def test_update_and_delete_bump_version(db, user_id):
+    row = transaction(user_id)
+    db.add(row)
+    db.commit()
+
+    cache_result(user_id)
+    row.amount = -20.0
+    db.commit()
+    assert cached_result(user_id) is None
+
+    cache_result(user_id)
+    db.delete(row)
+    db.commit()
+    assert cached_result(user_id) is None
+
+
+def test_moving_a_row_bumps_both_users(db, user_id):
+    other_id = new_user(db)
+    row = transaction(user_id)
+    db.add(row)
+    db.commit()
+
+    cache_result(user_id)
+    cache_result(other_id)
+    row.user_id = other_id
+    db.commit()
+    assert cached_result(user_id) is None
+    assert cached_result(other_id) is None
+
+
+def test_rollback_keeps_version(db, user_id):
+    cache_result(user_id)
+    db.add(transaction(user_id))
+    db.flush()
+    db.rollback()
+    assert cached_result(user_id) == RESULT
+
+    # The discarded change must not bump the version at the next, unrelated commit
+    db.commit()
+    assert cached_result(user_id) == RESULT
+
+
+def test_other_users_results_survive(db, user_id):
+    other_id = new_user(db)
+    cache_result(other_id)
+    db.add(transaction(user_id))
+    db.commit()
+    assert cached_result(other_id) == RESULT
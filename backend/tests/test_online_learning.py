@@ -0,0 +1,104 @@
+"""
+Online learning against the hot-swap watcher: updates the learner has not
+published yet must survive a watcher poll and end up in the published model.
+"""
+
+import pytest
+
+from app.config import settings
+from ml.hot_swap import model_watcher
+from ml.online_learning import OnlineLearner
+from ml.transaction_classifier import (
+    AdvancedTransactionClassifier, artifact_path, get_classifier, read_latest_version, read_model_file
+)
+from models import CategoryCorrection, SessionLocal, create_tables
+
+DESCRIPTION = "ZESA prepaid token"
+CORRECTED = "groceries"
+
+
+@pytest.fixture
+def classifier():
+    create_tables()
+    # A freshly trained live model, published as LATEST, that has seen no corrections
+    classifier = get_classifier()
+    classifier.train(classifier.generate_zimbabwe_synthetic_data(600, seed=1), save=False)
+    classifier.publish_model()
+    return classifier
+
+
+@pytest.fixture
+def learner(tmp_path):
+    learner = OnlineLearner(batch_size=500, lock_file=str(tmp_path / "learner.lock"))
+    learner.last_correction_id = learner.published_correction_id = learner._resume_point()
+    return learner
+
+
+def record_corrections(count=300):
+    with SessionLocal() as db:
+        db.add_all([
+            CategoryCorrection(user_id=1, description=DESCRIPTION, predicted_category='utilities',
+                               corrected_category=CORRECTED)
+            for _ in range(count)
+        ])
+        db.commit()
+        return db.query(CategoryCorrection.id).order_by(CategoryCorrection.id.desc()).first().id
+
+
+def predicted(classifier):
+    return classifier.predict_category(DESCRIPTION)['category']
+
+
+def test_watcher_keeps_unpublished_updates_and_checkpoint_publishes_them(classifier, learner):
+    assert predicted(classifier) != CORRECTED
+    base = classifier.model_version
+    last_id = record_corrections()
+
+    assert learner.poll() == 300
+    assert predicted(classifier) == CORRECTED
+    assert classifier.model_version != base and classifier.published_version == base
+
+    # LATEST still names the base the updates were applied to: nothing to install
+    assert model_watcher.check_once() is False
+    assert predicted(classifier) == CORRECTED
+
+    assert learner.checkpoint() is True
+    assert read_latest_version() == classifier.model_version == classifier.published_version
+    published = read_model_file(artifact_path(classifier.model_version, settings.ML_ARTIFACT_DIR))
+    assert published['metadata']['last_correction_id'] == last_id
+    reloaded = AdvancedTransactionClassifier(auto_initialize=False)
+    reloaded.install_model(published['model'], published['vectorizer'], published['categories'], published['version'])
+    assert predicted(reloaded) == CORRECTED
+
+
+def test_checkpoint_replays_corrections_when_latest_moves(classifier, learner):
+    record_corrections()
+    learner.poll()
+
+    # Another process publishes a model trained without the corrections
+    other = AdvancedTransactionClassifier(auto_initialize=False)
+    other.train(other.generate_zimbabwe_synthetic_data(600, seed=7), save=False)
+    other.publish_model()
+
+    assert learner.checkpoint() is False
+    assert learner.conflicts == 1
+    assert learner.last_correction_id == learner.published_correction_id
+
+    # The next poll installs the new LATEST and applies the corrections to it
+    assert learner.poll() == 300
+    assert classifier.published_version == other.model_version
+    assert predicted(classifier) == CORRECTED
+    assert learner.checkpoint() is True
+    assert read_latest_version() == classifier.model_version
+
+
+def test_checkpoint_refuses_a_model_replaced_under_it(classifier, learner):
+    record_corrections()
+    learner.poll()
+    # The live model is swapped for one without the updates (e.g. reinstalled from LATEST)
+    base = read_model_file(artifact_path(classifier.published_version, settings.ML_ARTIFACT_DIR))
+    classifier.install_model(base['model'], base['vectorizer'], base['categories'], base['version'])
+
+    assert learner.checkpoint() is False
+    assert learner.conflicts == 1
+    assert read_latest_version() == base['version']
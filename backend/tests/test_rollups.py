@@ -0,0 +1,137 @@
+"""
+transaction_rollups is maintained incrementally (ORM flush events in
+models/rollups.py, explicit deltas in ml/recategorize.py); after every kind of
+change it must hold what rebuild_rollups() computes from the transactions.
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from ml.recategorize import recategorize_transactions
+from models import SessionLocal, Transaction, TransactionRollup, User, create_tables
+from models.rollups import rebuild_rollups
+
+MARCH = datetime(2024, 3, 15)
+APRIL = datetime(2024, 4, 2)
+
+
+@pytest.fixture
+def db():
+    create_tables()
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def user_id(db):
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def add_transactions(db, user_id):
+    rows = [
+        Transaction(user_id=user_id, amount=-12.5, description="OK Zimbabwe", category="groceries",
+                    currency="USD", transaction_date=MARCH),
+        Transaction(user_id=user_id, amount=-3.0, description="ZUPCO fare", category="transport",
+                    currency="USD", transaction_date=MARCH),
+        Transaction(user_id=user_id, amount=900.0, description="Salary", category="salary",
+                    currency="USD", transaction_date=MARCH),
+        Transaction(user_id=user_id, amount=-40.0, description="ZESA token", category=None,
+                    currency="ZWG", transaction_date=APRIL),
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def maintained(db, user_id):
+    rows = db.execute(
+        select(TransactionRollup).where(TransactionRollup.user_id == user_id,
+                                        TransactionRollup.transaction_count != 0)
+    ).scalars().all()
+    return snapshot(rows)
+
+
+def snapshot(rows):
+    return {
+        (row.month, row.category, row.currency): (
+            round(row.total_amount, 6), row.transaction_count,
+            round(row.income_amount, 6), row.income_count,
+            round(row.expense_amount, 6), row.expense_count
+        )
+        for row in rows
+    }
+
+
+def assert_matches_rebuild(db, user_id):
+    db.expire_all()
+    before = maintained(db, user_id)
+    rebuild_rollups(db.connection(), [user_id])
+    db.commit()
+    db.expire_all()
+    assert maintained(db, user_id) == before
+    return before
+
+
+def test_insert(db, user_id):
+    add_transactions(db, user_id)
+    rollups = assert_matches_rebuild(db, user_id)
+    assert rollups[('2024-03', 'groceries', 'USD')][1] == 1
+    assert ('2024-04', '', 'ZWG') in rollups
+
+
+@pytest.mark.parametrize("column, value", [
+    ("amount", 25.0),                       # expense becomes income
+    ("category", "restaurants"),
+    ("category", None),
+    ("transaction_date", APRIL),
+    ("currency", "ZWG"),
+])
+def test_update(db, user_id, column, value):
+    rows = add_transactions(db, user_id)
+    setattr(rows[0], column, value)
+    db.commit()
+    assert_matches_rebuild(db, user_id)
+
+
+def test_update_after_expire(db, user_id):
+    # The previous value has to be loaded before the assignment to find the old rollup row
+    rows = add_transactions(db, user_id)
+    db.expire_all()
+    rows[1].category = "groceries"
+    rows[1].amount = -5.0
+    db.commit()
+    assert_matches_rebuild(db, user_id)
+
+
+def test_delete(db, user_id):
+    rows = add_transactions(db, user_id)
+    db.delete(rows[1])
+    db.delete(rows[3])
+    db.commit()
+    rollups = assert_matches_rebuild(db, user_id)
+    assert ('2024-04', '', 'ZWG') not in rollups
+
+
+class FixedClassifier:
+    """Stands in for the model: every description it is asked about is 'education'"""
+
+    model_version = "test"
+
+    def predict_categories(self, descriptions, amounts=None, top_k=None):
+        return [{'category': 'education', 'confidence': 1.0} for _ in descriptions]
+
+
+def test_recategorize(db, user_id):
+    start_after_id = db.scalar(select(func.max(Transaction.id))) or 0
+    add_transactions(db, user_id)
+    state = recategorize_transactions(db, FixedClassifier(), chunk_size=3,
+                                      start_after_id=start_after_id, progress=lambda message: None)
+    assert state['changed'] > 0
+    rollups = assert_matches_rebuild(db, user_id)
+    assert ('2024-03', 'education', 'USD') in rollups
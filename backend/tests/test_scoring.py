@@ -0,0 +1,70 @@
+"""NaiveBayesScorer must reproduce MultinomialNB.predict_proba for the fitted pipeline"""
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.utils import murmurhash3_32 as sklearn_murmurhash3_32
+
+from ml.scoring import NaiveBayesScorer, murmurhash3_32, normalize_description
+
+TRAINING = [
+    ("pick n pay groceries borrowdale", "groceries"),
+    ("ok zimbabwe supermarket", "groceries"),
+    ("spar avondale groceries", "groceries"),
+    ("zesa prepaid electricity token", "utilities"),
+    ("harare city council water bill", "utilities"),
+    ("telone internet bill", "utilities"),
+    ("zupco bus fare", "transport"),
+    ("kombi fare town", "transport"),
+    ("puma fuel station", "transport"),
+    ("chicken inn avondale", "restaurants"),
+    ("pizza inn borrowdale", "restaurants"),
+]
+
+QUERIES = [
+    "Pick n Pay Avondale",
+    "ZESA token 0423",
+    "kombi fare to town town",
+    "Chicken Inn",
+    "something never seen before",
+    "",
+]
+
+
+def _fit(vectorizer):
+    texts = [text for text, _ in TRAINING]
+    model = MultinomialNB().fit(vectorizer.fit_transform(texts), [label for _, label in TRAINING])
+    return model, vectorizer
+
+
+def _assert_matches_sklearn(model, vectorizer):
+    scorer = NaiveBayesScorer.from_sklearn(model, vectorizer)
+    processed = [normalize_description(query) for query in QUERIES]
+    expected = model.predict_proba(vectorizer.transform(processed))
+
+    labels, confidences, probabilities = scorer.score_many(processed)
+    np.testing.assert_allclose(probabilities, expected, rtol=1e-10, atol=1e-12)
+    assert labels == list(model.classes_[expected.argmax(axis=1)])
+    np.testing.assert_allclose(confidences, expected.max(axis=1), rtol=1e-10)
+
+    for text, row in zip(processed, expected):
+        label, confidence, single = scorer.score(text)
+        np.testing.assert_allclose(single, row, rtol=1e-10, atol=1e-12)
+        assert label == model.classes_[row.argmax()]
+        assert confidence == pytest.approx(row.max(), rel=1e-10)
+
+
+def test_count_scorer_matches_predict_proba():
+    _assert_matches_sklearn(*_fit(CountVectorizer(ngram_range=(1, 2), max_features=1000)))
+
+
+def test_hashing_scorer_matches_predict_proba():
+    vectorizer = HashingVectorizer(n_features=2 ** 10, alternate_sign=False, ngram_range=(1, 2), norm=None)
+    _assert_matches_sklearn(*_fit(vectorizer))
+
+
+@pytest.mark.parametrize("text", ["", "a", "zesa", "pick n", "chicken inn avondale", "harare ü ñ 0423"])
+def test_murmurhash_matches_sklearn(text):
+    assert murmurhash3_32(text) == sklearn_murmurhash3_32(text, seed=0)
+    assert murmurhash3_32(text, seed=42) == sklearn_murmurhash3_32(text, seed=42)
@@ -0,0 +1,82 @@
+"""
+The authenticated-user cache must forget a principal once its users row
+changes: at flush, and again after commit in case it was re-cached in between.
+"""
+
+import uuid
+
+import pytest
+
+from app.user_cache import AuthenticatedUser, user_cache
+from models import SessionLocal, User, create_tables
+
+
+@pytest.fixture
+def user():
+    create_tables()
+    user_cache.clear()
+    with SessionLocal() as db:
+        row = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x", full_name="Test")
+        db.add(row)
+        db.commit()
+        return row.id, row.email
+
+
+def cache(user_id, email, is_active=True):
+    user_cache.set(AuthenticatedUser(user_id, email, is_active))
+
+
+def test_update_invalidates_after_commit(user):
+    user_id, email = user
+    cache(user_id, email)
+    with SessionLocal() as db:
+        db.get(User, user_id).is_active = False
+        db.flush()
+        assert user_cache.get(email) is None
+        # A request that read the row before the commit caches the old principal again
+        cache(user_id, email)
+        db.commit()
+    assert user_cache.get(email) is None
+
+
+def test_email_change_invalidates_old_and_new_subject(user):
+    user_id, email = user
+    new_email = f"new-{email}"
+    cache(user_id, email)
+    cache(user_id, new_email)
+    with SessionLocal() as db:
+        db.get(User, user_id).email = new_email
+        db.commit()
+    assert user_cache.get(email) is None
+    assert user_cache.get(new_email) is None
+
+
+def test_delete_invalidates(user):
+    user_id, email = user
+    cache(user_id, email)
+    with SessionLocal() as db:
+        db.delete(db.get(User, user_id))
+        db.commit()
+    assert user_cache.get(email) is None
+
+
+def test_rollback_leaves_recached_principal(user):
+    user_id, email = user
+    with SessionLocal() as db:
+        db.get(User, user_id).is_active = False
+        db.flush()
+        cache(user_id, email)
+        db.rollback()
+    # The row never changed, so the principal cached after the flush is still valid
+    assert user_cache.get(email).is_active
+
+
+def test_insert_invalidates_cached_subject():
+    create_tables()
+    email = f"{uuid.uuid4().hex}@example.com"
+    # e.g. a stale principal left behind by a deleted account with the same email
+    cache(-1, email)
+    with SessionLocal() as db:
+        db.add(User(email=email, hashed_password="x"))
+        db.commit()
+    assert user_cache.get(email) is None
@@ -163,7 +163,7 @@ def test_analytics_engine():
     print_header("TEST 4: FINANCIAL ANALYTICS ENGINE")
     
     try:
-        from analytics.financial_analytics import analytics_engine
+        from analytics.financial_analytics import analytics_engine, rollup_transactions
         
         # Create sample transaction data
         sample_transactions = [
@@ -184,19 +184,22 @@ def test_analytics_engine():
             {'current_amount': 500, 'target_amount': 1000}
         ]
         
+        # The engine reads monthly rollups (as stored in transaction_rollups)
+        sample_rollups = rollup_transactions(sample_transactions)
+        
         # Test 1: Spending insights
-        insights = analytics_engine.calculate_spending_insights(sample_transactions)
+        insights = analytics_engine.calculate_spending_insights(sample_rollups, sample_transactions)
         print_test("Spending insights calculation", 'category_breakdown' in insights)
         
         # Test 2: Cash flow forecast
         forecast = analytics_engine.generate_cash_flow_forecast(
-            sample_transactions, sample_accounts, 0.02
+            sample_rollups, sample_accounts, 0.02
         )
         print_test("Cash flow forecast", 'forecast' in forecast)
         
         # Test 3: Financial health score
         health = analytics_engine.calculate_financial_health_score(
-            sample_transactions, sample_accounts, sample_goals
+            sample_rollups, sample_accounts, sample_goals
         )
         has_score = 'score' in health and health['score'] >= 0
         print_test("Financial health score", has_score, 
@@ -204,7 +207,7 @@ def test_analytics_engine():
         
         # Test 4: Zimbabwe-specific insights
         zim_insights = analytics_engine.generate_zimbabwe_specific_insights(
-            sample_transactions
+            sample_rollups, sample_transactions
         )
         print_test("Zimbabwe-specific insights", 'currency_breakdown' in zim_insights)
         